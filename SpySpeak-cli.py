@@ -1,17 +1,124 @@
 #!/usr/bin/env python3
-import random
-import argparse
 import os
 import sys
 import json
+import socket
+import stat
+
+# -------------------- Daemon Client ---------------------
+
+# The client comes before the other imports: a --client command line that a
+# daemon answers exits before the rest of the module is loaded or the
+# command line parser is built, so it only pays for starting Python
+
+def default_daemon_socket():
+    """$SPYSPEAK_SOCKET, else spyspeak.sock in $XDG_RUNTIME_DIR or in a private per-user temp directory"""
+    if os.environ.get('SPYSPEAK_SOCKET'):
+        return os.environ['SPYSPEAK_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], "spyspeak.sock")
+    user = os.getuid() if hasattr(os, 'getuid') else 'user'
+    return os.path.join(os.environ.get('TMPDIR') or "/tmp", f"spyspeak-{user}", "daemon.sock")
+
+DAEMON_SOCKET = default_daemon_socket()
+
+def daemon_socket_problem(socket_path):
+    """Why socket_path can't be trusted, or None
+    
+    The socket's directory must belong to the current user and not be
+    writable by anyone else, so no other local user can put a socket of
+    their own in its place; the socket must belong to the current user too.
+    A missing directory or socket just means no daemon is running.
+    """
+    if not hasattr(os, 'getuid'):
+        return None
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    try:
+        directory_stat = os.stat(directory)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        return f"can't access '{directory}': {e.strerror}"
+    if directory_stat.st_uid != os.getuid() or directory_stat.st_mode & 0o022:
+        return f"'{directory}' must belong to you and not be writable by others"
+    try:
+        socket_stat = os.lstat(socket_path)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        return f"can't access '{socket_path}': {e.strerror}"
+    if not stat.S_ISSOCK(socket_stat.st_mode) or socket_stat.st_uid != os.getuid():
+        return f"'{socket_path}' is not a socket of yours"
+    return None
+
+def forward_to_daemon(argv, socket_path):
+    """Run a command line in the daemon and relay its output
+    
+    Returns the daemon's exit status, or None if no daemon is listening or
+    its socket can't be trusted (see daemon_socket_problem()).
+    """
+    problem = daemon_socket_problem(socket_path)
+    if problem:
+        sys.stderr.write(f"Warning: Not using the daemon: {problem}\n")
+        return None
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(socket_path)
+    except (OSError, AttributeError):
+        return None
+    
+    with client:
+        client.sendall(json.dumps({'argv': argv, 'cwd': os.getcwd()}).encode('utf-8') + b"\n")
+        with client.makefile('rb') as reply:
+            response = json.loads(reply.readline())
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['status']
+
+def client_socket_path(argv):
+    """The --socket path given in a command line, or the default one"""
+    for position, arg in enumerate(argv):
+        if arg == '--socket' and position + 1 < len(argv):
+            return argv[position + 1]
+        if arg.startswith('--socket='):
+            return arg.partition('=')[2]
+    return DAEMON_SOCKET
+
+# Set once this command line has been offered to the daemon, so main() doesn't try again
+daemon_checked = False
+if __name__ == "__main__" and "--client" in sys.argv[1:] and "--daemon" not in sys.argv[1:]:
+    daemon_status = forward_to_daemon(sys.argv[1:], client_socket_path(sys.argv[1:]))
+    if daemon_status is not None:
+        sys.exit(daemon_status)
+    daemon_checked = True
+
+import random
+import argparse
+import re
 import csv
-from io import StringIO
+import sqlite3
+import hashlib
+import math
+import tempfile
+import threading
+import time
+import bisect
+import functools
+import gzip
+import signal
+import socketserver
+import tracemalloc
+import unicodedata
+from array import array
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO, TextIOWrapper
+from itertools import chain, islice
 
 def load_words(filename):
-    """Load words from a file, one word per line"""
+    """Load words from a file, one word per line (an optional tab-separated weight column is ignored)"""
     try:
         with open(filename, 'r', encoding='utf-8') as file:
-            words = [line.strip() for line in file if line.strip()]
+            words = [word for word in (line.split('\t', 1)[0].strip() for line in file) if word]
             if not words:
                 sys.stderr.write(f"Warning: File '{filename}' exists but contains no usable words\n")
             return words
@@ -22,6 +129,27 @@ def load_words(filename):
         sys.stderr.write(f"Error reading '{filename}': {str(e)}\n")
         return []
 
+def load_word_weights(filename):
+    """Load the optional tab-separated weight column of a word file as a word -> weight dict"""
+    weights = {}
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            for line in file:
+                word, tab, weight = line.partition('\t')
+                word = word.strip()
+                if not word or not tab:
+                    continue
+                try:
+                    weights[word] = float(weight)
+                except ValueError:
+                    weights[word] = 0.0
+                if weights[word] <= 0:
+                    sys.stderr.write(f"Warning: Ignoring invalid weight for '{word}' in '{filename}'\n")
+                    del weights[word]
+    except Exception as e:
+        sys.stderr.write(f"Error reading weights from '{filename}': {str(e)}\n")
+    return weights
+
 def load_exclusions(filename):
     """Load exclusion words from a file"""
     if not os.path.exists(filename):
@@ -42,8 +170,216 @@ def filter_excluded_words(words, exclusions):
     
     return [word for word in words if word.lower() not in exclusions]
 
+def normalize_for_blocklist(text):
+    """Lowercase text and drop everything but letters and digits"""
+    return ''.join(char for char in text.lower() if char.isalnum())
+
+class BlocklistMatcher:
+    """Aho-Corasick automaton that finds blocked substrings in linear time
+    
+    Patterns and checked text are both normalized with normalize_for_blocklist(),
+    so a pattern matches regardless of case or of the separator placed between
+    words: "bad word" blocks "Bad-Word", "BADWORD" and "Bad Wordsmith".
+    """
+    
+    def __init__(self, patterns):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.output = [None]
+        self.patterns = []
+        
+        for pattern in patterns:
+            pattern = normalize_for_blocklist(pattern)
+            if not pattern:
+                continue
+            self.patterns.append(pattern)
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            self.output[state] = pattern
+        
+        # Breadth-first pass to link each state to its longest proper suffix state
+        queue = list(self.transitions[0].values())
+        for state in queue:
+            for char, target in self.transitions[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.transitions[fallback].get(char, 0)
+                if self.output[target] is None:
+                    self.output[target] = self.output[self.fail[target]]
+                queue.append(target)
+    
+    def __len__(self):
+        return len(self.patterns)
+    
+    def search(self, text):
+        """Return the first blocked pattern found in text, or None"""
+        state = 0
+        for char in normalize_for_blocklist(text):
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            if self.output[state] is not None:
+                return self.output[state]
+        return None
+    
+    def matches(self, text):
+        """Check whether text contains any blocked pattern"""
+        return bool(self.patterns) and self.search(text) is not None
+
+def load_blocklist(filename):
+    """Load blocked substrings from a file and compile them into a matcher"""
+    if not os.path.exists(filename):
+        return None
+    
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            return BlocklistMatcher(line.strip() for line in file if line.strip())
+    except Exception as e:
+        sys.stderr.write(f"Error reading blocklist from '{filename}': {str(e)}\n")
+        return None
+
+def filter_blocked_words(words, blocklist):
+    """Filter out words that contain a blocked substring"""
+    if not blocklist:
+        return words
+    
+    return [word for word in words if not blocklist.matches(word)]
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein distance between two strings
+    
+    With a limit, stops early and returns limit + 1 once the distance is
+    known to exceed it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+SOUNDEX_CODES = {char: str(code) for code, letters in enumerate(
+    ["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for char in letters}
+
+def soundex(word):
+    """Four-character Soundex code of a word"""
+    code = word[0].upper()
+    last = SOUNDEX_CODES.get(word[0], "")
+    for char in word[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != "0" and digit != last:
+            code += digit
+        if char not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+def phonetic_key(name):
+    """Phonetic key of a codename: the Soundex code of each word, numbers kept as-is"""
+    words = re.findall(r"[a-z]+|[0-9]+", name.lower())
+    return " ".join(word if word.isdigit() else soundex(word) for word in words)
+
+class SimilarityIndex:
+    """Index of existing names for rejecting confusingly similar candidates
+    
+    Names are compared after normalize_for_blocklist(), so case and
+    separators are ignored. For edit distance each name is cut into
+    max_distance + 1 segments and bucketed by (length, segment number,
+    segment text); a name within max_distance edits must contain one of those
+    segments unchanged near its original position, so a query only looks up
+    a handful of buckets and verifies the few names found there. Phonetic
+    matching is a dictionary lookup on phonetic_key().
+    """
+    
+    def __init__(self, names=(), max_distance=1, phonetic=False):
+        self.max_distance = max_distance
+        self.phonetic = phonetic
+        self.buckets = {}
+        self.short_names = {}
+        self.lengths = set()
+        self.phonetic_keys = {}
+        self.size = 0
+        for name in names:
+            self.add(name)
+    
+    def __len__(self):
+        return self.size
+    
+    def _segments(self, length):
+        """Start and length of each segment of a name of the given length"""
+        pieces = self.max_distance + 1
+        short, extra = divmod(length, pieces)
+        start = 0
+        for piece in range(pieces):
+            size = short + (1 if piece >= pieces - extra else 0)
+            yield start, size
+            start += size
+    
+    def add(self, name):
+        """Add an existing name to the index"""
+        key = normalize_for_blocklist(name)
+        if not key:
+            return
+        self.size += 1
+        if self.phonetic:
+            self.phonetic_keys.setdefault(phonetic_key(name), name)
+        if self.max_distance <= 0:
+            return
+        
+        # Names too short to split are checked directly
+        if len(key) <= self.max_distance:
+            self.short_names.setdefault(key, name)
+            return
+        self.lengths.add(len(key))
+        for piece, (start, size) in enumerate(self._segments(len(key))):
+            self.buckets.setdefault((len(key), piece, key[start:start + size]), {}).setdefault(key, name)
+    
+    def find_similar(self, name):
+        """Return an indexed name that is too close to name, or None"""
+        if self.phonetic:
+            match = self.phonetic_keys.get(phonetic_key(name))
+            if match is not None:
+                return match
+        if self.max_distance <= 0:
+            return None
+        
+        key = normalize_for_blocklist(name)
+        limit = self.max_distance
+        for short_key, short_name in self.short_names.items():
+            if edit_distance(key, short_key, limit) <= limit:
+                return short_name
+        
+        checked = set()
+        for length in range(len(key) - limit, len(key) + limit + 1):
+            if length not in self.lengths:
+                continue
+            for piece, (start, size) in enumerate(self._segments(length)):
+                for offset in range(max(0, start - limit), min(len(key) - size, start + limit) + 1):
+                    bucket = self.buckets.get((length, piece, key[offset:offset + size]))
+                    if not bucket:
+                        continue
+                    for other_key, other_name in bucket.items():
+                        if other_key not in checked:
+                            checked.add(other_key)
+                            if edit_distance(key, other_key, limit) <= limit:
+                                return other_name
+        return None
+
 def load_favorites(filename):
-    """Load favorite codenames from a file"""
+    """Load codenames from a text file, one per line (issued names, or legacy favorites)"""
     if not os.path.exists(filename):
         return []
     
@@ -54,19 +390,694 @@ def load_favorites(filename):
         sys.stderr.write(f"Error loading favorites: {str(e)}\n")
         return []
 
-def save_favorites(favorites, filename):
-    """Save favorite codenames to a file"""
-    try:
-        with open(filename, 'w', encoding='utf-8') as file:
-            for name in favorites:
-                file.write(f"{name}\n")
-        return True
-    except Exception as e:
-        sys.stderr.write(f"Error saving favorites: {str(e)}\n")
-        return False
+FAVORITES_SCHEMA = """CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    theme TEXT,
+    added REAL NOT NULL
+)"""
+
+def favorites_store_path(filename):
+    """Path of the favorites database for a favorites file (favorites.txt is kept in favorites.db)"""
+    root, extension = os.path.splitext(filename)
+    return root + ".db" if extension.lower() == ".txt" else filename
+
+class FavoritesStore:
+    """Favorite codenames in a SQLite database
+    
+    The unique index on name makes the duplicate check and an add one
+    B-tree lookup, instead of reading and rewriting a whole file, and
+    SQLite's locking serializes concurrent writers (waiting up to 30
+    seconds for a lock) so no add is lost. Favorites are kept in insertion
+    order with the theme they were generated from. A legacy favorites.txt
+    is imported the first time its database is opened.
+    """
+    
+    def __init__(self, filename):
+        self.filename = favorites_store_path(filename)
+        created = not os.path.exists(self.filename)
+        self.connection = sqlite3.connect(self.filename, timeout=30, isolation_level=None)
+        self.connection.execute(FAVORITES_SCHEMA)
+        if created and self.filename != filename and os.path.exists(filename):
+            self.add_many(load_favorites(filename))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM favorites").fetchone()[0]
+    
+    def __contains__(self, name):
+        return self.connection.execute("SELECT 1 FROM favorites WHERE name = ?", (name,)).fetchone() is not None
+    
+    def __iter__(self):
+        """Stream the favorite names in the order they were added"""
+        return (row[0] for row in self.connection.execute("SELECT name FROM favorites ORDER BY id"))
+    
+    def rows(self, after=0):
+        """Stream (id, name, theme, added) rows added after the given id, oldest first"""
+        return self.connection.execute("SELECT id, name, theme, added FROM favorites WHERE id > ? ORDER BY id",
+                                       (after,))
+    
+    def ids(self):
+        """Ids of all favorites"""
+        return {row[0] for row in self.connection.execute("SELECT id FROM favorites")}
+    
+    def add(self, name, theme=None):
+        """Add a favorite; returns False if it was already saved"""
+        cursor = self.connection.execute("INSERT OR IGNORE INTO favorites (name, theme, added) VALUES (?, ?, ?)",
+                                         (name, theme, time.time()))
+        return cursor.rowcount == 1
+    
+    def add_many(self, names, theme=None):
+        """Add favorites in one transaction; returns how many were new"""
+        added = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO favorites (name, theme, added) VALUES (?, ?, ?)",
+                ((name, theme, added) for name in names))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+    
+    def remove(self, name):
+        """Remove a favorite; returns False if it wasn't saved"""
+        return self.connection.execute("DELETE FROM favorites WHERE name = ?", (name,)).rowcount == 1
+    
+    def close(self):
+        self.connection.close()
+
+def favorite_tokens(name):
+    """Lowercase words of a favorite, for word search"""
+    return set(re.findall(r"[^\W_]+", name.lower()))
+
+def favorite_trigrams(key):
+    """Three-character substrings of a lowercase favorite, for substring search"""
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+class FavoritesIndex:
+    """In-memory search index over a FavoritesStore, kept up to date incrementally
+    
+    - prefix: names starting with the query, by bisecting the sorted names
+    - word: names containing every word of the query, from a word -> ids index
+    - substring: names containing the query, from a trigram -> ids index
+      whose candidates are then checked (queries under three characters
+      scan the names)
+    
+    Matching ignores case, and results are in the order favorites were
+    added. refresh() only reads rows added since the last refresh, and
+    only lists all ids when favorites have been removed.
+    """
+    
+    MATCH_MODES = ('prefix', 'substring', 'word')
+    
+    def __init__(self):
+        self.favorites = {}
+        self.ids_by_name = {}
+        self.sorted_keys = []
+        self.words = {}
+        self.trigrams = {}
+        self.themes = {}
+        self.last_id = 0
+    
+    def __len__(self):
+        return len(self.favorites)
+    
+    def add(self, favorite_id, name, theme=None, added=None, keep_sorted=True):
+        """Index a favorite (bulk loads pass keep_sorted=False and sort once at the end)"""
+        if favorite_id in self.favorites:
+            return
+        key = name.lower()
+        self.favorites[favorite_id] = {'id': favorite_id, 'name': name, 'theme': theme, 'added': added}
+        self.ids_by_name[name] = favorite_id
+        if keep_sorted:
+            bisect.insort(self.sorted_keys, (key, favorite_id))
+        else:
+            self.sorted_keys.append((key, favorite_id))
+        for word in favorite_tokens(name):
+            self.words.setdefault(word, set()).add(favorite_id)
+        for trigram in favorite_trigrams(key):
+            self.trigrams.setdefault(trigram, set()).add(favorite_id)
+        self.themes.setdefault(theme, set()).add(favorite_id)
+        self.last_id = max(self.last_id, favorite_id)
+    
+    def discard(self, favorite_id):
+        """Drop a favorite from the index, if it's indexed"""
+        favorite = self.favorites.pop(favorite_id, None)
+        if favorite is None:
+            return
+        key = favorite['name'].lower()
+        del self.ids_by_name[favorite['name']]
+        position = bisect.bisect_left(self.sorted_keys, (key, favorite_id))
+        del self.sorted_keys[position]
+        for postings, terms in ((self.words, favorite_tokens(favorite['name'])),
+                                (self.trigrams, favorite_trigrams(key)),
+                                (self.themes, (favorite['theme'],))):
+            for term in terms:
+                postings[term].discard(favorite_id)
+                if not postings[term]:
+                    del postings[term]
+    
+    def refresh(self, store):
+        """Apply the favorites added to (or removed from) the store since the last refresh"""
+        count = len(self.sorted_keys)
+        for favorite_id, name, theme, added in store.rows(after=self.last_id):
+            self.add(favorite_id, name, theme, added, keep_sorted=False)
+        if len(self.sorted_keys) != count:
+            self.sorted_keys.sort()
+        if len(store) != len(self.favorites):
+            for favorite_id in set(self.favorites) - store.ids():
+                self.discard(favorite_id)
+        if len(store) != len(self.favorites):
+            # Ids were reused, e.g. by a recreated database; index it from scratch
+            self.__init__()
+            for favorite_id, name, theme, added in store.rows():
+                self.add(favorite_id, name, theme, added, keep_sorted=False)
+            self.sorted_keys.sort()
+    
+    def search(self, query='', match='substring', theme=None):
+        """Ids of the favorites matching query (all if empty) and theme, oldest first"""
+        if match not in self.MATCH_MODES:
+            raise ValueError(f"Unknown match mode '{match}' (use one of: {', '.join(self.MATCH_MODES)})")
+        query = query.strip().lower()
+        
+        if not query:
+            ids = None
+        elif match == 'prefix':
+            start = bisect.bisect_left(self.sorted_keys, (query,))
+            end = bisect.bisect_left(self.sorted_keys, (query + "\U0010ffff",), start)
+            ids = {favorite_id for _, favorite_id in self.sorted_keys[start:end]}
+        elif match == 'word':
+            postings = [self.words.get(word, set()) for word in favorite_tokens(query)]
+            ids = set.intersection(*postings) if postings else set()
+        elif len(query) >= 3:
+            postings = sorted((self.trigrams.get(trigram, set()) for trigram in favorite_trigrams(query)), key=len)
+            ids = {favorite_id for favorite_id in set.intersection(*postings)
+                   if query in self.favorites[favorite_id]['name'].lower()}
+        else:
+            ids = {favorite_id for key, favorite_id in self.sorted_keys if query in key}
+        
+        if theme is not None:
+            # Favorites saved without a theme came from the default word lists
+            in_theme = self.themes.get(None if theme == 'default' else theme, set())
+            ids = in_theme if ids is None else ids & in_theme
+        return list(self.favorites) if ids is None else sorted(ids)
+    
+    def page(self, ids, offset=0, limit=50):
+        """The favorites for one page of search results"""
+        return [self.favorites[favorite_id] for favorite_id in ids[offset:offset + limit]]
+
+def favorite_names(filename):
+    """All favorite names, without creating a favorites database if there is none"""
+    if not os.path.exists(favorites_store_path(filename)) and not os.path.exists(filename):
+        return []
+    with FavoritesStore(filename) as store:
+        return list(store)
+
+# RFC 1123 labels (hostnames, Kubernetes names, S3 buckets): lowercase ASCII letters, digits and inner hyphens
+SLUG_MAX_LENGTH = 63
+SLUG_WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+def is_slug_word(word):
+    """Whether a word, lowercased, can be part of an RFC 1123 label"""
+    return SLUG_WORD.fullmatch(word.lower()) is not None
+
+def slug_options(separator, max_total_length=0):
+    """Separator and total length limit for slug mode: (separator, max_total_length)
+    
+    Slug words are joined with hyphens (a space separator becomes one) or
+    nothing, and the total length is capped at SLUG_MAX_LENGTH. Raises
+    ValueError for any other separator.
+    """
+    if separator == ' ':
+        separator = '-'
+    if separator not in ('-', ''):
+        raise ValueError("Slugs can only be joined with '-' or no separator")
+    if max_total_length <= 0 or max_total_length > SLUG_MAX_LENGTH:
+        max_total_length = SLUG_MAX_LENGTH
+    return separator, max_total_length
+
+# Word slots used by each pattern, in output order
+PATTERN_SLOTS = {
+    "adj-noun": ("adj", "noun"),
+    "noun-noun": ("noun", "noun"),
+    "adj-adj-noun": ("adj", "adj", "noun"),
+    "noun-adj": ("noun", "adj"),
+    "adj-noun-number": ("adj", "noun", "number"),
+}
+
+# Values used for the number slot of the adj-noun-number pattern
+NUMBER_SLOT = [str(number) for number in range(1, 1000)]
+
+class TotalLengthSampler:
+    """Uniform sampler over combinations whose total length falls in a window
+    
+    Each slot's words are bucketed by length and the buckets are convolved
+    into count tables (suffix[j][r] = ways to fill slots j.. with r letters).
+    A draw picks the total length, then each slot's word length, weighted by
+    those counts, then a word from the bucket, so every qualifying combination
+    is equally likely and nothing is generated and thrown away.
+    """
+    
+    def __init__(self, slot_pools, separator_length=1, min_total=0, max_total=0):
+        self.buckets = []
+        for pool in slot_pools:
+            buckets = {}
+            for word in pool:
+                buckets.setdefault(len(word), []).append(word)
+            self.buckets.append(buckets)
+        
+        slot_count = len(self.buckets)
+        self.suffix = [None] * slot_count + [{0: 1}]
+        for j in reversed(range(slot_count)):
+            table = {}
+            for length, words in self.buckets[j].items():
+                for rest, ways in self.suffix[j + 1].items():
+                    table[length + rest] = table.get(length + rest, 0) + len(words) * ways
+            self.suffix[j] = table
+        
+        # Separators are a fixed part of the total length
+        fixed = separator_length * (slot_count - 1)
+        self.totals = sorted(total for total in self.suffix[0]
+                             if total + fixed >= min_total and (max_total <= 0 or total + fixed <= max_total))
+        self.cumulative = []
+        self.size = 0
+        for total in self.totals:
+            self.size += self.suffix[0][total]
+            self.cumulative.append(self.size)
+        self._length_tables = {}
+    
+    def _pick(self, cumulative, rng):
+        return bisect.bisect_right(cumulative, rng.randrange(cumulative[-1]))
+    
+    def _lengths_for(self, slot, remaining):
+        key = (slot, remaining)
+        if key not in self._length_tables:
+            lengths, cumulative, running = [], [], 0
+            for length, words in self.buckets[slot].items():
+                ways = len(words) * self.suffix[slot + 1].get(remaining - length, 0)
+                if ways:
+                    running += ways
+                    lengths.append(length)
+                    cumulative.append(running)
+            self._length_tables[key] = (lengths, cumulative)
+        return self._length_tables[key]
+    
+    def sample(self, rng=random):
+        """Draw one combination as a list of words, one per slot"""
+        remaining = self.totals[self._pick(self.cumulative, rng)]
+        parts = []
+        for slot in range(len(self.buckets)):
+            lengths, cumulative = self._lengths_for(slot, remaining)
+            length = lengths[self._pick(cumulative, rng)]
+            parts.append(rng.choice(self.buckets[slot][length]))
+            remaining -= length
+        return parts
+
+class PrefixIndex:
+    """Words sorted case-insensitively for first-letter and prefix lookups"""
+    
+    def __init__(self, words):
+        pairs = sorted((word.lower(), word) for word in words)
+        self.keys = [key for key, _ in pairs]
+        self.words = [word for _, word in pairs]
+        self.letters = sorted({key[:1] for key in self.keys if key})
+    
+    def starting_with(self, prefix):
+        """All words starting with prefix, ignoring case"""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\U0010ffff", start)
+        return self.words[start:end]
+
+class CombinationSampler:
+    """Uniform sampler over several disjoint sets of slot pools
+    
+    Each set gets its own TotalLengthSampler and sets are drawn in proportion
+    to how many combinations they hold, so every combination across all sets
+    is equally likely.
+    """
+    
+    def __init__(self, alternatives, separator_length=1, min_total=0, max_total=0):
+        self.samplers = []
+        self.cumulative = []
+        self.size = 0
+        for pools in alternatives:
+            sampler = TotalLengthSampler(pools, separator_length, min_total, max_total)
+            if sampler.size:
+                self.size += sampler.size
+                self.samplers.append(sampler)
+                self.cumulative.append(self.size)
+    
+    def sample(self, rng=random):
+        """Draw one combination as a list of words, one per slot"""
+        index = bisect.bisect_right(self.cumulative, rng.randrange(self.size))
+        return self.samplers[index].sample(rng)
+
+def letter_constrained_pools(slots, indexes, alliterate=False, initials=None, prefix=None):
+    """Slot pools that satisfy letter constraints, as a list of disjoint alternatives
+    
+    - alliterate: every word starts with the same letter (one alternative per letter)
+    - initials: word initials spell these letters, e.g. "B.F." (numbers are skipped)
+    - prefix: the first word starts with this prefix
+    """
+    word_slots = [i for i, slot in enumerate(slots) if slot != "number"]
+    required = {i: "" for i in word_slots}
+    
+    if initials:
+        letters = re.findall(r"[a-z]", initials.lower())
+        if len(letters) != len(word_slots):
+            raise ValueError(f"Initials '{initials}' need exactly {len(word_slots)} letters for this pattern")
+        for i, letter in zip(word_slots, letters):
+            required[i] = letter
+    
+    if prefix:
+        first = word_slots[0]
+        prefix = prefix.lower()
+        if not prefix.startswith(required[first]):
+            return []
+        required[first] = prefix
+    
+    if alliterate:
+        fixed = {required[i][0] for i in word_slots if required[i]}
+        if len(fixed) > 1:
+            return []
+        letters = fixed or set.intersection(*(set(indexes[slots[i]].letters) for i in word_slots))
+    else:
+        letters = {""}
+    
+    alternatives = []
+    for letter in sorted(letters):
+        pools = []
+        for i, slot in enumerate(slots):
+            if slot == "number":
+                pools.append(NUMBER_SLOT)
+            else:
+                pools.append(indexes[slot].starting_with(required[i] or letter))
+        alternatives.append(pools)
+    return alternatives
+
+def build_sampler(adjectives, nouns, pattern, separator, min_total_length=0, max_total_length=0,
+                  alliterate=False, initials=None, prefix=None, word_indexes=None, word_filter=None):
+    """Build a CombinationSampler for total length and letter constraints, or None if there are none
+    
+    word_indexes is an optional (adjective, noun) pair of prebuilt PrefixIndex
+    objects; word_filter then drops looked-up words the caller has filtered
+    out of adjectives and nouns since the indexes were built.
+    """
+    if not (min_total_length > 0 or max_total_length > 0 or alliterate or initials or prefix):
+        return None
+    
+    slots = PATTERN_SLOTS.get(pattern, PATTERN_SLOTS["adj-noun"])
+    if alliterate or initials or prefix:
+        if word_indexes is None:
+            word_indexes = (PrefixIndex(adjectives), PrefixIndex(nouns))
+            word_filter = None
+        indexes = {"adj": word_indexes[0], "noun": word_indexes[1]}
+        alternatives = letter_constrained_pools(slots, indexes, alliterate, initials, prefix)
+        if word_filter:
+            alternatives = [[pool if pool is NUMBER_SLOT else [word for word in pool if word_filter(word)]
+                             for pool in pools] for pools in alternatives]
+    else:
+        pools = {"adj": adjectives, "noun": nouns, "number": NUMBER_SLOT}
+        alternatives = [[pools[slot] for slot in slots]]
+    
+    return CombinationSampler(alternatives, len(separator), min_total_length, max_total_length)
+
+class AliasTable:
+    """Walker/Vose alias table for constant-time weighted draws"""
+    
+    def __init__(self, items, weights):
+        self.items = list(items)
+        count = len(self.items)
+        total = float(sum(weights))
+        scaled = [weight * count / total for weight in weights]
+        self.probability = [1.0] * count
+        self.alias = list(range(count))
+        
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.probability[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def choice(self, rng=random):
+        """Draw one item in proportion to its weight"""
+        index = rng.randrange(len(self.items))
+        if rng.random() < self.probability[index]:
+            return self.items[index]
+        return self.items[self.alias[index]]
+
+# Draws are 64-bit words; larger ranges (e.g. huge sampler sizes) read more bytes
+SECURE_WORD_RANGE = 1 << 64
+
+# stream() fills and filters a whole block per sequence, which only pays off
+# for calls drawing this many codenames; smaller ones pick word by word
+SECURE_STREAM_MIN_COUNT = 1024
+
+class SecureRandom:
+    """Cryptographically secure random source that reads os.urandom in large blocks
+    
+    Provides the randrange()/randint()/choice()/random() subset of the random
+    module used by generate_codename(), the samplers and AliasTable. Words
+    are mapped to a range by rejection sampling: a word at or above the
+    largest multiple of n below 2**64 is discarded, so no index is favored.
+    stream() turns whole blocks into picks from one sequence at a time,
+    for large counts (see SECURE_STREAM_MIN_COUNT).
+    """
+    
+    BLOCK_WORDS = 8192
+    
+    def __init__(self, block_words=BLOCK_WORDS):
+        self.block_words = block_words
+        self._words = iter(())
+    
+    def _block(self):
+        words = array('Q')
+        words.frombytes(os.urandom(words.itemsize * self.block_words))
+        return words
+    
+    def _word(self):
+        for word in self._words:
+            return word
+        self._words = iter(self._block())
+        return next(self._words)
+    
+    def randrange(self, n):
+        """Unbiased integer in [0, n)"""
+        if n <= 0:
+            raise ValueError("empty range for randrange()")
+        if n > SECURE_WORD_RANGE:
+            size = (n.bit_length() + 7) // 8
+            excess = 8 * size - n.bit_length()
+            while True:
+                value = int.from_bytes(os.urandom(size), 'big') >> excess
+                if value < n:
+                    return value
+        limit = SECURE_WORD_RANGE - SECURE_WORD_RANGE % n
+        while True:
+            word = self._word()
+            if word < limit:
+                return word % n
+    
+    def randint(self, a, b):
+        """Unbiased integer in [a, b]"""
+        return a + self.randrange(b - a + 1)
+    
+    def choice(self, seq):
+        """Unbiased item of a non-empty sequence"""
+        return seq[self.randrange(len(seq))]
+    
+    def random(self):
+        """Float in [0, 1) with 53 random bits"""
+        return (self._word() >> 11) * (1.0 / (1 << 53))
+    
+    def stream(self, seq):
+        """Endless unbiased picks from a non-empty sequence, a block of words at a time"""
+        n = len(seq)
+        limit = SECURE_WORD_RANGE - SECURE_WORD_RANGE % n
+        while True:
+            yield from [seq[word % n] for word in self._block() if word < limit]
+
+# Generators are kept per thread (see thread_rng())
+thread_state = threading.local()
+
+def thread_rng(secure=False):
+    """The calling thread's own random source: a Random seeded from os.urandom, or a SecureRandom
+    
+    The SecureRandom is kept, so its buffered block serves every call
+    (batch specs, daemon requests) instead of reading a new one each time.
+    """
+    name = 'secure_rng' if secure else 'rng'
+    rng = getattr(thread_state, name, None)
+    if rng is None:
+        rng = SecureRandom() if secure else random.Random()
+        setattr(thread_state, name, rng)
+    return rng
+
+def parse_theme_blend(spec):
+    """Parse a theme blend such as "cyberpunk:0.6,ocean:0.4" into (theme, weight) pairs
+    
+    A plain theme name is a blend of one theme with weight 1.
+    """
+    blend = []
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition(':')
+        name = name.strip()
+        if not name:
+            raise ValueError(f"Invalid theme blend '{spec}'")
+        try:
+            weight = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight for theme '{name}' in '{spec}'")
+        if weight <= 0:
+            raise ValueError(f"Weight for theme '{name}' must be positive")
+        blend.append((name, weight))
+    return blend
+
+def blend_word_lists(word_lists):
+    """Merge (words, word_weights, theme_weight) lists into words and a word -> weight dict
+    
+    Each list's word weights are normalized to sum to its theme weight, so a
+    theme's share of draws doesn't depend on how many words it has. Words in
+    several lists add up their weights.
+    """
+    weights = {}
+    for words, word_weights, theme_weight in word_lists:
+        total = sum(word_weights.get(word, 1.0) for word in words)
+        for word in words:
+            weights[word] = weights.get(word, 0.0) + theme_weight * word_weights.get(word, 1.0) / total
+    return list(weights), weights
+
+# Ways to fill the number slot of adj-noun-number, by length (1-9, 10-99, 100-999)
+NUMBER_SLOT_LENGTHS = {1: 9, 2: 90, 3: 900}
+
+# Collision risks reported with how many codenames can be issued before reaching them
+COLLISION_RISKS = (0.001, 0.01, 0.5)
+
+def length_histogram(words, weights=None):
+    """Distinct words (ignoring case) by length: {length: [words, weight sum, sum of squared weights]}
+    
+    A word listed more than once is drawn with its combined weight (1 per
+    listing without weights), which the squared weights account for.
+    """
+    combined = {}
+    for word in words:
+        weight = weights.get(word, 1.0) if weights else 1.0
+        entry = combined.get(word.lower())
+        if entry is None:
+            combined[word.lower()] = [len(word), weight]
+        else:
+            entry[1] += weight
+    histogram = {}
+    for length, weight in combined.values():
+        entry = histogram.setdefault(length, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += weight
+        entry[2] += weight * weight
+    return histogram
+
+def combination_stats(histograms, pattern, separator_length=1, min_length=0, max_length=0,
+                      min_total_length=0, max_total_length=0):
+    """Distinct codenames a pattern can produce within length limits, from (adjective, noun) length histograms
+    
+    Returns (space, effective_space). space is exact: the slots' histograms
+    are convolved into counts by total length, and the lengths outside the
+    total length window are left out. effective_space is 1 / (chance that two
+    draws are the same codename). It equals space for uniform draws (and for
+    total length limits, which sample uniformly), and is smaller for weighted
+    words.
+    """
+    def within(length):
+        return (min_length <= 0 or length >= min_length) and (max_length <= 0 or length <= max_length)
+    
+    tables = {
+        "adj": {length: entry for length, entry in histograms[0].items() if within(length)},
+        "noun": {length: entry for length, entry in histograms[1].items() if within(length)},
+        "number": {length: [ways, ways, ways] for length, ways in NUMBER_SLOT_LENGTHS.items()},
+    }
+    slots = PATTERN_SLOTS[pattern]
+    totals = {0: 1}
+    for slot in slots:
+        step = {}
+        for total, ways in totals.items():
+            for length, entry in tables[slot].items():
+                step[total + length] = step.get(total + length, 0) + ways * entry[0]
+        totals = step
+    
+    fixed = separator_length * (len(slots) - 1)
+    space = sum(ways for total, ways in totals.items()
+                if total + fixed >= min_total_length and (max_total_length <= 0 or total + fixed <= max_total_length))
+    if min_total_length > 0 or max_total_length > 0 or not space:
+        return space, float(space)
+    
+    effective_space = 1.0
+    for slot in slots:
+        weight_sum = sum(entry[1] for entry in tables[slot].values())
+        weight_squares = sum(entry[2] for entry in tables[slot].values())
+        effective_space *= weight_sum * weight_sum / weight_squares
+    return space, effective_space
+
+def collision_probability(space, issued):
+    """Birthday-bound chance that issued draws from space equally likely codenames include a repeat"""
+    if issued < 2:
+        return 0.0
+    if issued > space:
+        return 1.0
+    if issued < space * 1e-3:
+        # log P(no repeat) = sum of log(1 - i/space) for i < issued, as a power series in i/space
+        n = issued - 1
+        first = n * (n + 1) / 2
+        second = n * (n + 1) * (2 * n + 1) / 6
+        third = first * first
+        log_unique = -(first / space + second / (2 * space ** 2) + third / (3 * space ** 3))
+    else:
+        log_unique = math.lgamma(space + 1) - math.lgamma(space - issued + 1) - issued * math.log(space)
+    return min(1.0, -math.expm1(log_unique))
+
+def issued_at_risk(space, risk):
+    """Most codenames that can be issued from space before the chance of a repeat exceeds risk"""
+    low, high = 1, max(1, int(space))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if collision_probability(space, middle) <= risk:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def codename_stats(histograms, pattern, separator_length=1, min_length=0, max_length=0,
+                   min_total_length=0, max_total_length=0, issued=1000):
+    """Combination space and collision risk for issuing that many codenames, without generating any"""
+    space, effective_space = combination_stats(histograms, pattern, separator_length, min_length, max_length,
+                                               min_total_length, max_total_length)
+    return {
+        "space": space,
+        "effective_space": effective_space,
+        "issued": issued,
+        "collision_probability": collision_probability(effective_space, issued) if space else 1.0,
+        "expected_repeated_pairs": issued * (issued - 1) / 2 / effective_space if space else None,
+        "issued_at_risk": {f"{risk:g}": issued_at_risk(effective_space, risk) if space else 0
+                           for risk in COLLISION_RISKS},
+    }
 
 def generate_codename(adjectives, nouns, count=1, separator=' ', exclusions=None,
-                   pattern="adj-noun", case_style="title", min_length=0, max_length=0):
+                   pattern="adj-noun", case_style="title", min_length=0, max_length=0,
+                   min_total_length=0, max_total_length=0, blocklist=None,
+                   similarity_index=None, alliterate=False, initials=None, prefix=None,
+                   adjective_weights=None, noun_weights=None, secure=False, stream=False):
     """Generate random codenames by combining adjectives and nouns with various patterns and formats
     
     Patterns:
@@ -81,6 +1092,32 @@ def generate_codename(adjectives, nouns, count=1, separator=' ', exclusions=None
     - "upper": UPPERCASE
     - "lower": lowercase
     - "sentence": Sentence case (only first letter capitalized)
+    
+    Length constraints:
+    - min_length/max_length: Limits on each word (0 = no limit)
+    - min_total_length/max_total_length: Limits on the whole codename including
+      separators (0 = no limit), sampled exactly with TotalLengthSampler
+    
+    blocklist is an optional BlocklistMatcher; combinations that contain a
+    blocked substring once joined are skipped. similarity_index is an optional
+    SimilarityIndex; combinations too close to an indexed name are skipped.
+    
+    Letter constraints (see letter_constrained_pools()):
+    - alliterate: All words start with the same letter
+    - initials: Word initials spell these letters, e.g. "B.F."
+    - prefix: The first word starts with this prefix
+    
+    adjective_weights/noun_weights are optional word -> weight dicts (see
+    load_theme_blend()); words are then drawn from alias tables in proportion
+    to their weights. Length and letter constraints sample uniformly.
+    
+    secure draws every word and number from the thread's buffered
+    SecureRandom (see thread_rng()) instead of a Mersenne Twister, whose
+    output can be predicted.
+    
+    stream returns an iterator that draws each codename as it is consumed,
+    e.g. by write_output(), instead of a list. The words and constraints
+    are still checked up front.
     """
     # Filter out excluded words if needed
     if exclusions:
@@ -112,77 +1149,399 @@ def generate_codename(adjectives, nouns, count=1, separator=' ', exclusions=None
         sys.stderr.write("Error: No nouns meet the length criteria\n")
         sys.exit(1)
     
-    codenames = []
-    for _ in range(count):
-        # Generate based on pattern
-        if pattern == "adj-noun":
-            adj = random.choice(adjectives)
-            noun = random.choice(nouns)
-            raw_name = f"{adj}{separator}{noun}"
-        elif pattern == "noun-noun":
-            noun1 = random.choice(nouns)
-            noun2 = random.choice(nouns)
-            raw_name = f"{noun1}{separator}{noun2}"
-        elif pattern == "adj-adj-noun":
-            adj1 = random.choice(adjectives)
-            adj2 = random.choice(adjectives)
-            noun = random.choice(nouns)
-            raw_name = f"{adj1}{separator}{adj2}{separator}{noun}"
-        elif pattern == "noun-adj":
-            noun = random.choice(nouns)
-            adj = random.choice(adjectives)
-            raw_name = f"{noun}{separator}{adj}"
-        elif pattern == "adj-noun-number":
-            adj = random.choice(adjectives)
-            noun = random.choice(nouns)
-            number = random.randint(1, 999)
-            raw_name = f"{adj}{separator}{noun}{separator}{number}"
-        else:
-            # Default to adj-noun if pattern is not recognized
-            adj = random.choice(adjectives)
-            noun = random.choice(nouns)
-            raw_name = f"{adj}{separator}{noun}"
-        
-        # Apply case style
-        if case_style == "upper":
-            formatted_name = raw_name.upper()
-        elif case_style == "lower":
-            formatted_name = raw_name.lower()
-        elif case_style == "sentence":
-            formatted_name = raw_name.capitalize()
-        else:  # Default to title case
-            formatted_name = " ".join(word.capitalize() for word in raw_name.split(separator))
-            if separator != " ":
-                formatted_name = separator.join(word.capitalize() for word in raw_name.split(separator))
-        
-        codenames.append(formatted_name)
+    # Sample exactly from the combinations that fit the length and letter constraints
+    try:
+        sampler = build_sampler(adjectives, nouns, pattern, separator, min_total_length, max_total_length,
+                                alliterate, initials, prefix)
+    except ValueError as e:
+        sys.stderr.write(f"Error: {str(e)}\n")
+        sys.exit(1)
+    if sampler is not None and not sampler.size:
+        sys.stderr.write("Error: No codenames fit the total length and letter constraints\n")
+        sys.exit(1)
+    
+    # Weighted vocabularies draw from alias tables, everything else uniformly
+    rng = thread_rng(secure)
+    choose_adjective = functools.partial(rng.choice, adjectives)
+    choose_noun = functools.partial(rng.choice, nouns)
+    if secure and count >= SECURE_STREAM_MIN_COUNT:
+        choose_adjective = functools.partial(next, rng.stream(adjectives))
+        choose_noun = functools.partial(next, rng.stream(nouns))
+    if adjective_weights is not None or noun_weights is not None:
+        choose_adjective = functools.partial(AliasTable(adjectives, [(adjective_weights or {}).get(word, 1.0)
+                                                                     for word in adjectives]).choice, rng)
+        choose_noun = functools.partial(AliasTable(nouns, [(noun_weights or {}).get(word, 1.0)
+                                                           for word in nouns]).choice, rng)
+    
+    def codenames():
+        produced = rejected = 0
+        while produced < count:
+            # Generate based on pattern
+            if sampler:
+                raw_name = separator.join(sampler.sample(rng))
+            elif pattern == "adj-noun":
+                adj = choose_adjective()
+                noun = choose_noun()
+                raw_name = f"{adj}{separator}{noun}"
+            elif pattern == "noun-noun":
+                noun1 = choose_noun()
+                noun2 = choose_noun()
+                raw_name = f"{noun1}{separator}{noun2}"
+            elif pattern == "adj-adj-noun":
+                adj1 = choose_adjective()
+                adj2 = choose_adjective()
+                noun = choose_noun()
+                raw_name = f"{adj1}{separator}{adj2}{separator}{noun}"
+            elif pattern == "noun-adj":
+                noun = choose_noun()
+                adj = choose_adjective()
+                raw_name = f"{noun}{separator}{adj}"
+            elif pattern == "adj-noun-number":
+                adj = choose_adjective()
+                noun = choose_noun()
+                number = rng.randint(1, 999)
+                raw_name = f"{adj}{separator}{noun}{separator}{number}"
+            else:
+                # Default to adj-noun if pattern is not recognized
+                adj = choose_adjective()
+                noun = choose_noun()
+                raw_name = f"{adj}{separator}{noun}"
+            
+            # Reject combinations that only form a blocked substring once joined,
+            # or that are confusingly close to a favorite or issued name
+            if (blocklist and blocklist.matches(raw_name)) or (
+                    similarity_index and similarity_index.find_similar(raw_name) is not None):
+                rejected += 1
+                if rejected > max(1000, 10 * count):
+                    sys.stderr.write("Error: Too many generated codenames were rejected by the blocklist or similarity filter\n")
+                    sys.exit(1)
+                continue
+            
+            # Apply case style
+            if case_style == "upper":
+                formatted_name = raw_name.upper()
+            elif case_style == "lower":
+                formatted_name = raw_name.lower()
+            elif case_style == "sentence":
+                formatted_name = raw_name.capitalize()
+            else:  # Default to title case
+                formatted_name = " ".join(word.capitalize() for word in raw_name.split(separator))
+                if separator != " ":
+                    formatted_name = separator.join(word.capitalize() for word in raw_name.split(separator))
+            
+            yield formatted_name
+            produced += 1
+    
+    return codenames() if stream else list(codenames())
+
+OUTPUT_CHUNK_SIZE = 10000
+
+def output_chunks(codenames):
+    """Split any iterable of codenames into lists of at most OUTPUT_CHUNK_SIZE names"""
+    iterator = iter(codenames)
+    while chunk := list(islice(iterator, OUTPUT_CHUNK_SIZE)):
+        yield chunk
+
+def json_strings(names, separator):
+    """Encode names as JSON strings joined by separator, exactly as json.dumps() writes each one
     
-    return codenames
+    Generated codenames are printable ASCII without quotes or backslashes,
+    which JSON needs no escapes for, so after one scan of the joined text
+    they are quoted with a single join. Anything else goes through json's
+    C string encoder.
+    """
+    text = "".join(names)
+    if text.isascii() and text.isprintable() and '"' not in text and "\\" not in text:
+        return '"' + f'"{separator}"'.join(names) + '"' if names else ""
+    return separator.join(map(json.encoder.encode_basestring_ascii, names))
+
+def csv_rows(names):
+    """Encode names as one-column CSV rows, exactly as csv.writer() writes them"""
+    text = "".join(names)
+    if all(names) and not any(char in text for char in ',"\r\n'):
+        return "\r\n".join(names) + "\r\n" if names else ""
+    output = StringIO()
+    csv.writer(output).writerows([name] for name in names)
+    return output.getvalue()
 
 def format_output(codenames, format_type="text"):
     """Format codenames in various output formats"""
     if format_type == "json":
-        return json.dumps({"codenames": codenames}, indent=2)
+        if not codenames:
+            return '{\n  "codenames": []\n}'
+        return '{\n  "codenames": [\n    ' + json_strings(codenames, ",\n    ") + "\n  ]\n}"
     
     elif format_type == "csv":
-        output = StringIO()
-        csv_writer = csv.writer(output)
-        csv_writer.writerow(["Codename"])
-        for name in codenames:
-            csv_writer.writerow([name])
-        return output.getvalue()
+        return "Codename\r\n" + csv_rows(codenames)
     
     elif format_type == "html":
         html = "<html>\n<head><title>Generated Codenames</title></head>\n<body>\n"
         html += "<h1>Generated Codenames</h1>\n<ul>\n"
-        for name in codenames:
-            html += f"  <li>{name}</li>\n"
+        if codenames:
+            html += "  <li>" + "</li>\n  <li>".join(codenames) + "</li>\n"
         html += "</ul>\n</body>\n</html>"
         return html
     
     else:  # Default to plain text
         return "\n".join(codenames)
 
+def write_output(codenames, file, format_type="text"):
+    """Write codenames to a file exactly as format_output() formats them, one chunk at a time
+    
+    codenames can be any iterable, e.g. a FavoritesStore, so large
+    collections are never held in memory or formatted into one string.
+    Returns the number of codenames written.
+    """
+    count = 0
+    if format_type == "json":
+        file.write('{\n  "codenames": [')
+        for chunk in output_chunks(codenames):
+            file.write((",\n    " if count else "\n    ") + json_strings(chunk, ",\n    "))
+            count += len(chunk)
+        file.write("\n  ]\n}" if count else "]\n}")
+    
+    elif format_type == "csv":
+        file.write("Codename\r\n")
+        for chunk in output_chunks(codenames):
+            file.write(csv_rows(chunk))
+            count += len(chunk)
+    
+    elif format_type == "html":
+        file.write("<html>\n<head><title>Generated Codenames</title></head>\n<body>\n")
+        file.write("<h1>Generated Codenames</h1>\n<ul>\n")
+        for chunk in output_chunks(codenames):
+            file.write("  <li>" + "</li>\n  <li>".join(chunk) + "</li>\n")
+            count += len(chunk)
+        file.write("</ul>\n</body>\n</html>")
+    
+    else:  # Default to plain text
+        for chunk in output_chunks(codenames):
+            file.write(("\n" if count else "") + "\n".join(chunk))
+            count += len(chunk)
+    
+    return count
+
+GZIP_LEVEL = 6
+
+def open_output_file(path, compress=None, level=GZIP_LEVEL, newline=None):
+    """Open a file for text output, gzip-compressed as it is written if compress is "gzip"
+    
+    Compressed text is deflated in chunks as it is written, so large outputs
+    are never buffered whole. Without a path, compressed output goes to
+    stdout, which is left open.
+    """
+    if compress != "gzip":
+        return open(path, 'w', encoding='utf-8', newline=newline)
+    if path is None:
+        binary = gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb', compresslevel=level)
+        return TextIOWrapper(binary, encoding='utf-8', newline=newline)
+    return gzip.open(path, 'wt', compresslevel=level, encoding='utf-8', newline=newline)
+
+ENUMERATION_BLOCK_SIZE = 10000
+
+def compose_codename(parts, separator, case_style):
+    """Join codename parts with a separator and apply a case style"""
+    if case_style == "upper":
+        return separator.join(parts).upper()
+    elif case_style == "lower":
+        return separator.join(parts).lower()
+    elif case_style == "sentence":
+        return separator.join(parts).capitalize()
+    else:  # Default to title case
+        return separator.join(part.capitalize() for part in parts)
+
+class IndexPermutation:
+    """Keyed bijection over range(size), used to visit combinations in shuffled order
+    
+    A small Feistel network permutes the smallest even-width power of two
+    covering the range; indexes that land outside it are walked again until
+    they fall inside, which keeps the mapping a bijection. Nothing is stored
+    per index, so memory stays constant however large the range is.
+    """
+    
+    ROUNDS = 4
+    
+    def __init__(self, size, seed):
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        bits += bits % 2
+        self.half_bits = bits // 2
+        self.mask = (1 << self.half_bits) - 1
+        rng = random.Random(seed)
+        self.keys = [rng.getrandbits(64) for _ in range(self.ROUNDS)]
+    
+    def _round(self, value, key):
+        value = ((value ^ key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        value ^= value >> 29
+        return value & self.mask
+    
+    def __call__(self, index):
+        while True:
+            left, right = index >> self.half_bits, index & self.mask
+            for key in self.keys:
+                left, right = right, left ^ self._round(right, key)
+            index = (left << self.half_bits) | right
+            if index < self.size:
+                return index
+
+def dedupe_words(words):
+    """Remove duplicate words while keeping their original order"""
+    return list(dict.fromkeys(words))
+
+def vocabulary_fingerprint(*word_lists):
+    """Content hash of one or more word lists"""
+    digest = hashlib.sha256()
+    for words in word_lists:
+        digest.update("\n".join(words).encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def save_checkpoint(state, filename):
+    """Atomically write an enumeration checkpoint"""
+    temp_file = f"{filename}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as file:
+        json.dump(state, file, indent=2)
+    os.replace(temp_file, filename)
+
+def load_checkpoint(filename):
+    """Load an enumeration checkpoint, or None if there is none"""
+    if not os.path.exists(filename):
+        return None
+    
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except Exception as e:
+        sys.stderr.write(f"Error reading checkpoint '{filename}': {str(e)}\n")
+        return None
+
+def write_shard(filename, codenames, format_type, compress=None, compress_level=GZIP_LEVEL):
+    """Write one shard of enumerated codenames, streaming block by block
+    
+    codenames is an iterable of blocks of names. The shard holds exactly
+    what write_output() writes for those names, so it matches an
+    unsharded file of the same codenames. It is written under a temporary
+    name and renamed when complete, so an interrupted run never leaves a
+    truncated shard behind.
+    """
+    temp_file = f"{filename}.part"
+    with open_output_file(temp_file, compress, compress_level,
+                          newline='' if format_type == 'csv' else None) as file:
+        write_output(chain.from_iterable(codenames), file, format_type)
+    os.replace(temp_file, filename)
+
+def enumerate_codenames(adjectives, nouns, output_prefix, pattern="adj-noun", separator=' ',
+                        case_style="title", order="sequential", seed=None,
+                        shard_size=1000000, format_type="text", blocklist=None,
+                        compress=None, compress_level=GZIP_LEVEL):
+    """Write every combination for a pattern to sharded files, resuming from a checkpoint
+    
+    Combination i is decoded from its index in mixed radix over the pattern's
+    word slots, so only one block of names is held in memory at a time. Each
+    completed shard is recorded in '<output_prefix>.checkpoint.json'; an
+    interrupted run with the same settings continues from the first
+    unfinished shard. Combinations that contain a blocked substring once
+    joined are skipped, so shards can hold fewer than shard_size names.
+    With compress="gzip" each shard is compressed as it is written and gets
+    a .gz extension.
+    """
+    pools = {"adj": adjectives, "noun": nouns, "number": NUMBER_SLOT}
+    slots = [pools[slot] for slot in PATTERN_SLOTS.get(pattern, PATTERN_SLOTS["adj-noun"])]
+    radices = [len(pool) for pool in slots]
+    total = 1
+    for radix in radices:
+        total *= radix
+    
+    extension = ("txt" if format_type == "text" else format_type) + (".gz" if compress else "")
+    checkpoint_file = f"{output_prefix}.checkpoint.json"
+    fingerprint = vocabulary_fingerprint(
+        adjectives, nouns, [pattern, separator, case_style, order, str(shard_size), format_type, compress or ""],
+        blocklist.patterns if blocklist else [])
+    
+    output_dir = os.path.dirname(output_prefix)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    checkpoint = load_checkpoint(checkpoint_file)
+    next_shard = 0
+    if checkpoint:
+        if checkpoint.get("fingerprint") != fingerprint or (
+                seed is not None and order == "shuffled" and checkpoint.get("seed") != seed):
+            sys.stderr.write(f"Error: Checkpoint '{checkpoint_file}' was written with different settings. "
+                             "Delete it to start over.\n")
+            sys.exit(1)
+        next_shard = checkpoint["next_shard"]
+        seed = checkpoint.get("seed")
+        if checkpoint.get("complete"):
+            sys.stderr.write(f"Enumeration already complete ({total} codenames). "
+                             f"Delete '{checkpoint_file}' to run it again.\n")
+            return
+        sys.stderr.write(f"Resuming from shard {next_shard} ({next_shard * shard_size} of {total} codenames)\n")
+    
+    if order == "shuffled" and seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    permutation = IndexPermutation(total, seed) if order == "shuffled" else None
+    
+    state = {
+        "fingerprint": fingerprint,
+        "pattern": pattern,
+        "order": order,
+        "seed": seed,
+        "total": total,
+        "shard_size": shard_size,
+        "next_shard": next_shard,
+        "written": checkpoint.get("written", 0) if checkpoint else 0,
+        "complete": False,
+    }
+    save_checkpoint(state, checkpoint_file)
+    
+    def decode(index):
+        parts = []
+        for pool, radix in zip(reversed(slots), reversed(radices)):
+            index, digit = divmod(index, radix)
+            parts.append(pool[digit])
+        parts.reverse()
+        return compose_codename(parts, separator, case_style)
+    
+    shard_count = (total + shard_size - 1) // shard_size
+    started = time.time()
+    last_report = 0.0
+    done = next_shard * shard_size
+    
+    def shard_blocks(start, end):
+        nonlocal done, last_report
+        for block_start in range(start, end, ENUMERATION_BLOCK_SIZE):
+            block_end = min(block_start + ENUMERATION_BLOCK_SIZE, end)
+            if permutation:
+                block = [decode(permutation(i)) for i in range(block_start, block_end)]
+            else:
+                block = [decode(i) for i in range(block_start, block_end)]
+            if blocklist:
+                block = [name for name in block if not blocklist.matches(name)]
+            state["written"] += len(block)
+            yield block
+            
+            done += block_end - block_start
+            now = time.time()
+            if now - last_report >= 1.0 or done == total:
+                last_report = now
+                rate = (done - next_shard * shard_size) / max(now - started, 1e-9)
+                sys.stderr.write(f"\rEnumerated {done} of {total} codenames "
+                                 f"({100.0 * done / total:.2f}%, {rate:,.0f}/s)")
+                sys.stderr.flush()
+    
+    for shard in range(next_shard, shard_count):
+        shard_file = f"{output_prefix}-{shard:05d}.{extension}"
+        start = shard * shard_size
+        write_shard(shard_file, shard_blocks(start, min(start + shard_size, total)), format_type,
+                    compress, compress_level)
+        state["next_shard"] = shard + 1
+        save_checkpoint(state, checkpoint_file)
+    
+    state["complete"] = True
+    save_checkpoint(state, checkpoint_file)
+    sys.stderr.write(f"\nWrote {state['written']} codenames to {shard_count} shard(s) with prefix '{output_prefix}'\n")
+
 def get_available_themes():
     """Get list of available themes from themes directory"""
     themes = []
@@ -213,44 +1572,810 @@ def load_themed_words(theme):
     
     return adjectives, nouns
 
-def list_favorites(favorites_file):
-    """List all saved favorites"""
-    favorites = load_favorites(favorites_file)
-    if not favorites:
-        sys.stderr.write("No favorites found.\n")
+def load_theme_blend(spec, default_adjectives_file, default_nouns_file):
+    """Load the word lists of a theme or theme blend such as "cyberpunk:0.6,ocean:0.4"
+    
+    Returns adjectives, nouns, adjective_weights and noun_weights. The
+    weights are None for a single theme without a weight column, so plain
+    themes keep uniform sampling. "default" names the default word lists.
+    """
+    adjective_lists, noun_lists = [], []
+    for theme, weight in parse_theme_blend(spec):
+        if theme == 'default':
+            adj_file, noun_file = default_adjectives_file, default_nouns_file
+            adjectives, nouns = load_words(adj_file), load_words(noun_file)
+        else:
+            adj_file = os.path.join("themes", f"{theme}_adj.txt")
+            noun_file = os.path.join("themes", f"{theme}_nouns.txt")
+            adjectives, nouns = load_themed_words(theme)
+        if not adjectives or not nouns:
+            return [], [], None, None
+        adjective_lists.append((adjectives, load_word_weights(adj_file), weight))
+        noun_lists.append((nouns, load_word_weights(noun_file), weight))
+    
+    if len(adjective_lists) == 1 and not adjective_lists[0][1] and not noun_lists[0][1]:
+        return adjective_lists[0][0], noun_lists[0][0], None, None
+    
+    adjectives, adjective_weights = blend_word_lists(adjective_lists)
+    nouns, noun_weights = blend_word_lists(noun_lists)
+    return adjectives, nouns, adjective_weights, noun_weights
+
+# -------------------- Memory Accounting ---------------------
+
+def object_bytes(obj, seen=None):
+    """Approximate memory held by an object and everything it references
+    
+    Follows containers and instance attributes. Objects whose id is already
+    in seen are not counted again, so sharing one seen set across several
+    calls counts shared words and tables once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(object_bytes(key, seen) + object_bytes(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(object_bytes(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not callable(obj):
+        size += object_bytes(vars(obj), seen)
+    return size
+
+def process_rss():
+    """Resident set size of this process in bytes (peak RSS where the current one is unavailable)"""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def top_allocations(limit=10):
+    """The source lines holding the most memory traced by tracemalloc"""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return [{
+        'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+        'bytes': stat.size,
+        'blocks': stat.count,
+    } for stat in snapshot.statistics('lineno')[:limit]]
+
+def theme_memory_usage(theme, default_adjectives_file, default_nouns_file, exclusions, blocklist, held=None):
+    """Word counts and bytes used by a theme's word lists as codename generation would hold them
+    
+    The measured objects are appended to the optional held list to keep them alive.
+    
+    - raw: the word lists as loaded
+    - filtered: the lists left after exclusions and the blocklist (sharing the raw words)
+    - indexes: the first-letter/prefix indexes built for letter constraints
+    - caches: the weights and alias tables of weighted themes and blends
+    """
+    adjectives, nouns, adjective_weights, noun_weights = load_theme_blend(
+        theme, default_adjectives_file, default_nouns_file)
+    filtered_adjectives = filter_blocked_words(filter_excluded_words(adjectives, exclusions), blocklist)
+    filtered_nouns = filter_blocked_words(filter_excluded_words(nouns, exclusions), blocklist)
+    
+    indexes = (PrefixIndex(filtered_adjectives), PrefixIndex(filtered_nouns))
+    caches = None
+    if adjective_weights is not None and filtered_adjectives and filtered_nouns:
+        caches = (adjective_weights, noun_weights,
+                  AliasTable(filtered_adjectives, [adjective_weights.get(word, 1.0) for word in filtered_adjectives]),
+                  AliasTable(filtered_nouns, [noun_weights.get(word, 1.0) for word in filtered_nouns]))
+    
+    seen = set()
+    usage = {
+        'raw': object_bytes(adjectives, seen) + object_bytes(nouns, seen),
+        'filtered': object_bytes(filtered_adjectives, seen) + object_bytes(filtered_nouns, seen),
+        'indexes': object_bytes(indexes, seen),
+        'caches': object_bytes(caches, seen) if caches else 0,
+    }
+    usage['total'] = sum(usage.values())
+    if held is not None:
+        held.append((adjectives, nouns, filtered_adjectives, filtered_nouns, indexes, caches))
+    
+    return {
+        'theme': theme,
+        'adjectives': len(adjectives),
+        'nouns': len(nouns),
+        'filtered_adjectives': len(filtered_adjectives),
+        'filtered_nouns': len(filtered_nouns),
+        'bytes': usage,
+    }
+
+def memory_report(themes, default_adjectives_file, default_nouns_file, exclusions_file, blocklist_file, top=10):
+    """Load each theme and report its memory use, the process RSS and the top allocators"""
+    tracemalloc.start()
+    exclusions = load_exclusions(exclusions_file) if os.path.exists(exclusions_file) else []
+    blocklist = load_blocklist(blocklist_file)
+    
+    # Keep every theme's lists alive so RSS and the allocators reflect all of them at once
+    report = {'themes': []}
+    held = []
+    for theme in themes:
+        report['themes'].append(theme_memory_usage(
+            theme, default_adjectives_file, default_nouns_file, exclusions, blocklist, held))
+    report['shared'] = {
+        'exclusions': object_bytes(exclusions),
+        'blocklist': object_bytes(blocklist) if blocklist else 0,
+    }
+    report['rss'] = process_rss()
+    report['traced'] = tracemalloc.get_traced_memory()[0]
+    report['top_allocations'] = top_allocations(top)
+    tracemalloc.stop()
+    return report
+
+def format_memory_report(report):
+    """Format a memory report as a text table, sizes in KiB"""
+    def kib(size):
+        return f"{size / 1024:.1f}"
+    
+    columns = ('raw', 'filtered', 'indexes', 'caches', 'total')
+    width = max([len("Theme")] + [len(entry['theme']) for entry in report['themes']])
+    lines = [f"{'Theme':<{width}}  {'Words':>7}  " + "  ".join(f"{column.capitalize() + ' KiB':>12}" for column in columns)]
+    for entry in report['themes']:
+        words = entry['adjectives'] + entry['nouns']
+        lines.append(f"{entry['theme']:<{width}}  {words:>7}  " +
+                     "  ".join(f"{kib(entry['bytes'][column]):>12}" for column in columns))
+    totals = {column: sum(entry['bytes'][column] for entry in report['themes']) for column in columns}
+    words = sum(entry['adjectives'] + entry['nouns'] for entry in report['themes'])
+    lines.append(f"{'Total':<{width}}  {words:>7}  " + "  ".join(f"{kib(totals[column]):>12}" for column in columns))
+    
+    lines.append("")
+    lines.append(f"Exclusions: {kib(report['shared']['exclusions'])} KiB, "
+                 f"blocklist: {kib(report['shared']['blocklist'])} KiB")
+    rss = f"{report['rss'] / (1024 * 1024):.1f} MiB" if report['rss'] else "unknown"
+    lines.append(f"Process RSS: {rss}, traced Python allocations: {kib(report['traced'])} KiB")
+    if report['top_allocations']:
+        lines.append("Top allocators:")
+        for stat in report['top_allocations']:
+            lines.append(f"  {kib(stat['bytes']):>10} KiB  {stat['blocks']:>7} blocks  {stat['location']}")
+    return "\n".join(lines) + "\n"
+
+# -------------------- Vocabulary Compiler ---------------------
+
+def compile_word_file(filename, separator=' '):
+    """Normalize and dedupe a word file
+    
+    Whitespace is trimmed and collapsed and text NFC-normalized; blank lines,
+    duplicates and case variants (the first spelling wins) and invalid
+    weights are removed. Words containing the separator can't be told apart
+    from two words once joined, so they are errors and removed too. Words
+    containing characters other than letters, hyphens and apostrophes are
+    kept and reported as warnings. Returns the compiled file content and
+    lists of (line number, message) errors, problems (the other changes
+    compiling makes) and warnings.
+    """
+    with open(filename, 'r', encoding='utf-8', newline='') as file:
+        content = file.read()
+    
+    errors = []
+    problems = []
+    warnings = []
+    if '\r' in content:
+        problems.append((0, "line endings converted to \\n"))
+    
+    lines = []
+    first_seen = {}
+    for number, line in enumerate(content.splitlines(), 1):
+        word, tab, weight = line.partition('\t')
+        normalized = unicodedata.normalize('NFC', ' '.join(word.split()))
+        if not normalized:
+            problems.append((number, "blank line removed"))
+            continue
+        if normalized != word:
+            problems.append((number, f"'{normalized}' normalized"))
+        if separator and separator in normalized:
+            errors.append((number, f"'{normalized}' contains the separator '{separator}', removed"))
+            continue
+        
+        key = normalized.lower()
+        if key in first_seen:
+            first_number, first_word = first_seen[key]
+            kind = "duplicate" if first_word == normalized else "case variant"
+            problems.append((number, f"{kind} of '{first_word}' (line {first_number}) removed"))
+            continue
+        first_seen[key] = (number, normalized)
+        
+        if tab:
+            weight = weight.strip()
+            try:
+                valid = float(weight) > 0
+            except ValueError:
+                valid = False
+            if not valid:
+                problems.append((number, f"invalid weight '{weight}' for '{normalized}' removed"))
+                tab = ''
+        
+        if any(not (char.isalpha() or char in "-'") for char in normalized):
+            warnings.append((number, f"'{normalized}' contains characters other than letters, "
+                                     f"hyphens and apostrophes"))
+        
+        lines.append(f"{normalized}\t{weight}" if tab else normalized)
+    
+    # Keep the file's convention for a final newline
+    compiled = "\n".join(lines) + ("\n" if lines and content.endswith(('\n', '\r')) else "")
+    return compiled, errors, problems, warnings
+
+def compile_vocabulary(default_adjectives_file, default_nouns_file, manifest_file=None, separator=' ', write=True):
+    """Lint the default word lists and every theme and, with write, rewrite the changed files
+    
+    Writing also rebuilds the theme manifest. Returns the number of errors
+    (including files that can't be read) and of other problems found;
+    warnings about words that are kept as they are don't count.
+    """
+    word_files = theme_word_files(default_adjectives_file, default_nouns_file)
+    error_count = 0
+    problem_count = 0
+    warning_count = 0
+    for _, adj_file, noun_file in word_files:
+        for filename in (adj_file, noun_file):
+            try:
+                compiled, errors, problems, warnings = compile_word_file(filename, separator)
+            except (OSError, UnicodeDecodeError) as e:
+                sys.stderr.write(f"Error reading '{filename}': {str(e)}\n")
+                error_count += 1
+                continue
+            
+            for number, message in errors:
+                sys.stderr.write(f"{filename}:{number}: error: {message}\n")
+            for number, message in problems:
+                sys.stderr.write(f"{filename}:{number}: {message}\n")
+            for number, message in warnings:
+                sys.stderr.write(f"{filename}:{number}: warning: {message}\n")
+            error_count += len(errors)
+            problem_count += len(problems)
+            warning_count += len(warnings)
+            
+            if write:
+                with open(filename, 'r', encoding='utf-8', newline='') as file:
+                    changed = file.read() != compiled
+                if changed:
+                    temp_file = f"{filename}.tmp"
+                    with open(temp_file, 'w', encoding='utf-8', newline='') as file:
+                        file.write(compiled)
+                    os.replace(temp_file, filename)
+    
+    if write and manifest_file:
+        save_theme_manifest(build_theme_manifest(default_adjectives_file, default_nouns_file), manifest_file)
+    
+    action = "Compiled" if write else "Checked"
+    sys.stderr.write(f"{action} {2 * len(word_files)} word files: {error_count} error(s), "
+                     f"{problem_count} problem(s), {warning_count} warning(s)\n")
+    return error_count, problem_count
+
+# -------------------- Theme Manifest ---------------------
+
+MANIFEST_VERSION = 2
+
+def theme_word_files(default_adjectives_file, default_nouns_file):
+    """(theme, adjectives file, nouns file) for the default word lists and every theme"""
+    word_files = [('default', default_adjectives_file, default_nouns_file)]
+    for theme in sorted(get_available_themes()):
+        word_files.append((theme, os.path.join("themes", f"{theme}_adj.txt"),
+                           os.path.join("themes", f"{theme}_nouns.txt")))
+    return word_files
+
+def word_file_entry(filename):
+    """Manifest entry for a word file: word count, length range and histogram, content hash, size and mtime"""
+    with open(filename, 'rb') as file:
+        content = file.read()
+    
+    lengths = {}
+    for line in content.decode('utf-8').splitlines():
+        word = line.split('\t', 1)[0].strip()
+        if word:
+            lengths[len(word)] = lengths.get(len(word), 0) + 1
+    
+    return {
+        'path': filename,
+        'words': sum(lengths.values()),
+        'weighted': b'\t' in content,
+        'min_length': min(lengths, default=0),
+        'max_length': max(lengths, default=0),
+        'lengths': {str(length): lengths[length] for length in sorted(lengths)},
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'bytes': len(content),
+        'mtime': os.path.getmtime(filename),
+    }
+
+def manifest_stamp(default_adjectives_file, default_nouns_file):
+    """[path, mtime in nanoseconds, size] of the default word lists and every theme word file
+    
+    The time and size are None for a missing file. Adding, removing, renaming
+    or editing any word file in place changes the stamp.
+    """
+    paths = [default_adjectives_file, default_nouns_file]
+    try:
+        paths += sorted(os.path.join("themes", entry.name) for entry in os.scandir("themes")
+                        if entry.name.endswith(("_adj.txt", "_nouns.txt")))
+    except OSError:
+        pass
+    stamp = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamp.append([path, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            stamp.append([path, None, None])
+    return stamp
+
+def build_theme_manifest(default_adjectives_file, default_nouns_file):
+    """Scan and read every theme's word files into a manifest
+    
+    Each theme gets its adjectives and nouns file entries and the number of
+    combinations each pattern can produce from the raw word counts.
+    """
+    stamp = manifest_stamp(default_adjectives_file, default_nouns_file)
+    themes = {}
+    for theme, adj_file, noun_file in theme_word_files(default_adjectives_file, default_nouns_file):
+        try:
+            entry = {'adjectives': word_file_entry(adj_file), 'nouns': word_file_entry(noun_file)}
+        except (OSError, UnicodeDecodeError):
+            continue
+        counts = {"adj": entry['adjectives']['words'], "noun": entry['nouns']['words'], "number": len(NUMBER_SLOT)}
+        entry['combinations'] = {pattern: math.prod(counts[slot] for slot in slots)
+                                 for pattern, slots in PATTERN_SLOTS.items()}
+        themes[theme] = entry
+    return {'version': MANIFEST_VERSION, 'stamp': stamp, 'themes': themes}
+
+def save_theme_manifest(manifest, manifest_file):
+    """Atomically write the theme manifest"""
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tmp', delete=False,
+                                         dir=os.path.dirname(os.path.abspath(manifest_file))) as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(file.name, manifest_file)
+    except OSError as e:
+        sys.stderr.write(f"Warning: Could not write manifest '{manifest_file}': {str(e)}\n")
+
+def load_theme_manifest(manifest_file, default_adjectives_file, default_nouns_file):
+    """Read the theme manifest, rebuilding it first if it is missing or out of date
+    
+    The manifest is current while the default word lists and theme files keep
+    the modification times and sizes recorded in it, so listing themes with
+    their word counts costs a directory scan, a stat per word file and one
+    small read.
+    """
+    stamp = manifest_stamp(default_adjectives_file, default_nouns_file)
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('stamp') == stamp:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    
+    manifest = build_theme_manifest(default_adjectives_file, default_nouns_file)
+    save_theme_manifest(manifest, manifest_file)
+    return manifest
+
+# Favorites search indexes by database path; reused across requests by --daemon
+favorites_indexes = {}
+
+def get_favorites_index(store):
+    """The search index for a favorites store, brought up to date with it"""
+    index = favorites_indexes.setdefault(os.path.abspath(store.filename), FavoritesIndex())
+    index.refresh(store)
+    return index
+
+def print_stats(stats, format_type="text"):
+    """Print a --stats report as text or JSON"""
+    if format_type == "json":
+        print(json.dumps(stats, indent=2))
         return
     
-    for name in favorites:
-        print(name)
+    print(f"Theme: {stats['theme']}")
+    print(f"Pattern: {stats['pattern']}")
+    print(f"Distinct codenames: {stats['space']:,}")
+    if stats['space'] and stats['effective_space'] < stats['space'] * 0.999:
+        print(f"Effective space: {stats['effective_space']:,.0f} (weighted words repeat sooner)")
+    print(f"Chance of a repeat among {stats['issued']:,} codenames: {stats['collision_probability']:.4%}")
+    if stats['expected_repeated_pairs'] is not None:
+        print(f"Expected repeated pairs: {stats['expected_repeated_pairs']:,.4g}")
+    for risk, issued in stats['issued_at_risk'].items():
+        print(f"Codenames that can be issued with at most a {float(risk):.1%} chance of a repeat: {issued:,}")
 
-def add_favorite(codename, favorites_file):
-    """Add a codename to favorites"""
-    favorites = load_favorites(favorites_file)
-    if codename in favorites:
-        sys.stderr.write(f"Codename '{codename}' is already in favorites.\n")
+def list_favorites(favorites_file, query='', match='substring', theme=None, page=1, page_size=50,
+                   format_type="text"):
+    """List one page of the saved favorites, or of those matching a search
+    
+    A page_size of 0 lists every match. Text output is one name per line
+    with the page position on stderr; json output includes ids, themes and
+    when each favorite was added.
+    """
+    if page < 1 or page_size < 0:
+        sys.stderr.write("Error: --page must be at least 1 and --page-size at least 0\n")
+        sys.exit(1)
+    
+    ids = []
+    if os.path.exists(favorites_store_path(favorites_file)) or os.path.exists(favorites_file):
+        try:
+            with FavoritesStore(favorites_file) as store:
+                index = get_favorites_index(store)
+                ids = index.search(query, match, theme)
+        except ValueError as e:
+            sys.stderr.write(f"Error: {str(e)}\n")
+            sys.exit(1)
+    
+    page_size = page_size or max(len(ids), 1)
+    pages = max(1, math.ceil(len(ids) / page_size))
+    favorites = index.page(ids, (page - 1) * page_size, page_size) if ids else []
+    
+    if format_type == "json":
+        print(json.dumps({"favorites": favorites, "total": len(ids), "page": page, "pages": pages}, indent=2))
         return
     
-    favorites.append(codename)
-    if save_favorites(favorites, favorites_file):
+    if not ids:
+        sys.stderr.write("No favorites found.\n")
+        return
+    for favorite in favorites:
+        print(favorite['name'])
+    if pages > 1:
+        sys.stderr.write(f"Page {page} of {pages} ({len(ids)} favorites)\n")
+
+def add_favorite(codename, favorites_file, theme=None):
+    """Add a codename to favorites"""
+    codename = codename.strip()
+    if not codename:
+        sys.stderr.write("Error: A favorite can't be empty\n")
+        sys.exit(1)
+    
+    try:
+        with FavoritesStore(favorites_file) as store:
+            added = store.add(codename, theme)
+    except sqlite3.Error as e:
+        sys.stderr.write(f"Error saving favorites: {str(e)}\n")
+        sys.exit(1)
+    
+    if added:
         sys.stderr.write(f"Added '{codename}' to favorites.\n")
+    else:
+        sys.stderr.write(f"Codename '{codename}' is already in favorites.\n")
 
-def export_favorites(favorites_file, output_file, format_type="text"):
-    """Export favorites to a file in specified format"""
-    favorites = load_favorites(favorites_file)
-    if not favorites:
+def export_favorites(favorites_file, output_file, format_type="text", compress=None, compress_level=GZIP_LEVEL):
+    """Export favorites to a file in specified format, streaming them from the store"""
+    if not os.path.exists(favorites_store_path(favorites_file)) and not os.path.exists(favorites_file):
         sys.stderr.write("No favorites to export.\n")
         return
     
-    output = format_output(favorites, format_type)
-    
     try:
-        with open(output_file, 'w', encoding='utf-8') as file:
-            file.write(output)
-        sys.stderr.write(f"Exported {len(favorites)} favorites to {output_file} in {format_type} format.\n")
+        with FavoritesStore(favorites_file) as store:
+            if not len(store):
+                sys.stderr.write("No favorites to export.\n")
+                return
+            with open_output_file(output_file, compress, compress_level,
+                                  newline='' if format_type == 'csv' else None) as file:
+                count = write_output(store, file, format_type)
+        sys.stderr.write(f"Exported {count} favorites to {output_file} in {format_type} format.\n")
     except Exception as e:
         sys.stderr.write(f"Error exporting favorites: {str(e)}\n")
 
-def main():
+# -------------------- Vocabulary Cache ---------------------
+
+# Loaded vocabularies by source files; reused across requests by --daemon
+vocabulary_cache = {}
+
+def file_stamp(paths):
+    """Modification times of a set of files, None for files that don't exist"""
+    stamp = []
+    for path in paths:
+        try:
+            stamp.append(os.path.getmtime(path))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def load_vocabulary(theme, default_adjectives_file, default_nouns_file, exclusions_file, blocklist_file):
+    """Load a theme's (or the default) word lists with the blocklist and exclusions applied
+    
+    Returns a dict of adjectives and nouns (blocklist applied), their
+    weights, the exclusions and blocklist, included_adjectives and
+    included_nouns (exclusions applied as well), slug_adjectives and
+    slug_nouns (the included words valid in an RFC 1123 label, for
+    --slug), and length histograms of both for --stats. Word lists that couldn't be
+    loaded are empty. The result is cached until one of its source files
+    changes. Raises ValueError for an invalid theme blend.
+    """
+    if theme:
+        word_files = []
+        for name, _ in parse_theme_blend(theme):
+            if name == 'default':
+                word_files += [default_adjectives_file, default_nouns_file]
+            else:
+                word_files += [os.path.join("themes", f"{name}_adj.txt"), os.path.join("themes", f"{name}_nouns.txt")]
+    else:
+        word_files = [default_adjectives_file, default_nouns_file]
+    key = (os.getcwd(), theme, default_adjectives_file, default_nouns_file, exclusions_file, blocklist_file)
+    stamp = file_stamp(word_files + [exclusions_file, blocklist_file])
+    
+    cached = vocabulary_cache.get(key)
+    if cached is not None and cached['stamp'] == stamp:
+        return cached
+    
+    if theme:
+        adjectives, nouns, adjective_weights, noun_weights = load_theme_blend(theme, default_adjectives_file,
+                                                                              default_nouns_file)
+    else:
+        adjectives = load_words(default_adjectives_file)
+        nouns = load_words(default_nouns_file)
+        adjective_weights = load_word_weights(default_adjectives_file) or None
+        noun_weights = load_word_weights(default_nouns_file) or None
+    
+    exclusions = load_exclusions(exclusions_file) if os.path.exists(exclusions_file) else []
+    blocklist = load_blocklist(blocklist_file)
+    if blocklist:
+        adjectives = filter_blocked_words(adjectives, blocklist)
+        nouns = filter_blocked_words(nouns, blocklist)
+    
+    excluded = set(exclusions)
+    included_adjectives = filter_excluded_words(adjectives, excluded)
+    included_nouns = filter_excluded_words(nouns, excluded)
+    slug_adjectives = [word for word in included_adjectives if is_slug_word(word)]
+    slug_nouns = [word for word in included_nouns if is_slug_word(word)]
+    vocabulary = {
+        'adjectives': adjectives,
+        'nouns': nouns,
+        'adjective_weights': adjective_weights,
+        'noun_weights': noun_weights,
+        'exclusions': exclusions,
+        'blocklist': blocklist,
+        'included_adjectives': included_adjectives,
+        'included_nouns': included_nouns,
+        'slug_adjectives': slug_adjectives,
+        'slug_nouns': slug_nouns,
+        'histograms': (length_histogram(included_adjectives, adjective_weights),
+                       length_histogram(included_nouns, noun_weights)),
+        'slug_histograms': (length_histogram(slug_adjectives, adjective_weights),
+                            length_histogram(slug_nouns, noun_weights)),
+        'stamp': stamp,
+    }
+    if None not in stamp[:len(word_files)]:
+        vocabulary_cache[key] = vocabulary
+    return vocabulary
+
+# -------------------- Batch Specs ---------------------
+
+# Keys a --batch spec may set; missing ones default to the command line options
+BATCH_SPEC_KEYS = {'id', 'theme', 'pattern', 'case', 'separator', 'count', 'min_length', 'max_length',
+                   'min_total_length', 'max_total_length', 'alliterate', 'initials', 'prefix', 'secure', 'slug',
+                   'format', 'output'}
+CASE_STYLES = ('title', 'upper', 'lower', 'sentence')
+OUTPUT_FORMATS = ('text', 'json', 'csv', 'html')
+
+def batch_spec_error(spec):
+    """Problem with a --batch spec's settings, or None"""
+    unknown = sorted(set(spec) - BATCH_SPEC_KEYS)
+    if unknown:
+        return f"Unknown spec keys: {', '.join(unknown)}"
+    if spec['pattern'] not in PATTERN_SLOTS:
+        return f"Unknown pattern '{spec['pattern']}'"
+    if spec['case'] not in CASE_STYLES:
+        return f"Unknown case style '{spec['case']}'"
+    if spec['format'] not in OUTPUT_FORMATS:
+        return f"Unknown format '{spec['format']}'"
+    if spec['count'] < 1:
+        return "Count must be at least 1"
+    if spec['min_length'] > 0 and spec['max_length'] > 0 and spec['min_length'] > spec['max_length']:
+        return "Minimum length cannot be greater than maximum length"
+    if (spec['min_total_length'] > 0 and spec['max_total_length'] > 0
+            and spec['min_total_length'] > spec['max_total_length']):
+        return "Minimum total length cannot be greater than maximum total length"
+    return None
+
+def run_batch_spec(spec, args, adj_path, noun_path, similarity_index=None):
+    """Generate the codenames for one --batch spec: (codenames, None) or (None, error message)"""
+    defaults = {
+        'theme': args.theme, 'pattern': args.pattern, 'case': args.case, 'separator': args.separator,
+        'count': args.count, 'min_length': args.min_length, 'max_length': args.max_length,
+        'min_total_length': args.min_total_length, 'max_total_length': args.max_total_length,
+        'alliterate': args.alliterate, 'initials': args.initials, 'prefix': args.prefix, 'secure': args.secure,
+        'slug': args.slug, 'format': args.format,
+    }
+    spec = {**defaults, **spec}
+    try:
+        for key in ('count', 'min_length', 'max_length', 'min_total_length', 'max_total_length'):
+            spec[key] = int(spec[key])
+    except (TypeError, ValueError):
+        return None, f"Invalid {key} '{spec[key]}'"
+    if spec['slug']:
+        try:
+            spec['separator'], spec['max_total_length'] = slug_options(spec['separator'], spec['max_total_length'])
+        except ValueError as e:
+            return None, str(e)
+        spec['case'] = 'lower'
+    error = batch_spec_error(spec)
+    if error:
+        return None, error
+    
+    # Word-list and generation errors are reported on stderr followed by an exit, as for a single run
+    messages = StringIO()
+    try:
+        with redirect_stderr(messages):
+            vocabulary = load_vocabulary(spec['theme'], adj_path, noun_path, args.exclusions, args.blocklist)
+            if not vocabulary['adjectives'] or not vocabulary['nouns']:
+                return None, (messages.getvalue().strip()
+                              or f"No words loaded for theme '{spec['theme'] or 'default'}'")
+            words = ('slug_adjectives', 'slug_nouns') if spec['slug'] else ('included_adjectives', 'included_nouns')
+            codenames = generate_codename(
+                adjectives=vocabulary[words[0]],
+                nouns=vocabulary[words[1]],
+                count=spec['count'],
+                separator=spec['separator'],
+                pattern=spec['pattern'],
+                case_style=spec['case'],
+                min_length=spec['min_length'],
+                max_length=spec['max_length'],
+                min_total_length=spec['min_total_length'],
+                max_total_length=spec['max_total_length'],
+                blocklist=vocabulary['blocklist'],
+                similarity_index=similarity_index,
+                alliterate=bool(spec['alliterate']),
+                initials=spec['initials'],
+                prefix=spec['prefix'],
+                secure=bool(spec['secure']),
+                adjective_weights=vocabulary['adjective_weights'],
+                noun_weights=vocabulary['noun_weights']
+            )
+    except SystemExit:
+        return None, messages.getvalue().strip().removeprefix("Error: ") or "Generation failed"
+    except ValueError as e:
+        return None, str(e)
+    return codenames, None
+
+def run_batch(batch_file, args, adj_path, noun_path, similarity_index=None):
+    """Process a file (or - for stdin) of JSON specs, one per line, in a single run
+    
+    Each spec's settings default to the command line options. A spec with
+    an "output" file gets its codenames written there in its "format";
+    otherwise they're included in its result. One JSON result line per spec
+    ({"line", "id", "codenames" or "output" and "count", or "error"}) is
+    written to -o or stdout. Each distinct vocabulary is loaded and filtered
+    once. Returns the number of failed specs.
+    """
+    results = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    specs = sys.stdin if batch_file == '-' else open(batch_file, 'r', encoding='utf-8')
+    failures = 0
+    try:
+        for line_number, line in enumerate(specs, 1):
+            if not line.strip():
+                continue
+            
+            result = {'line': line_number}
+            try:
+                spec = json.loads(line)
+            except ValueError as e:
+                spec, error = {}, f"Invalid JSON: {str(e)}"
+            else:
+                if isinstance(spec, dict):
+                    codenames, error = run_batch_spec(spec, args, adj_path, noun_path, similarity_index)
+                else:
+                    spec, error = {}, "A spec must be a JSON object"
+            if 'id' in spec:
+                result['id'] = spec['id']
+            
+            if not error and spec.get('output'):
+                try:
+                    with open_output_file(spec['output'], args.compress, args.compress_level) as file:
+                        write_output(codenames, file, spec.get('format', args.format))
+                    result.update(output=spec['output'], count=len(codenames))
+                except OSError as e:
+                    error = f"Error writing to output file: {str(e)}"
+            elif not error:
+                result['codenames'] = codenames
+            
+            if error:
+                result['error'] = error
+                failures += 1
+                if args.verbose:
+                    sys.stderr.write(f"Spec on line {line_number} failed: {error}\n")
+            results.write(json.dumps(result) + "\n")
+    finally:
+        if specs is not sys.stdin:
+            specs.close()
+        if results is not sys.stdout:
+            results.close()
+    return failures
+
+# -------------------- Daemon ---------------------
+
+def run_captured(argv, cwd):
+    """Run main() for a forwarded command line in cwd: (exit status, stdout, stderr)"""
+    stdout, stderr = StringIO(), StringIO()
+    status = 0
+    previous_dir = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            main(argv, serving=True)
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            stderr.write(e.code + "\n")
+        status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        stderr.write(f"Error: {str(e)}\n")
+        status = 1
+    finally:
+        os.chdir(previous_dir)
+    return status, stdout.getvalue(), stderr.getvalue()
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """One request per connection: a JSON line {"argv", "cwd"} in, {"status", "stdout", "stderr"} out"""
+    
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # A connection check, e.g. by another daemon starting on this socket
+            return
+        try:
+            request = json.loads(line)
+            status, stdout, stderr = run_captured([str(arg) for arg in request['argv']], request['cwd'])
+        except (ValueError, KeyError, TypeError) as e:
+            status, stdout, stderr = 1, "", f"Error: Invalid daemon request: {str(e)}\n"
+        try:
+            self.wfile.write(json.dumps({'status': status, 'stdout': stdout, 'stderr': stderr}).encode('utf-8') + b"\n")
+        except OSError:
+            # The client went away
+            pass
+
+def serve_daemon(socket_path, verbose=False):
+    """Serve forwarded command lines on a Unix socket, keeping loaded vocabularies warm
+    
+    Requests are handled one at a time, since main() writes to the process's
+    stdout/stderr and runs in the client's working directory. The socket is
+    only accessible to the current user, in a directory only they can write
+    to (see daemon_socket_problem()); the default one is created private.
+    """
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), mode=0o700, exist_ok=True)
+    except OSError as e:
+        sys.stderr.write(f"Error: Could not create the socket directory: {str(e)}\n")
+        sys.exit(1)
+    problem = daemon_socket_problem(socket_path)
+    if problem:
+        sys.stderr.write(f"Error: Refusing to listen on '{socket_path}': {problem}\n")
+        sys.exit(1)
+    
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(socket_path)
+            sys.stderr.write(f"Error: A daemon is already listening on '{socket_path}'\n")
+            sys.exit(1)
+        except ConnectionRefusedError:
+            # Left behind by a daemon that didn't shut down cleanly
+            os.remove(socket_path)
+    
+    previous_umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, DaemonRequestHandler)
+    finally:
+        os.umask(previous_umask)
+    
+    # Shut down cleanly (removing the socket) when terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if verbose:
+        sys.stderr.write(f"Listening on {socket_path}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+@functools.lru_cache(maxsize=None)
+def build_parser():
+    """The command line parser, built once and reused by every --daemon request"""
     # Create argument parser
     parser = argparse.ArgumentParser(description='Generate random codenames from adjectives and nouns')
     
@@ -265,13 +2390,21 @@ def main():
     parser.add_argument('-f', '--format', choices=['text', 'json', 'csv', 'html'], default='text',
                       help='Output format (text, json, csv, or html)')
     parser.add_argument('-o', '--output', help='Output file (if not specified, prints to stdout)')
+    parser.add_argument('--compress', choices=['gzip'],
+                      help='Compress output, favorites exports, batch outputs and enumeration shards as they are written')
+    parser.add_argument('--compress-level', type=int, choices=range(1, 10), default=GZIP_LEVEL, metavar='1-9',
+                      help=f'gzip level for --compress: 1 is fastest, 9 smallest (default: {GZIP_LEVEL})')
     
     # Theme options
-    parser.add_argument('-t', '--theme', help='Use specific theme (themes must be in themes/ directory)')
+    parser.add_argument('-t', '--theme',
+                      help='Use specific theme or weighted blend such as "cyberpunk:0.6,ocean:0.4" '
+                           '(themes must be in themes/ directory)')
     parser.add_argument('--list-themes', action='store_true', help='List available themes')
     
     # Exclusion options
     parser.add_argument('-e', '--exclusions', default='exclusions.txt', help='Path to exclusions file')
+    parser.add_argument('-b', '--blocklist', default='blocklist.txt',
+                      help='Path to file of blocked substrings, checked in words and in joined codenames')
     
     # Pattern and formatting options
     parser.add_argument('-p', '--pattern', choices=['adj-noun', 'noun-noun', 'adj-adj-noun', 'noun-adj', 'adj-noun-number'],
@@ -282,14 +2415,114 @@ def main():
                       help='Minimum length for words (0 for no minimum)')
     parser.add_argument('--max-length', type=int, default=0,
                       help='Maximum length for words (0 for no maximum)')
+    parser.add_argument('--min-total-length', type=int, default=0,
+                      help='Minimum length of the whole codename including separators (0 for no minimum)')
+    parser.add_argument('--max-total-length', type=int, default=0,
+                      help='Maximum length of the whole codename including separators (0 for no maximum)')
+    parser.add_argument('--alliterate', action='store_true', help='Make every word start with the same letter')
+    parser.add_argument('--initials', help='Make word initials spell these letters (e.g. "B.F.")')
+    parser.add_argument('--prefix', help='Make the first word start with this prefix')
+    parser.add_argument('--slug', action='store_true',
+                      help='Generate RFC 1123 labels (hostnames, Kubernetes names): lowercase, hyphen-joined, '
+                           f'at most {SLUG_MAX_LENGTH} characters, from the words valid in one')
+    parser.add_argument('--secure', action='store_true',
+                      help='Draw words and numbers from the system\'s cryptographically secure random source')
     
     # Favorites options
-    parser.add_argument('--favorites', default='favorites.txt', help='Path to favorites file')
-    parser.add_argument('--list-favorites', action='store_true', help='List saved favorites')
+    parser.add_argument('--favorites', default='favorites.txt',
+                      help='Path to favorites file (kept in a SQLite database with a .db extension next to it)')
+    parser.add_argument('--list-favorites', action='store_true', help='List a page of saved favorites')
+    parser.add_argument('--search-favorites', metavar='QUERY',
+                      help='List a page of the favorites matching QUERY (see --match)')
+    parser.add_argument('--match', choices=['prefix', 'substring', 'word'], default='substring',
+                      help='How --search-favorites matches: names starting with, containing, '
+                           'or containing every word of QUERY')
+    parser.add_argument('--favorites-theme',
+                      help='Only list favorites saved from this theme ("default" for the default word lists)')
+    parser.add_argument('--page', type=int, default=1, help='Page of favorites to list')
+    parser.add_argument('--page-size', type=int, default=50,
+                      help='Favorites per page (0 lists every match)')
     parser.add_argument('--add-favorite', help='Add a codename to favorites')
     parser.add_argument('--export-favorites', help='Export favorites to a file')
     
-    args = parser.parse_args()
+    # Near-duplicate options
+    parser.add_argument('--issued', default='issued.txt',
+                      help='Path to file of already issued codenames, one per line')
+    parser.add_argument('--reject-distance', type=int, default=0,
+                      help='Reject codenames within this many edits of a favorite or issued name (0 to disable)')
+    parser.add_argument('--reject-phonetic', action='store_true',
+                      help='Reject codenames that sound like a favorite or issued name')
+    
+    # Enumeration options
+    parser.add_argument('--enumerate', action='store_true',
+                      help='Write every combination for the pattern to sharded files (-o sets the file prefix)')
+    parser.add_argument('--order', choices=['sequential', 'shuffled'], default='sequential',
+                      help='Order in which --enumerate visits combinations')
+    parser.add_argument('--seed', type=int, help='Seed for --order shuffled (random if not specified)')
+    parser.add_argument('--shard-size', type=int, default=1000000,
+                      help='Number of codenames per --enumerate output file')
+    
+    # Statistics options
+    parser.add_argument('--stats', action='store_true',
+                      help='Report how many distinct codenames the pattern, length limits and (slug) vocabulary allow '
+                           'and the chance of a repeat among --stats-count codenames, without generating any')
+    parser.add_argument('--stats-count', type=int, default=1000,
+                      help='Number of codenames to be issued, for the --stats collision risk')
+    
+    # Memory accounting options
+    parser.add_argument('--memory-report', action='store_true',
+                      help='Report word counts and memory used per theme (the -t theme, or all themes), '
+                           'process RSS and top allocators (-f json for JSON)')
+    parser.add_argument('--memory-top', type=int, default=10,
+                      help='Number of top allocators to show in --memory-report')
+    
+    # Vocabulary compiler options
+    parser.add_argument('--lint', action='store_true',
+                      help='Report errors and problems in the default word lists and every theme, exit 1 if '
+                           'there are any (warnings about words kept as they are don\'t count)')
+    parser.add_argument('--compile', action='store_true',
+                      help='Normalize and dedupe the default word lists and every theme, then write the manifest; '
+                           'exit 1 if words containing the separator had to be removed')
+    parser.add_argument('--manifest', default='manifest.json',
+                      help='Path of the theme manifest read by --list-themes and written by --compile')
+    
+    # Daemon options
+    parser.add_argument('--daemon', action='store_true',
+                      help='Serve requests from --client on a Unix socket, keeping vocabularies loaded')
+    parser.add_argument('--client', action='store_true',
+                      help='Run this command in the daemon (runs locally if no daemon is listening)')
+    parser.add_argument('--socket', default=DAEMON_SOCKET, help='Unix socket path for --daemon and --client')
+    
+    # Batch options
+    parser.add_argument('--batch', metavar='FILE',
+                      help='Generate codenames for each JSON spec in FILE (- for stdin), one per line, '
+                           'writing one JSON result per line')
+    
+    return parser
+
+def main(argv=None, serving=False):
+    """Run the command line argv (sys.argv[1:] by default); serving is set inside the daemon"""
+    parser = build_parser()
+    
+    checked = argv is None and daemon_checked
+    if argv is None:
+        argv = sys.argv[1:]
+    args = parser.parse_args(argv)
+    
+    # Serve forwarded commands, or forward this one, if requested
+    if args.daemon:
+        if serving:
+            sys.stderr.write("Error: --daemon can't be run through the daemon\n")
+            sys.exit(1)
+        serve_daemon(args.socket, args.verbose)
+        return
+    
+    if args.client and not serving:
+        status = None if checked else forward_to_daemon(argv, args.socket)
+        if status is not None:
+            sys.exit(status)
+        if args.verbose:
+            sys.stderr.write(f"No daemon listening on '{args.socket}', running locally\n")
     
     # Create themes directory if it doesn't exist
     if not os.path.exists("themes"):
@@ -297,47 +2530,103 @@ def main():
             sys.stderr.write("Creating themes directory...\n")
         os.makedirs("themes", exist_ok=True)
     
+    # Resolve file paths for the main functionality
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    adj_path = os.path.join(script_dir, args.adjectives) if not os.path.isabs(args.adjectives) else args.adjectives
+    noun_path = os.path.join(script_dir, args.nouns) if not os.path.isabs(args.nouns) else args.nouns
+    
     # List themes and exit if requested
     if args.list_themes:
-        themes = get_available_themes()
+        manifest = load_theme_manifest(args.manifest, adj_path, noun_path)
+        themes = sorted(theme for theme in manifest['themes'] if theme != 'default')
         if not themes:
             sys.stderr.write("No themes available. Create theme files in the themes/ directory.\n")
         else:
             sys.stderr.write("Available themes:\n")
             for theme in themes:
-                sys.stderr.write(f"- {theme}\n")
+                entry = manifest['themes'][theme]
+                sys.stderr.write(f"- {theme} ({entry['adjectives']['words']} adjectives, "
+                                 f"{entry['nouns']['words']} nouns)\n")
         return
     
     # List favorites and exit if requested
-    if args.list_favorites:
-        list_favorites(args.favorites)
+    if args.list_favorites or args.search_favorites is not None:
+        list_favorites(args.favorites, args.search_favorites or '', args.match, args.favorites_theme,
+                       args.page, args.page_size, args.format)
         return
     
     # Add to favorites and exit if requested
     if args.add_favorite:
-        add_favorite(args.add_favorite, args.favorites)
+        add_favorite(args.add_favorite, args.favorites, args.theme)
         return
     
     # Export favorites and exit if requested
     if args.export_favorites:
         export_format = args.format
-        export_favorites(args.favorites, args.export_favorites, export_format)
+        export_favorites(args.favorites, args.export_favorites, export_format, args.compress, args.compress_level)
         return
     
-    # Resolve file paths for the main functionality
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+    # Lint or compile the word lists and exit if requested
+    if args.lint or args.compile:
+        error_count, problem_count = compile_vocabulary(adj_path, noun_path, args.manifest, args.separator,
+                                                        write=args.compile)
+        # Compiling fixes problems but not errors: words were dropped and need a look
+        if error_count or (args.lint and problem_count):
+            sys.exit(1)
+        return
     
-    # Load words based on theme or default files
+    # Report memory use and exit if requested
+    if args.memory_report:
+        themes = [args.theme] if args.theme else ['default'] + sorted(get_available_themes())
+        try:
+            report = memory_report(themes, adj_path, noun_path, args.exclusions, args.blocklist, args.memory_top)
+        except ValueError as e:
+            sys.stderr.write(f"Error: {str(e)}\n")
+            sys.exit(1)
+        if args.theme and not (report['themes'][0]['adjectives'] and report['themes'][0]['nouns']):
+            sys.exit(1)
+        output = json.dumps(report, indent=2) + "\n" if args.format == 'json' else format_memory_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            print(output, end='')
+        return
+    
+    # Index favorites and issued names for near-duplicate rejection
+    similarity_index = None
+    if args.reject_distance < 0:
+        sys.stderr.write("Error: Reject distance cannot be negative\n")
+        sys.exit(1)
+    if args.reject_distance > 0 or args.reject_phonetic:
+        similarity_index = SimilarityIndex(
+            favorite_names(args.favorites) + load_favorites(args.issued),
+            max_distance=args.reject_distance,
+            phonetic=args.reject_phonetic
+        )
+        if args.verbose:
+            sys.stderr.write(f"Indexed {len(similarity_index)} favorite and issued names\n")
+    
+    # Run a batch of specs and exit if requested
+    if args.batch:
+        if args.batch == '-' and serving:
+            sys.stderr.write("Error: --batch - can't read stdin through the daemon; pass a file\n")
+            sys.exit(1)
+        try:
+            failures = run_batch(args.batch, args, adj_path, noun_path, similarity_index)
+        except OSError as e:
+            sys.stderr.write(f"Error: {str(e)}\n")
+            sys.exit(1)
+        if failures:
+            sys.exit(1)
+        return
+    
+    # Load words based on theme (or theme blend) or default files
     if args.theme:
         if args.verbose:
             sys.stderr.write(f"Loading theme '{args.theme}'...\n")
-        adjectives, nouns = load_themed_words(args.theme)
-        if not adjectives or not nouns:
-            sys.exit(1)
     else:
-        adj_path = os.path.join(script_dir, args.adjectives) if not os.path.isabs(args.adjectives) else args.adjectives
-        noun_path = os.path.join(script_dir, args.nouns) if not os.path.isabs(args.nouns) else args.nouns
-        
         # Display paths for debugging if verbose
         if args.verbose:
             sys.stderr.write(f"Loading adjectives from: {adj_path}\n")
@@ -351,17 +2640,24 @@ def main():
         if not os.path.exists(noun_path):
             sys.stderr.write(f"Error: Nouns file '{noun_path}' not found.\n")
             sys.exit(1)
-        
-        # Load word lists
-        adjectives = load_words(adj_path)
-        nouns = load_words(noun_path)
     
-    # Load exclusions if specified
-    exclusions = []
-    if os.path.exists(args.exclusions):
-        exclusions = load_exclusions(args.exclusions)
-        if args.verbose and exclusions:
-            sys.stderr.write(f"Loaded {len(exclusions)} exclusions\n")
+    # Load word lists (with weights if the files have a weight column), exclusions and the
+    # substring blocklist, pruning words that contain a blocked substring
+    try:
+        vocabulary = load_vocabulary(args.theme, adj_path, noun_path, args.exclusions, args.blocklist)
+    except ValueError as e:
+        sys.stderr.write(f"Error: {str(e)}\n")
+        sys.exit(1)
+    if args.theme and not (vocabulary['adjectives'] and vocabulary['nouns']):
+        sys.exit(1)
+    
+    adjectives, nouns = vocabulary['adjectives'], vocabulary['nouns']
+    adjective_weights, noun_weights = vocabulary['adjective_weights'], vocabulary['noun_weights']
+    exclusions, blocklist = vocabulary['exclusions'], vocabulary['blocklist']
+    if args.verbose and exclusions:
+        sys.stderr.write(f"Loaded {len(exclusions)} exclusions\n")
+    if args.verbose and blocklist:
+        sys.stderr.write(f"Loaded {len(blocklist)} blocklist patterns\n")
     
     # Verify we have words
     if not adjectives:
@@ -375,6 +2671,21 @@ def main():
     if args.verbose:
         sys.stderr.write(f"Loaded {len(adjectives)} adjectives and {len(nouns)} nouns\n")
     
+    # Slugs are lowercase, hyphen-joined (or unseparated) and no longer than an RFC 1123 label
+    if args.slug:
+        if args.enumerate:
+            sys.stderr.write("Error: --slug can't be combined with --enumerate\n")
+            sys.exit(1)
+        try:
+            args.separator, args.max_total_length = slug_options(args.separator, args.max_total_length)
+        except ValueError as e:
+            sys.stderr.write(f"Error: {str(e)}\n")
+            sys.exit(1)
+        args.case = 'lower'
+        if args.verbose:
+            sys.stderr.write(f"{len(vocabulary['slug_adjectives'])} adjectives and "
+                             f"{len(vocabulary['slug_nouns'])} nouns are valid in a slug\n")
+    
     # Verify count is valid
     if args.count < 1:
         sys.stderr.write("Error: Count must be at least 1\n")
@@ -385,36 +2696,117 @@ def main():
         sys.stderr.write("Error: Minimum length cannot be greater than maximum length\n")
         sys.exit(1)
     
-    # Generate codenames
+    if (args.min_total_length > 0 and args.max_total_length > 0
+            and args.min_total_length > args.max_total_length):
+        sys.stderr.write("Error: Minimum total length cannot be greater than maximum total length\n")
+        sys.exit(1)
+    
+    # Report the combination space and collision risk and exit if requested
+    if args.stats:
+        if args.alliterate or args.initials or args.prefix:
+            sys.stderr.write("Error: --stats doesn't support letter constraints\n")
+            sys.exit(1)
+        if args.stats_count < 0:
+            sys.stderr.write("Error: --stats-count can't be negative\n")
+            sys.exit(1)
+        stats = codename_stats(vocabulary['slug_histograms' if args.slug else 'histograms'],
+                               args.pattern, len(args.separator), args.min_length, args.max_length,
+                               args.min_total_length, args.max_total_length, args.stats_count)
+        print_stats(dict(theme=args.theme or 'default', pattern=args.pattern, **stats), args.format)
+        return
+    
+    # Enumerate every combination and exit if requested
+    if args.enumerate:
+        if args.format == 'html':
+            sys.stderr.write("Error: --enumerate supports text, json and csv formats\n")
+            sys.exit(1)
+        
+        if args.shard_size < 1:
+            sys.stderr.write("Error: Shard size must be at least 1\n")
+            sys.exit(1)
+        
+        adjectives = dedupe_words(filter_excluded_words(adjectives, exclusions))
+        nouns = dedupe_words(filter_excluded_words(nouns, exclusions))
+        if args.min_length > 0:
+            adjectives = [adj for adj in adjectives if len(adj) >= args.min_length]
+            nouns = [noun for noun in nouns if len(noun) >= args.min_length]
+        if args.max_length > 0:
+            adjectives = [adj for adj in adjectives if len(adj) <= args.max_length]
+            nouns = [noun for noun in nouns if len(noun) <= args.max_length]
+        
+        if not adjectives or not nouns:
+            sys.stderr.write("Error: No words left to enumerate after exclusions and length limits\n")
+            sys.exit(1)
+        
+        try:
+            enumerate_codenames(
+                adjectives=adjectives,
+                nouns=nouns,
+                output_prefix=args.output or 'enumeration',
+                pattern=args.pattern,
+                separator=args.separator,
+                case_style=args.case,
+                order=args.order,
+                seed=args.seed,
+                shard_size=args.shard_size,
+                format_type=args.format,
+                blocklist=blocklist,
+                compress=args.compress,
+                compress_level=args.compress_level
+            )
+        except KeyboardInterrupt:
+            sys.stderr.write("\nInterrupted. Run the same command again to resume.\n")
+            sys.exit(130)
+        return
+    
+    # Compressed output without --output goes to stdout, but never to a terminal
+    if args.compress and not args.output:
+        if serving:
+            sys.stderr.write("Error: --compress needs --output when run through the daemon\n")
+            sys.exit(1)
+        if sys.stdout.isatty():
+            sys.stderr.write("Error: Refusing to write compressed output to a terminal; "
+                             "use --output or redirect stdout\n")
+            sys.exit(1)
+    
+    # Generate codenames, drawn chunk by chunk as they are written when writing a file or compressing
     try:
+        words = ('slug_adjectives', 'slug_nouns') if args.slug else ('included_adjectives', 'included_nouns')
         codenames = generate_codename(
-            adjectives=adjectives, 
-            nouns=nouns, 
+            adjectives=vocabulary[words[0]], 
+            nouns=vocabulary[words[1]], 
             count=args.count, 
             separator=args.separator, 
-            exclusions=exclusions,
             pattern=args.pattern,
             case_style=args.case,
             min_length=args.min_length,
-            max_length=args.max_length
+            max_length=args.max_length,
+            min_total_length=args.min_total_length,
+            max_total_length=args.max_total_length,
+            blocklist=blocklist,
+            similarity_index=similarity_index,
+            alliterate=args.alliterate,
+            initials=args.initials,
+            prefix=args.prefix,
+            secure=args.secure,
+            adjective_weights=adjective_weights,
+            noun_weights=noun_weights,
+            stream=bool(args.output or args.compress)
         )
         
-        # Format output
-        output = format_output(codenames, args.format)
-        
-        # Output to file or stdout
-        if args.output:
+        # Output to file or stdout, streaming chunk by chunk when writing a file or compressing
+        if args.output or args.compress:
             try:
-                with open(args.output, 'w', encoding='utf-8') as file:
-                    file.write(output)
-                if args.verbose:
+                with open_output_file(args.output, args.compress, args.compress_level) as file:
+                    write_output(codenames, file, args.format)
+                if args.verbose and args.output:
                     sys.stderr.write(f"Output written to {args.output}\n")
             except Exception as e:
                 sys.stderr.write(f"Error writing to output file: {str(e)}\n")
                 sys.exit(1)
         else:
             # Print to stdout
-            print(output, end='')
+            print(format_output(codenames, args.format), end='')
     
     except Exception as e:
         sys.stderr.write(f"Error generating codenames: {str(e)}\n")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Thin client for SpySpeak-cli.py --daemon: takes the same flags and runs the
+# command line in the daemon, so a call only pays for starting Python and
+# compiling this small file. Without a daemon it runs SpySpeak-cli.py itself.
+import os
+import sys
+import json
+import socket
+import stat
+
+def default_daemon_socket():
+    """$SPYSPEAK_SOCKET, else spyspeak.sock in $XDG_RUNTIME_DIR or in a private per-user temp directory"""
+    if os.environ.get('SPYSPEAK_SOCKET'):
+        return os.environ['SPYSPEAK_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], "spyspeak.sock")
+    user = os.getuid() if hasattr(os, 'getuid') else 'user'
+    return os.path.join(os.environ.get('TMPDIR') or "/tmp", f"spyspeak-{user}", "daemon.sock")
+
+DAEMON_SOCKET = default_daemon_socket()
+
+def daemon_socket_problem(socket_path):
+    """Why socket_path can't be trusted, or None
+    
+    The socket's directory must belong to the current user and not be
+    writable by anyone else, so no other local user can put a socket of
+    their own in its place; the socket must belong to the current user too.
+    A missing directory or socket just means no daemon is running.
+    """
+    if not hasattr(os, 'getuid'):
+        return None
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    try:
+        directory_stat = os.stat(directory)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        return f"can't access '{directory}': {e.strerror}"
+    if directory_stat.st_uid != os.getuid() or directory_stat.st_mode & 0o022:
+        return f"'{directory}' must belong to you and not be writable by others"
+    try:
+        socket_stat = os.lstat(socket_path)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        return f"can't access '{socket_path}': {e.strerror}"
+    if not stat.S_ISSOCK(socket_stat.st_mode) or socket_stat.st_uid != os.getuid():
+        return f"'{socket_path}' is not a socket of yours"
+    return None
+
+def forward_to_daemon(argv, socket_path):
+    """Run a command line in the daemon and relay its output
+    
+    Returns the daemon's exit status, or None if no daemon is listening or
+    its socket can't be trusted (see daemon_socket_problem()).
+    """
+    problem = daemon_socket_problem(socket_path)
+    if problem:
+        sys.stderr.write(f"Warning: Not using the daemon: {problem}\n")
+        return None
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(socket_path)
+    except (OSError, AttributeError):
+        return None
+    
+    with client:
+        client.sendall(json.dumps({'argv': argv, 'cwd': os.getcwd()}).encode('utf-8') + b"\n")
+        with client.makefile('rb') as reply:
+            response = json.loads(reply.readline())
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['status']
+
+def client_socket_path(argv):
+    """The --socket path given in a command line, or the default one"""
+    for position, arg in enumerate(argv):
+        if arg == '--socket' and position + 1 < len(argv):
+            return argv[position + 1]
+        if arg.startswith('--socket='):
+            return arg.partition('=')[2]
+    return DAEMON_SOCKET
+
+def main():
+    """Forward sys.argv to the daemon, or run SpySpeak-cli.py with it if no daemon answers"""
+    argv = sys.argv[1:]
+    status = forward_to_daemon(argv, client_socket_path(argv))
+    if status is not None:
+        sys.exit(status)
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SpySpeak-cli.py")
+    os.execv(sys.executable, [sys.executable, cli] + argv)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,30 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, send_file, url_for, g
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from array import array
+from io import StringIO
+from types import MappingProxyType
+from itertools import chain, islice
 import random
 import os
+import argparse
 import json
+import re
+import csv
+import bisect
+import functools
+import gzip
+import hashlib
+import hmac
+import math
+import sqlite3
 import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+import zlib
 
 # Add the current directory to the path so we can import our codename functions
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -12,10 +34,10 @@ app = Flask(__name__)
 # -------------------- Utility Functions ---------------------
 
 def load_words(filename):
-    """Load words from a file, one word per line"""
+    """Load words from a file, one word per line (an optional tab-separated weight column is ignored)"""
     try:
         with open(filename, 'r', encoding='utf-8') as file:
-            words = [line.strip() for line in file if line.strip()]
+            words = [word for word in (line.split('\t', 1)[0].strip() for line in file) if word]
             return words
     except FileNotFoundError:
         app.logger.error(f"Error: Could not find the file '{filename}'")
@@ -24,6 +46,27 @@ def load_words(filename):
         app.logger.error(f"Error reading '{filename}': {str(e)}")
         return []
 
+def load_word_weights(filename):
+    """Load the optional tab-separated weight column of a word file as a word -> weight dict"""
+    weights = {}
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            for line in file:
+                word, tab, weight = line.partition('\t')
+                word = word.strip()
+                if not word or not tab:
+                    continue
+                try:
+                    weights[word] = float(weight)
+                except ValueError:
+                    weights[word] = 0.0
+                if weights[word] <= 0:
+                    app.logger.warning(f"Ignoring invalid weight for '{word}' in '{filename}'")
+                    del weights[word]
+    except Exception as e:
+        app.logger.error(f"Error reading weights from '{filename}': {str(e)}")
+    return weights
+
 def load_exclusions(filename):
     """Load exclusion words from a file"""
     if not os.path.exists(filename):
@@ -44,6 +87,214 @@ def filter_excluded_words(words, exclusions):
     
     return [word for word in words if word.lower() not in exclusions]
 
+def normalize_for_blocklist(text):
+    """Lowercase text and drop everything but letters and digits"""
+    return ''.join(char for char in text.lower() if char.isalnum())
+
+class BlocklistMatcher:
+    """Aho-Corasick automaton that finds blocked substrings in linear time
+    
+    Patterns and checked text are both normalized with normalize_for_blocklist(),
+    so a pattern matches regardless of case or of the separator placed between
+    words: "bad word" blocks "Bad-Word", "BADWORD" and "Bad Wordsmith".
+    """
+    
+    def __init__(self, patterns):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.output = [None]
+        self.patterns = []
+        
+        for pattern in patterns:
+            pattern = normalize_for_blocklist(pattern)
+            if not pattern:
+                continue
+            self.patterns.append(pattern)
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            self.output[state] = pattern
+        
+        # Breadth-first pass to link each state to its longest proper suffix state
+        queue = list(self.transitions[0].values())
+        for state in queue:
+            for char, target in self.transitions[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.transitions[fallback].get(char, 0)
+                if self.output[target] is None:
+                    self.output[target] = self.output[self.fail[target]]
+                queue.append(target)
+    
+    def __len__(self):
+        return len(self.patterns)
+    
+    def search(self, text):
+        """Return the first blocked pattern found in text, or None"""
+        state = 0
+        for char in normalize_for_blocklist(text):
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            if self.output[state] is not None:
+                return self.output[state]
+        return None
+    
+    def matches(self, text):
+        """Check whether text contains any blocked pattern"""
+        return bool(self.patterns) and self.search(text) is not None
+
+def load_blocklist(filename):
+    """Load blocked substrings from a file and compile them into a matcher"""
+    if not os.path.exists(filename):
+        return None
+    
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            return BlocklistMatcher(line.strip() for line in file if line.strip())
+    except Exception as e:
+        app.logger.error(f"Error reading blocklist from '{filename}': {str(e)}")
+        return None
+
+def filter_blocked_words(words, blocklist):
+    """Filter out words that contain a blocked substring"""
+    if not blocklist:
+        return words
+    
+    return [word for word in words if not blocklist.matches(word)]
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein distance between two strings
+    
+    With a limit, stops early and returns limit + 1 once the distance is
+    known to exceed it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+SOUNDEX_CODES = {char: str(code) for code, letters in enumerate(
+    ["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for char in letters}
+
+def soundex(word):
+    """Four-character Soundex code of a word"""
+    code = word[0].upper()
+    last = SOUNDEX_CODES.get(word[0], "")
+    for char in word[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != "0" and digit != last:
+            code += digit
+        if char not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+def phonetic_key(name):
+    """Phonetic key of a codename: the Soundex code of each word, numbers kept as-is"""
+    words = re.findall(r"[a-z]+|[0-9]+", name.lower())
+    return " ".join(word if word.isdigit() else soundex(word) for word in words)
+
+class SimilarityIndex:
+    """Index of existing names for rejecting confusingly similar candidates
+    
+    Names are compared after normalize_for_blocklist(), so case and
+    separators are ignored. For edit distance each name is cut into
+    max_distance + 1 segments and bucketed by (length, segment number,
+    segment text); a name within max_distance edits must contain one of those
+    segments unchanged near its original position, so a query only looks up
+    a handful of buckets and verifies the few names found there. Phonetic
+    matching is a dictionary lookup on phonetic_key().
+    """
+    
+    def __init__(self, names=(), max_distance=1, phonetic=False):
+        self.max_distance = max_distance
+        self.phonetic = phonetic
+        self.buckets = {}
+        self.short_names = {}
+        self.lengths = set()
+        self.phonetic_keys = {}
+        self.size = 0
+        for name in names:
+            self.add(name)
+    
+    def __len__(self):
+        return self.size
+    
+    def _segments(self, length):
+        """Start and length of each segment of a name of the given length"""
+        pieces = self.max_distance + 1
+        short, extra = divmod(length, pieces)
+        start = 0
+        for piece in range(pieces):
+            size = short + (1 if piece >= pieces - extra else 0)
+            yield start, size
+            start += size
+    
+    def add(self, name):
+        """Add an existing name to the index"""
+        key = normalize_for_blocklist(name)
+        if not key:
+            return
+        self.size += 1
+        if self.phonetic:
+            self.phonetic_keys.setdefault(phonetic_key(name), name)
+        if self.max_distance <= 0:
+            return
+        
+        # Names too short to split are checked directly
+        if len(key) <= self.max_distance:
+            self.short_names.setdefault(key, name)
+            return
+        self.lengths.add(len(key))
+        for piece, (start, size) in enumerate(self._segments(len(key))):
+            self.buckets.setdefault((len(key), piece, key[start:start + size]), {}).setdefault(key, name)
+    
+    def find_similar(self, name):
+        """Return an indexed name that is too close to name, or None"""
+        if self.phonetic:
+            match = self.phonetic_keys.get(phonetic_key(name))
+            if match is not None:
+                return match
+        if self.max_distance <= 0:
+            return None
+        
+        key = normalize_for_blocklist(name)
+        limit = self.max_distance
+        for short_key, short_name in self.short_names.items():
+            if edit_distance(key, short_key, limit) <= limit:
+                return short_name
+        
+        checked = set()
+        for length in range(len(key) - limit, len(key) + limit + 1):
+            if length not in self.lengths:
+                continue
+            for piece, (start, size) in enumerate(self._segments(length)):
+                for offset in range(max(0, start - limit), min(len(key) - size, start + limit) + 1):
+                    bucket = self.buckets.get((length, piece, key[offset:offset + size]))
+                    if not bucket:
+                        continue
+                    for other_key, other_name in bucket.items():
+                        if other_key not in checked:
+                            checked.add(other_key)
+                            if edit_distance(key, other_key, limit) <= limit:
+                                return other_name
+        return None
+
 def load_themed_words(theme):
     """Load adjectives and nouns for a specific theme"""
     theme_dir = "themes"
@@ -59,6 +310,22 @@ def load_themed_words(theme):
     
     return adjectives, nouns
 
+def word_list_files(theme):
+    """Paths of the adjective and noun files for a theme, or the default word lists"""
+    if theme != 'default':
+        return os.path.join("themes", f"{theme}_adj.txt"), os.path.join("themes", f"{theme}_nouns.txt")
+    
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(current_dir, "adjectives.txt"), os.path.join(current_dir, "nouns.txt")
+
+def load_word_lists(theme):
+    """Load adjectives and nouns for a theme, or the default word lists"""
+    if theme != 'default':
+        return load_themed_words(theme)
+    
+    adj_file, noun_file = word_list_files(theme)
+    return load_words(adj_file), load_words(noun_file)
+
 def get_available_themes():
     """Get list of available themes from themes directory"""
     themes = []
@@ -74,9 +341,686 @@ def get_available_themes():
     
     return themes
 
+class WordTable:
+    """Words packed back to back into one UTF-8 blob with an array('I') offset table
+    
+    A list of str pays ~50 bytes of object overhead per word on top of its
+    text; here a word costs its UTF-8 bytes, a 4-byte offset and a 2-byte
+    length, and is decoded on access. Per-length index arrays and
+    per-first-letter index arrays (sorted case-insensitively, for prefix
+    lookups) are built once when the table is packed.
+    
+    Decoding on every draw roughly doubles the time to compose a name, so
+    hot tables (see decode_hot_vocabularies()) also keep a tuple of the
+    decoded words, which word() returns from instead.
+    """
+    
+    def __init__(self, words):
+        encoded = [word.encode('utf-8') for word in words]
+        self.blob = b''.join(encoded)
+        self.offsets = array('I', [0])
+        self.lengths = array('H')
+        for word, data in zip(words, encoded):
+            self.offsets.append(self.offsets[-1] + len(data))
+            self.lengths.append(len(word))
+        
+        self.by_length = {}
+        for number, length in enumerate(self.lengths):
+            self.by_length.setdefault(length, array('I')).append(number)
+        
+        self.by_letter = {}
+        for key, number in sorted((word.lower(), number) for number, word in enumerate(words)):
+            self.by_letter.setdefault(key[:1], array('I')).append(number)
+        self.decoded = None
+    
+    def __len__(self):
+        return len(self.lengths)
+    
+    def word(self, number):
+        """Decode one word"""
+        decoded = self.decoded
+        if decoded is not None:
+            return decoded[number]
+        return self.blob[self.offsets[number]:self.offsets[number + 1]].decode('utf-8')
+    
+    def decode(self):
+        """Keep the decoded words, trading their str overhead for faster access"""
+        if self.decoded is None:
+            self.decoded = tuple(self.blob[start:end].decode('utf-8')
+                                 for start, end in zip(self.offsets, self.offsets[1:]))
+    
+    def release(self):
+        """Drop the decoded words; access decodes from the blob again"""
+        self.decoded = None
+    
+    def key(self, number):
+        """A word's case-insensitive sort key"""
+        return self.word(number).lower()
+
+class WordView:
+    """Read-only sequence over all or some of a WordTable's words
+    
+    A view keeps just an array('I') of word numbers (or nothing, for the whole
+    table), so filtered vocabularies share the table's blob instead of copying
+    words. Views work wherever word lists do: len(), indexing, iteration and
+    random.choice(). They also serve as their own first-letter/prefix index.
+    
+    Views are shared by request threads. Their lazily built lookups are
+    assigned only once complete, so a thread may build one twice but never
+    sees it half-built.
+    """
+    
+    def __init__(self, table, numbers=None):
+        self.table = table
+        self.numbers = numbers
+        self._buckets = None
+        self._members = None
+    
+    def __len__(self):
+        return len(self.table) if self.numbers is None else len(self.numbers)
+    
+    def __getitem__(self, position):
+        decoded = self.table.decoded
+        if self.numbers is not None:
+            number = self.numbers[position]
+            return decoded[number] if decoded is not None else self.table.word(number)
+        if decoded is not None:
+            return decoded[position]
+        if position < 0:
+            position += len(self.table)
+        if not 0 <= position < len(self.table):
+            raise IndexError("word index out of range")
+        return self.table.word(position)
+    
+    def __iter__(self):
+        return map(self.table.word, self.word_numbers())
+    
+    def word_numbers(self):
+        """The table numbers of the words in this view"""
+        return range(len(self.table)) if self.numbers is None else self.numbers
+    
+    def filter(self, predicate):
+        """View of the words for which predicate(word) is true"""
+        return WordView(self.table, array('I', (number for number in self.word_numbers()
+                                                if predicate(self.table.word(number)))))
+    
+    def with_length(self, min_length=0, max_length=0):
+        """View of the words within the length limits, without decoding any words"""
+        if min_length <= 0 and max_length <= 0:
+            return self
+        lengths = self.table.lengths
+        return WordView(self.table, array('I', (number for number in self.word_numbers()
+                                                if lengths[number] >= min_length
+                                                and (max_length <= 0 or lengths[number] <= max_length))))
+    
+    def by_length(self):
+        """Views of this view's words grouped by length"""
+        if self._buckets is None:
+            if self.numbers is None:
+                groups = self.table.by_length
+            else:
+                groups = {}
+                lengths = self.table.lengths
+                for number in self.numbers:
+                    groups.setdefault(lengths[number], array('I')).append(number)
+            self._buckets = {length: WordView(self.table, numbers) for length, numbers in groups.items()}
+        return self._buckets
+    
+    def _contains(self, number):
+        if self.numbers is None:
+            return True
+        if self._members is None:
+            members = bytearray(len(self.table))
+            for member in self.numbers:
+                members[member] = 1
+            self._members = members
+        return self._members[number]
+    
+    @property
+    def letters(self):
+        """Lowercase first letters of this view's words"""
+        return sorted(letter for letter, numbers in self.table.by_letter.items()
+                      if letter and any(self._contains(number) for number in numbers))
+    
+    def starting_with(self, prefix):
+        """View of the words starting with prefix, ignoring case"""
+        prefix = prefix.lower()
+        if not prefix:
+            return self
+        candidates = self.table.by_letter.get(prefix[0], array('I'))
+        start = bisect.bisect_left(candidates, prefix, key=self.table.key)
+        end = bisect.bisect_left(candidates, prefix + "\U0010ffff", start, key=self.table.key)
+        return WordView(self.table, array('I', (number for number in candidates[start:end]
+                                                if self._contains(number))))
+
+def pack_words(words):
+    """Pack a word list into a WordView over a new WordTable"""
+    return WordView(WordTable(words))
+
+def filter_word_lengths(words, min_length=0, max_length=0):
+    """Words within the per-word length limits (WordViews are narrowed without copying words)"""
+    if isinstance(words, WordView):
+        return words.with_length(min_length, max_length)
+    if min_length > 0:
+        words = [word for word in words if len(word) >= min_length]
+    if max_length > 0:
+        words = [word for word in words if len(word) <= max_length]
+    return words
+
+# RFC 1123 labels (hostnames, Kubernetes names, S3 buckets): lowercase ASCII letters, digits and inner hyphens
+SLUG_MAX_LENGTH = 63
+SLUG_WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+def is_slug_word(word):
+    """Whether a word, lowercased, can be part of an RFC 1123 label"""
+    return SLUG_WORD.fullmatch(word.lower()) is not None
+
+def slug_options(separator, max_total_length=0):
+    """Separator and total length limit for slug mode: (separator, max_total_length)
+    
+    Slug words are joined with hyphens (a space separator becomes one) or
+    nothing, and the total length is capped at SLUG_MAX_LENGTH. Raises
+    ValueError for any other separator.
+    """
+    if separator == ' ':
+        separator = '-'
+    if separator not in ('-', ''):
+        raise ValueError("Slugs can only be joined with '-' or no separator")
+    if max_total_length <= 0 or max_total_length > SLUG_MAX_LENGTH:
+        max_total_length = SLUG_MAX_LENGTH
+    return separator, max_total_length
+
+# Word slots used by each pattern, in output order
+PATTERN_SLOTS = {
+    "adj-noun": ("adj", "noun"),
+    "noun-noun": ("noun", "noun"),
+    "adj-adj-noun": ("adj", "adj", "noun"),
+    "noun-adj": ("noun", "adj"),
+    "adj-noun-number": ("adj", "noun", "number"),
+}
+
+# Values used for the number slot of the adj-noun-number pattern
+NUMBER_SLOT = [str(number) for number in range(1, 1000)]
+
+class TotalLengthSampler:
+    """Uniform sampler over combinations whose total length falls in a window
+    
+    Each slot's words are bucketed by length and the buckets are convolved
+    into count tables (suffix[j][r] = ways to fill slots j.. with r letters).
+    A draw picks the total length, then each slot's word length, weighted by
+    those counts, then a word from the bucket, so every qualifying combination
+    is equally likely and nothing is generated and thrown away.
+    """
+    
+    def __init__(self, slot_pools, separator_length=1, min_total=0, max_total=0):
+        self.buckets = []
+        for pool in slot_pools:
+            if isinstance(pool, WordView):
+                self.buckets.append(pool.by_length())
+                continue
+            buckets = {}
+            for word in pool:
+                buckets.setdefault(len(word), []).append(word)
+            self.buckets.append(buckets)
+        
+        slot_count = len(self.buckets)
+        self.suffix = [None] * slot_count + [{0: 1}]
+        for j in reversed(range(slot_count)):
+            table = {}
+            for length, words in self.buckets[j].items():
+                for rest, ways in self.suffix[j + 1].items():
+                    table[length + rest] = table.get(length + rest, 0) + len(words) * ways
+            self.suffix[j] = table
+        
+        # Separators are a fixed part of the total length
+        fixed = separator_length * (slot_count - 1)
+        self.totals = sorted(total for total in self.suffix[0]
+                             if total + fixed >= min_total and (max_total <= 0 or total + fixed <= max_total))
+        self.cumulative = []
+        self.size = 0
+        for total in self.totals:
+            self.size += self.suffix[0][total]
+            self.cumulative.append(self.size)
+        self._length_tables = {}
+    
+    def _pick(self, cumulative, rng):
+        return bisect.bisect_right(cumulative, rng.randrange(cumulative[-1]))
+    
+    def _lengths_for(self, slot, remaining):
+        key = (slot, remaining)
+        if key not in self._length_tables:
+            lengths, cumulative, running = [], [], 0
+            for length, words in self.buckets[slot].items():
+                ways = len(words) * self.suffix[slot + 1].get(remaining - length, 0)
+                if ways:
+                    running += ways
+                    lengths.append(length)
+                    cumulative.append(running)
+            self._length_tables[key] = (lengths, cumulative)
+        return self._length_tables[key]
+    
+    def sample(self, rng=random):
+        """Draw one combination as a list of words, one per slot"""
+        remaining = self.totals[self._pick(self.cumulative, rng)]
+        parts = []
+        for slot in range(len(self.buckets)):
+            lengths, cumulative = self._lengths_for(slot, remaining)
+            length = lengths[self._pick(cumulative, rng)]
+            parts.append(rng.choice(self.buckets[slot][length]))
+            remaining -= length
+        return parts
+
+class PrefixIndex:
+    """Words sorted case-insensitively for first-letter and prefix lookups"""
+    
+    def __init__(self, words):
+        pairs = sorted((word.lower(), word) for word in words)
+        self.keys = [key for key, _ in pairs]
+        self.words = [word for _, word in pairs]
+        self.letters = sorted({key[:1] for key in self.keys if key})
+    
+    def starting_with(self, prefix):
+        """All words starting with prefix, ignoring case"""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\U0010ffff", start)
+        return self.words[start:end]
+
+class CombinationSampler:
+    """Uniform sampler over several disjoint sets of slot pools
+    
+    Each set gets its own TotalLengthSampler and sets are drawn in proportion
+    to how many combinations they hold, so every combination across all sets
+    is equally likely.
+    """
+    
+    def __init__(self, alternatives, separator_length=1, min_total=0, max_total=0):
+        self.samplers = []
+        self.cumulative = []
+        self.size = 0
+        for pools in alternatives:
+            sampler = TotalLengthSampler(pools, separator_length, min_total, max_total)
+            if sampler.size:
+                self.size += sampler.size
+                self.samplers.append(sampler)
+                self.cumulative.append(self.size)
+    
+    def sample(self, rng=random):
+        """Draw one combination as a list of words, one per slot"""
+        index = bisect.bisect_right(self.cumulative, rng.randrange(self.size))
+        return self.samplers[index].sample(rng)
+
+def letter_constrained_pools(slots, indexes, alliterate=False, initials=None, prefix=None):
+    """Slot pools that satisfy letter constraints, as a list of disjoint alternatives
+    
+    - alliterate: every word starts with the same letter (one alternative per letter)
+    - initials: word initials spell these letters, e.g. "B.F." (numbers are skipped)
+    - prefix: the first word starts with this prefix
+    """
+    word_slots = [i for i, slot in enumerate(slots) if slot != "number"]
+    required = {i: "" for i in word_slots}
+    
+    if initials:
+        letters = re.findall(r"[a-z]", initials.lower())
+        if len(letters) != len(word_slots):
+            raise ValueError(f"Initials '{initials}' need exactly {len(word_slots)} letters for this pattern")
+        for i, letter in zip(word_slots, letters):
+            required[i] = letter
+    
+    if prefix:
+        first = word_slots[0]
+        prefix = prefix.lower()
+        if not prefix.startswith(required[first]):
+            return []
+        required[first] = prefix
+    
+    if alliterate:
+        fixed = {required[i][0] for i in word_slots if required[i]}
+        if len(fixed) > 1:
+            return []
+        letters = fixed or set.intersection(*(set(indexes[slots[i]].letters) for i in word_slots))
+    else:
+        letters = {""}
+    
+    alternatives = []
+    for letter in sorted(letters):
+        pools = []
+        for i, slot in enumerate(slots):
+            if slot == "number":
+                pools.append(NUMBER_SLOT)
+            else:
+                pools.append(indexes[slot].starting_with(required[i] or letter))
+        alternatives.append(pools)
+    return alternatives
+
+def build_sampler(adjectives, nouns, pattern, separator, min_total_length=0, max_total_length=0,
+                  alliterate=False, initials=None, prefix=None, word_indexes=None, word_filter=None):
+    """Build a CombinationSampler for total length and letter constraints, or None if there are none
+    
+    word_indexes is an optional (adjective, noun) pair of prebuilt PrefixIndex
+    objects or WordViews; word_filter then drops looked-up words the caller
+    has filtered out of adjectives and nouns since the indexes were built.
+    WordViews are used as their own index.
+    """
+    if not (min_total_length > 0 or max_total_length > 0 or alliterate or initials or prefix):
+        return None
+    
+    slots = PATTERN_SLOTS.get(pattern, PATTERN_SLOTS["adj-noun"])
+    if alliterate or initials or prefix:
+        if word_indexes is None:
+            word_indexes = tuple(words if isinstance(words, WordView) else PrefixIndex(words)
+                                 for words in (adjectives, nouns))
+            word_filter = None
+        indexes = {"adj": word_indexes[0], "noun": word_indexes[1]}
+        alternatives = letter_constrained_pools(slots, indexes, alliterate, initials, prefix)
+        if word_filter:
+            alternatives = [[pool if pool is NUMBER_SLOT
+                             else pool.filter(word_filter) if isinstance(pool, WordView)
+                             else [word for word in pool if word_filter(word)]
+                             for pool in pools] for pools in alternatives]
+    else:
+        pools = {"adj": adjectives, "noun": nouns, "number": NUMBER_SLOT}
+        alternatives = [[pools[slot] for slot in slots]]
+    
+    return CombinationSampler(alternatives, len(separator), min_total_length, max_total_length)
+
+class AliasTable:
+    """Walker/Vose alias table for constant-time weighted draws"""
+    
+    def __init__(self, items, weights):
+        self.items = items if isinstance(items, WordView) else list(items)
+        count = len(self.items)
+        total = float(sum(weights))
+        scaled = [weight * count / total for weight in weights]
+        self.probability = array('d', [1.0]) * count
+        self.alias = array('I', range(count))
+        
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.probability[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def choice(self, rng=random):
+        """Draw one item in proportion to its weight"""
+        index = rng.randrange(len(self.items))
+        if rng.random() < self.probability[index]:
+            return self.items[index]
+        return self.items[self.alias[index]]
+
+# Draws are 64-bit words; larger ranges (e.g. huge sampler sizes) read more bytes
+SECURE_WORD_RANGE = 1 << 64
+
+# stream() fills and filters a whole block per sequence, which only pays off
+# for calls drawing this many codenames; smaller ones pick word by word
+SECURE_STREAM_MIN_COUNT = 1024
+
+class SecureRandom:
+    """Cryptographically secure random source that reads os.urandom in large blocks
+    
+    Provides the randrange()/randint()/choice()/random() subset of the random
+    module used by generate_codename(), the samplers and AliasTable. Words
+    are mapped to a range by rejection sampling: a word at or above the
+    largest multiple of n below 2**64 is discarded, so no index is favored.
+    stream() turns whole blocks into picks from one sequence at a time,
+    for large counts (see SECURE_STREAM_MIN_COUNT).
+    """
+    
+    BLOCK_WORDS = 8192
+    
+    def __init__(self, block_words=BLOCK_WORDS):
+        self.block_words = block_words
+        self._words = iter(())
+    
+    def _block(self):
+        words = array('Q')
+        words.frombytes(os.urandom(words.itemsize * self.block_words))
+        return words
+    
+    def _word(self):
+        for word in self._words:
+            return word
+        self._words = iter(self._block())
+        return next(self._words)
+    
+    def randrange(self, n):
+        """Unbiased integer in [0, n)"""
+        if n <= 0:
+            raise ValueError("empty range for randrange()")
+        if n > SECURE_WORD_RANGE:
+            size = (n.bit_length() + 7) // 8
+            excess = 8 * size - n.bit_length()
+            while True:
+                value = int.from_bytes(os.urandom(size), 'big') >> excess
+                if value < n:
+                    return value
+        limit = SECURE_WORD_RANGE - SECURE_WORD_RANGE % n
+        while True:
+            word = self._word()
+            if word < limit:
+                return word % n
+    
+    def randint(self, a, b):
+        """Unbiased integer in [a, b]"""
+        return a + self.randrange(b - a + 1)
+    
+    def choice(self, seq):
+        """Unbiased item of a non-empty sequence"""
+        return seq[self.randrange(len(seq))]
+    
+    def random(self):
+        """Float in [0, 1) with 53 random bits"""
+        return (self._word() >> 11) * (1.0 / (1 << 53))
+    
+    def stream(self, seq):
+        """Endless unbiased picks from a non-empty sequence, a block of words at a time"""
+        n = len(seq)
+        limit = SECURE_WORD_RANGE - SECURE_WORD_RANGE % n
+        while True:
+            yield from [seq[word % n] for word in self._block() if word < limit]
+
+# Each request and job thread draws from its own generators (see thread_rng())
+thread_state = threading.local()
+
+def thread_rng(secure=False):
+    """The calling thread's own random source: a Random seeded from os.urandom, or a SecureRandom
+    
+    Threads never share generator state, so draws take no lock and don't
+    contend on the random module's global instance. That instance is
+    thread-safe only because of the GIL, and on a free-threaded build every
+    draw from it locks. A thread's SecureRandom also keeps its buffered
+    block across requests.
+    """
+    name = 'secure_rng' if secure else 'rng'
+    rng = getattr(thread_state, name, None)
+    if rng is None:
+        rng = SecureRandom() if secure else random.Random()
+        setattr(thread_state, name, rng)
+    return rng
+
+def parse_theme_blend(spec):
+    """Parse a theme blend such as "cyberpunk:0.6,ocean:0.4" into (theme, weight) pairs
+    
+    A plain theme name is a blend of one theme with weight 1.
+    """
+    blend = []
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition(':')
+        name = name.strip()
+        if not name:
+            raise ValueError(f"Invalid theme blend '{spec}'")
+        try:
+            weight = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight for theme '{name}' in '{spec}'")
+        if weight <= 0:
+            raise ValueError(f"Weight for theme '{name}' must be positive")
+        blend.append((name, weight))
+    return blend
+
+def blend_word_lists(word_lists):
+    """Merge (words, word_weights, theme_weight) lists into words and a word -> weight dict
+    
+    Each list's word weights are normalized to sum to its theme weight, so a
+    theme's share of draws doesn't depend on how many words it has. Words in
+    several lists add up their weights.
+    """
+    weights = {}
+    for words, word_weights, theme_weight in word_lists:
+        total = sum(word_weights.get(word, 1.0) for word in words)
+        for word in words:
+            weights[word] = weights.get(word, 0.0) + theme_weight * word_weights.get(word, 1.0) / total
+    return list(weights), weights
+
+# Ways to fill the number slot of adj-noun-number, by length (1-9, 10-99, 100-999)
+NUMBER_SLOT_LENGTHS = {1: 9, 2: 90, 3: 900}
+
+# Collision risks reported with how many codenames can be issued before reaching them
+COLLISION_RISKS = (0.001, 0.01, 0.5)
+
+def length_histogram(words, weights=None):
+    """Distinct words (ignoring case) by length: {length: [words, weight sum, sum of squared weights]}
+    
+    A word listed more than once is drawn with its combined weight (1 per
+    listing without weights), which the squared weights account for.
+    """
+    combined = {}
+    for word in words:
+        weight = weights.get(word, 1.0) if weights else 1.0
+        entry = combined.get(word.lower())
+        if entry is None:
+            combined[word.lower()] = [len(word), weight]
+        else:
+            entry[1] += weight
+    histogram = {}
+    for length, weight in combined.values():
+        entry = histogram.setdefault(length, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += weight
+        entry[2] += weight * weight
+    return histogram
+
+def combination_stats(histograms, pattern, separator_length=1, min_length=0, max_length=0,
+                      min_total_length=0, max_total_length=0):
+    """Distinct codenames a pattern can produce within length limits, from (adjective, noun) length histograms
+    
+    Returns (space, effective_space). space is exact: the slots' histograms
+    are convolved into counts by total length, and the lengths outside the
+    total length window are left out. effective_space is 1 / (chance that two
+    draws are the same codename). It equals space for uniform draws (and for
+    total length limits, which sample uniformly), and is smaller for weighted
+    words.
+    """
+    def within(length):
+        return (min_length <= 0 or length >= min_length) and (max_length <= 0 or length <= max_length)
+    
+    tables = {
+        "adj": {length: entry for length, entry in histograms[0].items() if within(length)},
+        "noun": {length: entry for length, entry in histograms[1].items() if within(length)},
+        "number": {length: [ways, ways, ways] for length, ways in NUMBER_SLOT_LENGTHS.items()},
+    }
+    slots = PATTERN_SLOTS[pattern]
+    totals = {0: 1}
+    for slot in slots:
+        step = {}
+        for total, ways in totals.items():
+            for length, entry in tables[slot].items():
+                step[total + length] = step.get(total + length, 0) + ways * entry[0]
+        totals = step
+    
+    fixed = separator_length * (len(slots) - 1)
+    space = sum(ways for total, ways in totals.items()
+                if total + fixed >= min_total_length and (max_total_length <= 0 or total + fixed <= max_total_length))
+    if min_total_length > 0 or max_total_length > 0 or not space:
+        return space, float(space)
+    
+    effective_space = 1.0
+    for slot in slots:
+        weight_sum = sum(entry[1] for entry in tables[slot].values())
+        weight_squares = sum(entry[2] for entry in tables[slot].values())
+        effective_space *= weight_sum * weight_sum / weight_squares
+    return space, effective_space
+
+def collision_probability(space, issued):
+    """Birthday-bound chance that issued draws from space equally likely codenames include a repeat"""
+    if issued < 2:
+        return 0.0
+    if issued > space:
+        return 1.0
+    if issued < space * 1e-3:
+        # log P(no repeat) = sum of log(1 - i/space) for i < issued, as a power series in i/space
+        n = issued - 1
+        first = n * (n + 1) / 2
+        second = n * (n + 1) * (2 * n + 1) / 6
+        third = first * first
+        log_unique = -(first / space + second / (2 * space ** 2) + third / (3 * space ** 3))
+    else:
+        log_unique = math.lgamma(space + 1) - math.lgamma(space - issued + 1) - issued * math.log(space)
+    return min(1.0, -math.expm1(log_unique))
+
+def issued_at_risk(space, risk):
+    """Most codenames that can be issued from space before the chance of a repeat exceeds risk"""
+    low, high = 1, max(1, int(space))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if collision_probability(space, middle) <= risk:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def codename_stats(histograms, pattern, separator_length=1, min_length=0, max_length=0,
+                   min_total_length=0, max_total_length=0, issued=1000):
+    """Combination space and collision risk for issuing that many codenames, without generating any"""
+    space, effective_space = combination_stats(histograms, pattern, separator_length, min_length, max_length,
+                                               min_total_length, max_total_length)
+    return {
+        "space": space,
+        "effective_space": effective_space,
+        "issued": issued,
+        "collision_probability": collision_probability(effective_space, issued) if space else 1.0,
+        "expected_repeated_pairs": issued * (issued - 1) / 2 / effective_space if space else None,
+        "issued_at_risk": {f"{risk:g}": issued_at_risk(effective_space, risk) if space else 0
+                           for risk in COLLISION_RISKS},
+    }
+
 def generate_codename(adjectives, nouns, count=1, separator=' ', exclusions=None,
-                     pattern="adj-noun", case_style="title", min_length=0, max_length=0):
-    """Generate random codenames by combining adjectives and nouns with various patterns and formats"""
+                     pattern="adj-noun", case_style="title", min_length=0, max_length=0,
+                     min_total_length=0, max_total_length=0, blocklist=None,
+                     similarity_index=None, alliterate=False, initials=None, prefix=None, word_indexes=None,
+                     adjective_weights=None, noun_weights=None, alias_tables=None, secure=False,
+                     stream=False):
+    """Generate random codenames by combining adjectives and nouns with various patterns and formats
+    
+    min_length/max_length limit each word; min_total_length/max_total_length
+    limit the whole codename including separators. Combinations that contain
+    a substring from the optional blocklist matcher once joined, or that are
+    too close to a name in the optional similarity index, are skipped.
+    alliterate/initials/prefix restrict word initials (see
+    letter_constrained_pools()); word_indexes are the vocabulary's prebuilt
+    PrefixIndex or WordView pair, used instead of indexing the word lists on
+    every call.
+    adjective_weights/noun_weights are optional word -> weight dicts; words are
+    then drawn from alias tables, the vocabulary's prebuilt alias_tables when
+    no words were filtered out by this call. Length and letter constraints
+    sample uniformly.
+    
+    secure draws every word and number from a SecureRandom instead of a
+    Mersenne Twister, whose output can be predicted. Either comes from
+    thread_rng(), and nothing shared is written, so concurrent calls on one
+    vocabulary need no locking.
+    
+    stream returns an iterator that draws each codename as it is consumed
+    instead of a list. Problems with the words or constraints are still
+    returned as an error dict up front; hitting the rejection limit part
+    way through raises ValueError from the iterator.
+    """
     # Filter out excluded words if needed
     if exclusions:
         adjectives = filter_excluded_words(adjectives, exclusions)
@@ -89,13 +1033,8 @@ def generate_codename(adjectives, nouns, count=1, separator=' ', exclusions=None
         return {"error": "No valid nouns available after applying exclusions"}
     
     # Filter by length constraints if specified
-    if min_length > 0:
-        adjectives = [adj for adj in adjectives if len(adj) >= min_length]
-        nouns = [noun for noun in nouns if len(noun) >= min_length]
-    
-    if max_length > 0:
-        adjectives = [adj for adj in adjectives if len(adj) <= max_length]
-        nouns = [noun for noun in nouns if len(noun) <= max_length]
+    adjectives = filter_word_lengths(adjectives, min_length, max_length)
+    nouns = filter_word_lengths(nouns, min_length, max_length)
     
     if not adjectives:
         return {"error": "No adjectives meet the length criteria"}
@@ -103,60 +1042,1354 @@ def generate_codename(adjectives, nouns, count=1, separator=' ', exclusions=None
     if not nouns:
         return {"error": "No nouns meet the length criteria"}
     
-    codenames = []
-    for _ in range(count):
-        # Generate based on pattern
-        if pattern == "adj-noun":
-            adj = random.choice(adjectives)
-            noun = random.choice(nouns)
-            raw_name = f"{adj}{separator}{noun}"
-        elif pattern == "noun-noun":
-            noun1 = random.choice(nouns)
-            noun2 = random.choice(nouns)
-            raw_name = f"{noun1}{separator}{noun2}"
-        elif pattern == "adj-adj-noun":
-            adj1 = random.choice(adjectives)
-            adj2 = random.choice(adjectives)
-            noun = random.choice(nouns)
-            raw_name = f"{adj1}{separator}{adj2}{separator}{noun}"
-        elif pattern == "noun-adj":
-            noun = random.choice(nouns)
-            adj = random.choice(adjectives)
-            raw_name = f"{noun}{separator}{adj}"
-        elif pattern == "adj-noun-number":
-            adj = random.choice(adjectives)
-            noun = random.choice(nouns)
-            number = random.randint(1, 999)
-            raw_name = f"{adj}{separator}{noun}{separator}{number}"
+    # Words looked up in prebuilt word_indexes still have to pass this call's filters
+    def word_filter(word):
+        return ((not exclusions or word.lower() not in exclusions)
+                and (min_length <= 0 or len(word) >= min_length)
+                and (max_length <= 0 or len(word) <= max_length))
+    
+    # Sample exactly from the combinations that fit the length and letter constraints
+    try:
+        sampler = build_sampler(adjectives, nouns, pattern, separator, min_total_length, max_total_length,
+                                alliterate, initials, prefix,
+                                word_indexes=word_indexes, word_filter=word_filter)
+    except ValueError as e:
+        return {"error": str(e)}
+    if sampler is not None and not sampler.size:
+        return {"error": "No codenames fit the total length and letter constraints"}
+    
+    # Weighted vocabularies draw from alias tables, everything else uniformly
+    rng = thread_rng(secure)
+    choose_adjective = functools.partial(rng.choice, adjectives)
+    choose_noun = functools.partial(rng.choice, nouns)
+    if secure and count >= SECURE_STREAM_MIN_COUNT:
+        choose_adjective = functools.partial(next, rng.stream(adjectives))
+        choose_noun = functools.partial(next, rng.stream(nouns))
+    if adjective_weights is not None or noun_weights is not None:
+        if alias_tables and len(alias_tables[0]) == len(adjectives) and len(alias_tables[1]) == len(nouns):
+            adjective_table, noun_table = alias_tables
         else:
-            # Default to adj-noun if pattern is not recognized
-            adj = random.choice(adjectives)
-            noun = random.choice(nouns)
-            raw_name = f"{adj}{separator}{noun}"
-        
-        # Apply case style
-        if case_style == "upper":
-            formatted_name = raw_name.upper()
-        elif case_style == "lower":
-            formatted_name = raw_name.lower()
-        elif case_style == "sentence":
-            formatted_name = raw_name.capitalize()
-        else:  # Default to title case
-            if separator == " ":
-                formatted_name = " ".join(word.capitalize() for word in raw_name.split())
+            adjective_table = AliasTable(adjectives, [(adjective_weights or {}).get(word, 1.0)
+                                                      for word in adjectives])
+            noun_table = AliasTable(nouns, [(noun_weights or {}).get(word, 1.0) for word in nouns])
+        choose_adjective = functools.partial(adjective_table.choice, rng)
+        choose_noun = functools.partial(noun_table.choice, rng)
+    
+    def codenames():
+        produced = rejected = 0
+        while produced < count:
+            # Generate based on pattern
+            if sampler:
+                raw_name = separator.join(sampler.sample(rng))
+            elif pattern == "adj-noun":
+                adj = choose_adjective()
+                noun = choose_noun()
+                raw_name = f"{adj}{separator}{noun}"
+            elif pattern == "noun-noun":
+                noun1 = choose_noun()
+                noun2 = choose_noun()
+                raw_name = f"{noun1}{separator}{noun2}"
+            elif pattern == "adj-adj-noun":
+                adj1 = choose_adjective()
+                adj2 = choose_adjective()
+                noun = choose_noun()
+                raw_name = f"{adj1}{separator}{adj2}{separator}{noun}"
+            elif pattern == "noun-adj":
+                noun = choose_noun()
+                adj = choose_adjective()
+                raw_name = f"{noun}{separator}{adj}"
+            elif pattern == "adj-noun-number":
+                adj = choose_adjective()
+                noun = choose_noun()
+                number = rng.randint(1, 999)
+                raw_name = f"{adj}{separator}{noun}{separator}{number}"
             else:
-                formatted_name = separator.join(word.capitalize() for word in raw_name.split(separator))
+                # Default to adj-noun if pattern is not recognized
+                adj = choose_adjective()
+                noun = choose_noun()
+                raw_name = f"{adj}{separator}{noun}"
+            
+            # Reject combinations that only form a blocked substring once joined,
+            # or that are confusingly close to a favorite or issued name
+            if (blocklist and blocklist.matches(raw_name)) or (
+                    similarity_index and similarity_index.find_similar(raw_name) is not None):
+                rejected += 1
+                if rejected > max(1000, 10 * count):
+                    raise ValueError("Too many generated codenames were rejected by the blocklist or similarity filter")
+                continue
+            
+            # Apply case style
+            if case_style == "upper":
+                formatted_name = raw_name.upper()
+            elif case_style == "lower":
+                formatted_name = raw_name.lower()
+            elif case_style == "sentence":
+                formatted_name = raw_name.capitalize()
+            else:  # Default to title case
+                if separator == " ":
+                    formatted_name = " ".join(word.capitalize() for word in raw_name.split())
+                else:
+                    formatted_name = separator.join(word.capitalize() for word in raw_name.split(separator))
+            
+            yield formatted_name
+            produced += 1
+    
+    if stream:
+        return codenames()
+    try:
+        return list(codenames())
+    except ValueError as e:
+        return {"error": str(e)}
+
+# -------------------- Vocabulary Cache ---------------------
+
+EXCLUSIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exclusions.txt")
+BLOCKLIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blocklist.txt")
+FAVORITES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "favorites.txt")
+ISSUED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "issued.txt")
+EXCLUSION_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exclusions")
+MAX_REJECT_DISTANCE = 3
+
+VOCABULARY_CACHE_SIZE = int(os.environ.get('SPYSPEAK_VOCABULARY_CACHE_SIZE', 64))
+# Besides the default vocabulary, this many of the most recently used keep decoded words
+DECODED_VOCABULARIES = int(os.environ.get('SPYSPEAK_DECODED_VOCABULARIES', 8))
+FILTERED_VOCABULARY_CACHE_SIZE = int(os.environ.get('SPYSPEAK_FILTERED_VOCABULARY_CACHE_SIZE', 256))
+
+vocabulary_cache = OrderedDict()
+filtered_vocabulary_cache = OrderedDict()
+similarity_cache = {}
+vocabulary_lock = threading.Lock()
+
+def file_stamp(paths):
+    """Modification times of a set of files, None for files that don't exist"""
+    stamp = []
+    for path in paths:
+        try:
+            stamp.append(os.path.getmtime(path))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def load_blended_word_lists(blend):
+    """Load and merge the word lists of a parsed theme blend
+    
+    Returns adjectives, nouns, adjective_weights and noun_weights; the
+    weights are None for a single theme without a weight column.
+    """
+    adjective_lists, noun_lists = [], []
+    for theme, weight in blend:
+        adj_file, noun_file = word_list_files(theme)
+        adjectives, nouns = load_word_lists(theme)
+        if not adjectives or not nouns:
+            return [], [], None, None
+        adjective_lists.append((adjectives, load_word_weights(adj_file), weight))
+        noun_lists.append((nouns, load_word_weights(noun_file), weight))
+    
+    if len(adjective_lists) == 1 and not adjective_lists[0][1] and not noun_lists[0][1]:
+        return adjective_lists[0][0], noun_lists[0][0], None, None
+    
+    adjectives, adjective_weights = blend_word_lists(adjective_lists)
+    nouns, noun_weights = blend_word_lists(noun_lists)
+    return adjectives, nouns, adjective_weights, noun_weights
+
+def slug_vocabulary(adjectives, nouns, adjective_weights=None, noun_weights=None):
+    """The words of a vocabulary that are valid in an RFC 1123 label, for slug=true
+    
+    Returns the entries that replace a vocabulary's own for slug requests:
+    WordViews of the slug-valid words (their own prefix indexes), their
+    length histograms and, for weighted vocabularies, alias tables over them.
+    """
+    adjectives = adjectives.filter(is_slug_word)
+    nouns = nouns.filter(is_slug_word)
+    alias_tables = None
+    if adjective_weights is not None and adjectives and nouns:
+        alias_tables = (AliasTable(adjectives, [adjective_weights.get(word, 1.0) for word in adjectives]),
+                        AliasTable(nouns, [noun_weights.get(word, 1.0) for word in nouns]))
+    return MappingProxyType({
+        'adjectives': adjectives, 'nouns': nouns, 'alias_tables': alias_tables, 'indexes': (adjectives, nouns),
+        'histograms': (length_histogram(adjectives, adjective_weights), length_histogram(nouns, noun_weights))})
+
+def vocabulary_tables(vocabulary):
+    """The WordTables of a vocabulary"""
+    return (vocabulary['adjectives'].table, vocabulary['nouns'].table)
+
+def decode_hot_vocabularies(vocabulary):
+    """Decode the tables of a vocabulary that was just used, releasing those that went cold
+    
+    Called with vocabulary_lock held and vocabulary at the recent end of the
+    LRU. The default vocabulary and the DECODED_VOCABULARIES most recently
+    used ones keep decoded words; colder ones fall back to decoding on
+    access. Only a vocabulary that isn't decoded yet pays for the LRU walk.
+    """
+    if all(table.decoded is not None for table in vocabulary_tables(vocabulary)):
+        return
+    hot = 0
+    for cached in reversed(vocabulary_cache.values()):
+        if cached['theme'] == 'default:1' or hot < DECODED_VOCABULARIES:
+            hot += cached['theme'] != 'default:1'
+            for table in vocabulary_tables(cached):
+                table.decode()
+        else:
+            for table in vocabulary_tables(cached):
+                table.release()
+
+def get_vocabulary(theme):
+    """Return a theme's (or theme blend's) compiled vocabulary, cached until a source file changes
+    
+    Exclusions and the blocklist are applied, the words packed into compact
+    WordTables (which double as first-letter/prefix indexes) and weighted
+    alias tables built, once when the vocabulary is loaded; requests then
+    only pay for the composed-name blocklist check, bucket lookups and
+    constant-time draws. Length histograms (for /api/stats), the
+    slug-valid subset (see slug_vocabulary()) and the client vocabulary
+    (see client_vocabulary()) are compiled at the same time. Vocabularies
+    are cached by normalized blend spec in a bounded LRU.
+    
+    The result is an immutable snapshot (a read-only mapping), shared by
+    every request and job thread without locking; a changed source file
+    produces a new snapshot rather than altering this one.
+    """
+    blend = parse_theme_blend(theme)
+    key = ','.join(f"{name}:{weight:g}" for name, weight in blend)
+    paths = tuple(path for name, _ in blend for path in word_list_files(name)) + (EXCLUSIONS_FILE, BLOCKLIST_FILE)
+    stamp = file_stamp(paths)
+    
+    with vocabulary_lock:
+        cached = vocabulary_cache.get(key)
+        if cached and cached['stamp'] == stamp:
+            vocabulary_cache.move_to_end(key)
+            decode_hot_vocabularies(cached)
+            return cached
+    
+    adjectives, nouns, adjective_weights, noun_weights = load_blended_word_lists(blend)
+    exclusions = load_exclusions(EXCLUSIONS_FILE)
+    blocklist = load_blocklist(BLOCKLIST_FILE)
+    
+    adjectives = pack_words(filter_blocked_words(filter_excluded_words(adjectives, exclusions), blocklist))
+    nouns = pack_words(filter_blocked_words(filter_excluded_words(nouns, exclusions), blocklist))
+    alias_tables = None
+    if adjective_weights is not None and adjectives and nouns:
+        alias_tables = (AliasTable(adjectives, [adjective_weights.get(word, 1.0) for word in adjectives]),
+                        AliasTable(nouns, [noun_weights.get(word, 1.0) for word in nouns]))
+    vocabulary = {
+        'theme': key,
+        'adjectives': adjectives,
+        'nouns': nouns,
+        'adjective_weights': adjective_weights,
+        'noun_weights': noun_weights,
+        'alias_tables': alias_tables,
+        'indexes': (adjectives, nouns),
+        'histograms': (length_histogram(adjectives, adjective_weights), length_histogram(nouns, noun_weights)),
+        'slug': slug_vocabulary(adjectives, nouns, adjective_weights, noun_weights),
+        'blocklist': blocklist,
+        'stamp': stamp,
+    }
+    vocabulary['client'] = client_vocabulary(vocabulary)
+    vocabulary = MappingProxyType(vocabulary)
+    
+    # Unknown themes are not cached so arbitrary theme names can't grow the cache
+    if all(value is not None for value in stamp[:-2]):
+        with vocabulary_lock:
+            vocabulary_cache[key] = vocabulary
+            vocabulary_cache.move_to_end(key)
+            while len(vocabulary_cache) > VOCABULARY_CACHE_SIZE:
+                vocabulary_cache.popitem(last=False)
+            decode_hot_vocabularies(vocabulary)
+    return vocabulary
+
+def parse_exclusion_list(value):
+    """Normalize request exclusions into a frozenset of lowercase words
+    
+    value may be a comma-separated string or a list of them (repeated query
+    parameters or a JSON array).
+    """
+    if not value:
+        return frozenset()
+    if isinstance(value, str):
+        value = [value]
+    return frozenset(word.strip().lower() for item in value for word in str(item).split(',') if word.strip())
+
+def exclusion_profile_file(profile):
+    """Path of a named exclusion profile, exclusions/<profile>.txt"""
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", profile):
+        raise ValueError(f"Invalid exclusion profile '{profile}'")
+    path = os.path.join(EXCLUSION_PROFILE_DIR, f"{profile}.txt")
+    if not os.path.exists(path):
+        raise ValueError(f"Exclusion profile '{profile}' not found")
+    return path
+
+def get_filtered_vocabulary(theme, exclusions=frozenset(), profile=None):
+    """Return a theme's vocabulary with per-request exclusions applied, cached per exclusion set
+    
+    exclusions is a set of lowercase words (see parse_exclusion_list()) and
+    profile the name of an exclusion profile file; both come on top of the
+    global exclusions.txt. Each distinct combination is compiled once into
+    WordViews over the cached vocabulary's word tables (plus alias tables
+    for weighted vocabularies) and kept in a bounded LRU, so repeat requests
+    with the same exclusions only pay for a dict lookup. Like the vocabulary
+    itself, it is a read-only snapshot.
+    """
+    vocabulary = get_vocabulary(theme)
+    if not exclusions and not profile:
+        return vocabulary
+    
+    profile_file = exclusion_profile_file(profile) if profile else None
+    key = (vocabulary['theme'], vocabulary['stamp'], profile,
+           file_stamp([profile_file]) if profile_file else None, exclusions)
+    with vocabulary_lock:
+        cached = filtered_vocabulary_cache.get(key)
+        if cached is not None:
+            filtered_vocabulary_cache.move_to_end(key)
+            return cached
+    
+    if profile_file:
+        exclusions = exclusions | frozenset(load_exclusions(profile_file))
+    adjectives = vocabulary['adjectives'].filter(lambda word: word.lower() not in exclusions)
+    nouns = vocabulary['nouns'].filter(lambda word: word.lower() not in exclusions)
+    alias_tables = None
+    if vocabulary['alias_tables'] is not None and adjectives and nouns:
+        adjective_weights, noun_weights = vocabulary['adjective_weights'], vocabulary['noun_weights']
+        alias_tables = (AliasTable(adjectives, [adjective_weights.get(word, 1.0) for word in adjectives]),
+                        AliasTable(nouns, [noun_weights.get(word, 1.0) for word in nouns]))
+    filtered = dict(vocabulary, adjectives=adjectives, nouns=nouns, alias_tables=alias_tables,
+                    indexes=(adjectives, nouns),
+                    histograms=(length_histogram(adjectives, vocabulary['adjective_weights']),
+                                length_histogram(nouns, vocabulary['noun_weights'])),
+                    slug=slug_vocabulary(adjectives, nouns, vocabulary['adjective_weights'],
+                                         vocabulary['noun_weights']))
+    filtered.pop('client', None)
+    filtered = MappingProxyType(filtered)
+    
+    # Only filters of cached vocabularies are cached, so unknown themes can't grow the cache
+    with vocabulary_lock:
+        if vocabulary_cache.get(vocabulary['theme']) is vocabulary:
+            filtered_vocabulary_cache[key] = filtered
+            filtered_vocabulary_cache.move_to_end(key)
+            while len(filtered_vocabulary_cache) > FILTERED_VOCABULARY_CACHE_SIZE:
+                filtered_vocabulary_cache.popitem(last=False)
+    return filtered
+
+# Compiled client vocabularies never change under their content hash, so browsers may keep them for a year
+CLIENT_VOCABULARY_MAX_AGE = 365 * 24 * 3600
+
+def client_vocabulary(vocabulary):
+    """Compiled vocabulary for client-side generation: (content hash, JSON body)
+    
+    The body holds the filtered word lists as newline-joined strings, word
+    weights aligned with them (or null) and the normalized blocklist
+    patterns. get_vocabulary() compiles it once into each vocabulary.
+    """
+    adjective_weights, noun_weights = vocabulary['adjective_weights'], vocabulary['noun_weights']
+    payload = {
+        'theme': vocabulary['theme'],
+        'adjectives': "\n".join(vocabulary['adjectives']),
+        'nouns': "\n".join(vocabulary['nouns']),
+        'adjective_weights': None,
+        'noun_weights': None,
+        'blocklist': vocabulary['blocklist'].patterns if vocabulary['blocklist'] else [],
+    }
+    if adjective_weights is not None or noun_weights is not None:
+        # Weights are relative, so six significant digits are plenty
+        payload['adjective_weights'] = [float(f"{(adjective_weights or {}).get(word, 1.0):.6g}")
+                                        for word in vocabulary['adjectives']]
+        payload['noun_weights'] = [float(f"{(noun_weights or {}).get(word, 1.0):.6g}")
+                                   for word in vocabulary['nouns']]
+    
+    body = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return (hashlib.sha256(body).hexdigest()[:32], body)
+
+def find_client_vocabulary(content_hash):
+    """Body of a cached vocabulary's compiled client vocabulary by content hash, or None"""
+    with vocabulary_lock:
+        vocabularies = list(vocabulary_cache.values())
+    for vocabulary in vocabularies:
+        if vocabulary['client'][0] == content_hash:
+            return vocabulary['client'][1]
+    return None
+
+def load_names(filename):
+    """Load codenames from a file, one per line"""
+    if not os.path.exists(filename):
+        return []
+    
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            return [line.strip() for line in file if line.strip()]
+    except Exception as e:
+        app.logger.error(f"Error reading names from '{filename}': {str(e)}")
+        return []
+
+FAVORITES_SCHEMA = """CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    theme TEXT,
+    added REAL NOT NULL
+)"""
+
+def favorites_store_path(filename):
+    """Path of the favorites database for a favorites file (favorites.txt is kept in favorites.db)"""
+    root, extension = os.path.splitext(filename)
+    return root + ".db" if extension.lower() == ".txt" else filename
+
+class FavoritesStore:
+    """Favorite codenames in a SQLite database
+    
+    The unique index on name makes the duplicate check and an add one
+    B-tree lookup, instead of reading and rewriting a whole file, and
+    SQLite's locking serializes concurrent writers (waiting up to 30
+    seconds for a lock) so no add is lost. Favorites are kept in insertion
+    order with the theme they were generated from. A legacy favorites.txt
+    is imported the first time its database is opened.
+    """
+    
+    def __init__(self, filename):
+        self.filename = favorites_store_path(filename)
+        created = not os.path.exists(self.filename)
+        self.connection = sqlite3.connect(self.filename, timeout=30, isolation_level=None)
+        self.connection.execute(FAVORITES_SCHEMA)
+        if created and self.filename != filename and os.path.exists(filename):
+            self.add_many(load_names(filename))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM favorites").fetchone()[0]
+    
+    def __contains__(self, name):
+        return self.connection.execute("SELECT 1 FROM favorites WHERE name = ?", (name,)).fetchone() is not None
+    
+    def __iter__(self):
+        """Stream the favorite names in the order they were added"""
+        return (row[0] for row in self.connection.execute("SELECT name FROM favorites ORDER BY id"))
+    
+    def rows(self, after=0):
+        """Stream (id, name, theme, added) rows added after the given id, oldest first"""
+        return self.connection.execute("SELECT id, name, theme, added FROM favorites WHERE id > ? ORDER BY id",
+                                       (after,))
+    
+    def ids(self):
+        """Ids of all favorites"""
+        return {row[0] for row in self.connection.execute("SELECT id FROM favorites")}
+    
+    def add(self, name, theme=None):
+        """Add a favorite; returns False if it was already saved"""
+        cursor = self.connection.execute("INSERT OR IGNORE INTO favorites (name, theme, added) VALUES (?, ?, ?)",
+                                         (name, theme, time.time()))
+        return cursor.rowcount == 1
+    
+    def add_many(self, names, theme=None):
+        """Add favorites in one transaction; returns how many were new"""
+        added = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO favorites (name, theme, added) VALUES (?, ?, ?)",
+                ((name, theme, added) for name in names))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+    
+    def remove(self, name):
+        """Remove a favorite; returns False if it wasn't saved"""
+        return self.connection.execute("DELETE FROM favorites WHERE name = ?", (name,)).rowcount == 1
+    
+    def close(self):
+        self.connection.close()
+
+def favorite_tokens(name):
+    """Lowercase words of a favorite, for word search"""
+    return set(re.findall(r"[^\W_]+", name.lower()))
+
+def favorite_trigrams(key):
+    """Three-character substrings of a lowercase favorite, for substring search"""
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+class FavoritesIndex:
+    """In-memory search index over a FavoritesStore, kept up to date incrementally
+    
+    - prefix: names starting with the query, by bisecting the sorted names
+    - word: names containing every word of the query, from a word -> ids index
+    - substring: names containing the query, from a trigram -> ids index
+      whose candidates are then checked (queries under three characters
+      scan the names)
+    
+    Matching ignores case, and results are in the order favorites were
+    added. refresh() only reads rows added since the last refresh, and
+    only lists all ids when favorites have been removed.
+    """
+    
+    MATCH_MODES = ('prefix', 'substring', 'word')
+    
+    def __init__(self):
+        self.favorites = {}
+        self.ids_by_name = {}
+        self.sorted_keys = []
+        self.words = {}
+        self.trigrams = {}
+        self.themes = {}
+        self.last_id = 0
+    
+    def __len__(self):
+        return len(self.favorites)
+    
+    def add(self, favorite_id, name, theme=None, added=None, keep_sorted=True):
+        """Index a favorite (bulk loads pass keep_sorted=False and sort once at the end)"""
+        if favorite_id in self.favorites:
+            return
+        key = name.lower()
+        self.favorites[favorite_id] = {'id': favorite_id, 'name': name, 'theme': theme, 'added': added}
+        self.ids_by_name[name] = favorite_id
+        if keep_sorted:
+            bisect.insort(self.sorted_keys, (key, favorite_id))
+        else:
+            self.sorted_keys.append((key, favorite_id))
+        for word in favorite_tokens(name):
+            self.words.setdefault(word, set()).add(favorite_id)
+        for trigram in favorite_trigrams(key):
+            self.trigrams.setdefault(trigram, set()).add(favorite_id)
+        self.themes.setdefault(theme, set()).add(favorite_id)
+        self.last_id = max(self.last_id, favorite_id)
+    
+    def discard(self, favorite_id):
+        """Drop a favorite from the index, if it's indexed"""
+        favorite = self.favorites.pop(favorite_id, None)
+        if favorite is None:
+            return
+        key = favorite['name'].lower()
+        del self.ids_by_name[favorite['name']]
+        position = bisect.bisect_left(self.sorted_keys, (key, favorite_id))
+        del self.sorted_keys[position]
+        for postings, terms in ((self.words, favorite_tokens(favorite['name'])),
+                                (self.trigrams, favorite_trigrams(key)),
+                                (self.themes, (favorite['theme'],))):
+            for term in terms:
+                postings[term].discard(favorite_id)
+                if not postings[term]:
+                    del postings[term]
+    
+    def refresh(self, store):
+        """Apply the favorites added to (or removed from) the store since the last refresh"""
+        count = len(self.sorted_keys)
+        for favorite_id, name, theme, added in store.rows(after=self.last_id):
+            self.add(favorite_id, name, theme, added, keep_sorted=False)
+        if len(self.sorted_keys) != count:
+            self.sorted_keys.sort()
+        if len(store) != len(self.favorites):
+            for favorite_id in set(self.favorites) - store.ids():
+                self.discard(favorite_id)
+        if len(store) != len(self.favorites):
+            # Ids were reused, e.g. by a recreated database; index it from scratch
+            self.__init__()
+            for favorite_id, name, theme, added in store.rows():
+                self.add(favorite_id, name, theme, added, keep_sorted=False)
+            self.sorted_keys.sort()
+    
+    def search(self, query='', match='substring', theme=None):
+        """Ids of the favorites matching query (all if empty) and theme, oldest first"""
+        if match not in self.MATCH_MODES:
+            raise ValueError(f"Unknown match mode '{match}' (use one of: {', '.join(self.MATCH_MODES)})")
+        query = query.strip().lower()
         
-        codenames.append(formatted_name)
+        if not query:
+            ids = None
+        elif match == 'prefix':
+            start = bisect.bisect_left(self.sorted_keys, (query,))
+            end = bisect.bisect_left(self.sorted_keys, (query + "\U0010ffff",), start)
+            ids = {favorite_id for _, favorite_id in self.sorted_keys[start:end]}
+        elif match == 'word':
+            postings = [self.words.get(word, set()) for word in favorite_tokens(query)]
+            ids = set.intersection(*postings) if postings else set()
+        elif len(query) >= 3:
+            postings = sorted((self.trigrams.get(trigram, set()) for trigram in favorite_trigrams(query)), key=len)
+            ids = {favorite_id for favorite_id in set.intersection(*postings)
+                   if query in self.favorites[favorite_id]['name'].lower()}
+        else:
+            ids = {favorite_id for key, favorite_id in self.sorted_keys if query in key}
+        
+        if theme is not None:
+            # Favorites saved without a theme came from the default word lists
+            in_theme = self.themes.get(None if theme == 'default' else theme, set())
+            ids = in_theme if ids is None else ids & in_theme
+        return list(self.favorites) if ids is None else sorted(ids)
+    
+    def page(self, ids, offset=0, limit=50):
+        """The favorites for one page of search results"""
+        return [self.favorites[favorite_id] for favorite_id in ids[offset:offset + limit]]
+
+def favorite_names(filename):
+    """All favorite names, without creating a favorites database if there is none"""
+    if not os.path.exists(favorites_store_path(filename)) and not os.path.exists(filename):
+        return []
+    try:
+        with FavoritesStore(filename) as store:
+            return list(store)
+    except sqlite3.Error as e:
+        app.logger.error(f"Error reading favorites from '{filename}': {str(e)}")
+        return []
+
+def get_similarity_index(distance, phonetic):
+    """Return the near-duplicate index over favorites and issued names, cached until either file changes"""
+    if distance <= 0 and not phonetic:
+        return None
+    if distance > MAX_REJECT_DISTANCE:
+        raise ValueError(f"reject_distance cannot be greater than {MAX_REJECT_DISTANCE}")
+    
+    stamp = file_stamp((favorites_store_path(FAVORITES_FILE), FAVORITES_FILE, ISSUED_FILE))
+    key = (distance, phonetic)
+    with vocabulary_lock:
+        cached = similarity_cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    
+    index = SimilarityIndex(favorite_names(FAVORITES_FILE) + load_names(ISSUED_FILE),
+                            max_distance=distance, phonetic=phonetic)
+    with vocabulary_lock:
+        similarity_cache[key] = (stamp, index)
+    return index
+
+# Shared favorites search index, refreshed when the favorites database changes
+FAVORITES_PAGE_SIZE = 50
+MAX_FAVORITES_PAGE_SIZE = 1000
+favorites_index = FavoritesIndex()
+favorites_index_stamp = None
+favorites_index_lock = threading.Lock()
+
+def refresh_favorites_index(store=None):
+    """Bring the shared favorites index up to date; call with favorites_index_lock held
+    
+    The database's modification time is read before refreshing, so a write
+    that lands during the refresh is picked up by the next request.
+    """
+    global favorites_index_stamp
+    stamp = file_stamp((favorites_store_path(FAVORITES_FILE), FAVORITES_FILE))
+    if store is None and stamp == favorites_index_stamp:
+        return favorites_index
+    if store is not None:
+        favorites_index.refresh(store)
+    elif stamp != (None, None):
+        with FavoritesStore(FAVORITES_FILE) as store:
+            favorites_index.refresh(store)
+    else:
+        favorites_index.__init__()
+    favorites_index_stamp = stamp
+    return favorites_index
+
+# -------------------- Theme Manifest ---------------------
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+
+theme_manifest = None
+
+def word_file_entry(filename):
+    """Manifest entry for a word file: word count, length range and histogram, content hash, size and mtime"""
+    with open(filename, 'rb') as file:
+        content = file.read()
+    
+    lengths = {}
+    for line in content.decode('utf-8').splitlines():
+        word = line.split('\t', 1)[0].strip()
+        if word:
+            lengths[len(word)] = lengths.get(len(word), 0) + 1
+    
+    return {
+        'path': filename,
+        'words': sum(lengths.values()),
+        'weighted': b'\t' in content,
+        'min_length': min(lengths, default=0),
+        'max_length': max(lengths, default=0),
+        'lengths': {str(length): lengths[length] for length in sorted(lengths)},
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'bytes': len(content),
+        'mtime': os.path.getmtime(filename),
+    }
+
+def manifest_stamp():
+    """[path, mtime in nanoseconds, size] of the default word lists and every theme word file
+    
+    The time and size are None for a missing file. Adding, removing, renaming
+    or editing any word file in place changes the stamp.
+    """
+    paths = list(word_list_files('default'))
+    try:
+        paths += sorted(os.path.join("themes", entry.name) for entry in os.scandir("themes")
+                        if entry.name.endswith(("_adj.txt", "_nouns.txt")))
+    except OSError:
+        pass
+    stamp = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamp.append([path, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            stamp.append([path, None, None])
+    return stamp
+
+def build_theme_manifest():
+    """Scan and read every theme's word files into a manifest
+    
+    Each theme gets its adjectives and nouns file entries and the number of
+    combinations each pattern can produce from the raw word counts.
+    """
+    stamp = manifest_stamp()
+    themes = {}
+    for theme in ['default'] + sorted(get_available_themes()):
+        adj_file, noun_file = word_list_files(theme)
+        try:
+            entry = {'adjectives': word_file_entry(adj_file), 'nouns': word_file_entry(noun_file)}
+        except (OSError, UnicodeDecodeError):
+            continue
+        counts = {"adj": entry['adjectives']['words'], "noun": entry['nouns']['words'], "number": len(NUMBER_SLOT)}
+        entry['combinations'] = {pattern: math.prod(counts[slot] for slot in slots)
+                                 for pattern, slots in PATTERN_SLOTS.items()}
+        themes[theme] = entry
+    return {'version': MANIFEST_VERSION, 'stamp': stamp, 'themes': themes}
+
+def save_theme_manifest(manifest):
+    """Atomically write the theme manifest"""
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tmp', delete=False,
+                                         dir=os.path.dirname(os.path.abspath(MANIFEST_FILE))) as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(file.name, MANIFEST_FILE)
+    except OSError as e:
+        app.logger.warning(f"Could not write manifest '{MANIFEST_FILE}': {str(e)}")
+
+def get_theme_manifest():
+    """Return the theme manifest, rebuilding it if it is missing or out of date
+    
+    The manifest is current while the default word lists and theme files keep
+    the modification times and sizes recorded in it. It is kept in memory
+    and shared with other workers through MANIFEST_FILE, so listing themes
+    costs a directory scan and a stat per word file, plus one small read
+    when another process rebuilt it.
+    """
+    global theme_manifest
+    stamp = manifest_stamp()
+    with vocabulary_lock:
+        manifest = theme_manifest
+    if manifest and manifest['stamp'] == stamp:
+        return manifest
+    
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('stamp') != stamp:
+            manifest = None
+    except (OSError, ValueError):
+        manifest = None
+    
+    if manifest is None:
+        manifest = build_theme_manifest()
+        save_theme_manifest(manifest)
+    with vocabulary_lock:
+        theme_manifest = manifest
+    return manifest
+
+def theme_names():
+    """Names of the available themes, from the theme manifest"""
+    return sorted(theme for theme in get_theme_manifest()['themes'] if theme != 'default')
+
+# -------------------- Background Export Jobs ---------------------
+
+EXPORT_DIR = os.environ.get('SPYSPEAK_EXPORT_DIR',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports'))
+JOB_WORKERS = int(os.environ.get('SPYSPEAK_JOB_WORKERS', 2))
+MAX_PENDING_JOBS = int(os.environ.get('SPYSPEAK_MAX_PENDING_JOBS', 16))
+MAX_JOB_COUNT = int(os.environ.get('SPYSPEAK_MAX_JOB_COUNT', 10000000))
+# Unique jobs remember every name they emit, so they get a lower cap
+MAX_UNIQUE_JOB_COUNT = int(os.environ.get('SPYSPEAK_MAX_UNIQUE_JOB_COUNT', 1000000))
+JOB_TTL = int(os.environ.get('SPYSPEAK_JOB_TTL', 3600))
+JOB_CHUNK_SIZE = 10000
+JOB_MAX_STALLED_CHUNKS = 50
+
+# Output formats supported by export jobs: file extension and mimetype
+JOB_FORMATS = {
+    'text': ('txt', 'text/plain'),
+    'json': ('json', 'application/json'),
+    'csv': ('csv', 'text/csv'),
+}
+
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='spyspeak-job')
+jobs = {}
+jobs_lock = threading.Lock()
+
+def parse_bool(value):
+    """Interpret a query/form/JSON value as a boolean flag"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on', 'gzip')
+
+def combination_space(adjective_count, noun_count, pattern):
+    """Number of distinct raw combinations a pattern can produce"""
+    if pattern == "noun-noun":
+        return noun_count * noun_count
+    if pattern == "adj-adj-noun":
+        return adjective_count * adjective_count * noun_count
+    if pattern == "adj-noun-number":
+        return adjective_count * noun_count * 999
+    return adjective_count * noun_count
+
+def casefold_unique(words):
+    """Words with case variants removed, keeping the first spelling"""
+    unique = {}
+    for word in words:
+        unique.setdefault(word.casefold(), word)
+    return list(unique.values())
+
+def job_words(params):
+    """Return a job's vocabulary and its adjectives and nouns with length limits applied"""
+    vocabulary = get_filtered_vocabulary(params['theme'], frozenset(params['exclude']),
+                                         params['exclusion_profile'])
+    if params['slug']:
+        vocabulary = dict(vocabulary, **vocabulary['slug'])
+    adjectives = filter_word_lengths(vocabulary['adjectives'], params['min_length'], params['max_length'])
+    nouns = filter_word_lengths(vocabulary['nouns'], params['min_length'], params['max_length'])
+    return vocabulary, adjectives, nouns
+
+def unique_space(adjectives, nouns, params):
+    """Number of distinct codenames a unique job can emit
+    
+    Names are compared ignoring case, since a case style prints words that
+    only differ in case identically, so case variants are counted once.
+    """
+    adjectives = casefold_unique(adjectives)
+    nouns = casefold_unique(nouns)
+    sampler = build_sampler(adjectives, nouns, params['pattern'], params['separator'],
+                            params['min_total_length'], params['max_total_length'],
+                            params['alliterate'], params['initials'], params['prefix'])
+    if sampler is not None:
+        return sampler.size
+    return combination_space(len(adjectives), len(nouns), params['pattern'])
+
+def job_view(job):
+    """Public, JSON-serializable view of a job"""
+    view = {
+        'id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'total': job['total'],
+        'percent': round(100.0 * job['progress'] / job['total'], 1) if job['total'] else 0.0,
+        'created': job['created'],
+        'finished': job['finished'],
+        'error': job['error'],
+    }
+    view.update(job['params'])
+    if job['status'] == 'completed':
+        view['download_url'] = f"/api/jobs/{job['id']}/download"
+    return view
+
+def set_job_status(job, status, error=None):
+    """Update a job's status under the jobs lock"""
+    with jobs_lock:
+        job['status'] = status
+        job['error'] = error
+        if status in ('completed', 'failed', 'cancelled'):
+            job['finished'] = time.time()
+
+def remove_job_file(job):
+    """Delete a job's output file if one was written"""
+    try:
+        if job['path'] and os.path.exists(job['path']):
+            os.remove(job['path'])
+    except OSError as e:
+        app.logger.error(f"Error removing export file '{job['path']}': {str(e)}")
+
+def prune_jobs():
+    """Forget finished jobs older than JOB_TTL and delete their files"""
+    cutoff = time.time() - JOB_TTL
+    with jobs_lock:
+        expired = [job for job in jobs.values() if job['finished'] and job['finished'] < cutoff]
+        for job in expired:
+            del jobs[job['id']]
+    for job in expired:
+        remove_job_file(job)
+
+def open_export_file(path, compress):
+    """Open an export file for text writing, gzip-compressed if requested"""
+    if compress:
+        return gzip.open(path, 'wt', compresslevel=GZIP_LEVEL, encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+def json_strings(names, separator):
+    """Encode names as JSON strings joined by separator, exactly as json.dumps() writes each one
+    
+    Generated codenames are printable ASCII without quotes or backslashes,
+    which JSON needs no escapes for, so after one scan of the joined text
+    they are quoted with a single join. Anything else goes through json's
+    C string encoder.
+    """
+    text = "".join(names)
+    if text.isascii() and text.isprintable() and '"' not in text and "\\" not in text:
+        return '"' + f'"{separator}"'.join(names) + '"' if names else ""
+    return separator.join(map(json.encoder.encode_basestring_ascii, names))
+
+def csv_rows(names):
+    """Encode names as one-column CSV rows, exactly as csv.writer() writes them"""
+    text = "".join(names)
+    if all(names) and not any(char in text for char in ',"\r\n'):
+        return "\r\n".join(names) + "\r\n" if names else ""
+    output = StringIO()
+    csv.writer(output).writerows([name] for name in names)
+    return output.getvalue()
+
+# gzip level (1 fastest, 9 smallest) for compressed responses and export jobs, and
+# the smallest response worth compressing for clients that send Accept-Encoding: gzip
+GZIP_LEVEL = int(os.environ.get('SPYSPEAK_GZIP_LEVEL', 6))
+GZIP_MIN_SIZE = int(os.environ.get('SPYSPEAK_GZIP_MIN_SIZE', 1024))
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html')
+
+def accepts_gzip():
+    """Whether the current request's Accept-Encoding allows a gzip-encoded response"""
+    return request.accept_encodings['gzip'] > 0
+
+def gzip_stream(pieces, level=GZIP_LEVEL):
+    """Compress text pieces into one gzip stream, yielding compressed data as it is produced"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for piece in pieces:
+        data = compressor.compress(piece.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def codenames_json_pieces(payload):
+    """Yield the body jsonify(payload) would return, with its 'codenames' a chunk at a time
+    
+    The rest of the payload goes through Flask's JSON provider as usual and
+    the names, a list or any iterable, are spliced into its empty
+    placeholder, JOB_CHUNK_SIZE at a time, joined by json_strings().
+    """
+    body = app.json.dumps(dict(payload, codenames=[]), separators=(",", ":"))
+    head, _, tail = body.partition('"codenames":[]')
+    codenames = iter(payload['codenames'])
+    yield head + '"codenames":['
+    separator = ""
+    while chunk := list(islice(codenames, JOB_CHUNK_SIZE)):
+        yield separator + json_strings(chunk, ",")
+        separator = ","
+    yield "]" + tail + "\n"
+
+def codenames_response(payload):
+    """jsonify(payload) for a payload with a large 'codenames' iterable, gzip-streamed if the client accepts it
+    
+    The first JOB_CHUNK_SIZE names are drawn up front, so an error there
+    (such as ValueError from a generate_codename(stream=True) iterator)
+    still reaches the caller before a response exists. A compressed body
+    then draws, serializes and deflates the rest chunk by chunk as it is
+    sent; an error that late cuts the gzip stream short, which the client
+    sees as a broken response rather than a short list. Uncompressed and
+    debug (indented) bodies are built whole.
+    """
+    codenames = iter(payload['codenames'])
+    first = list(islice(codenames, JOB_CHUNK_SIZE))
+    provider = app.json
+    if provider.compact is False or (provider.compact is None and app.debug) or not provider.ensure_ascii:
+        return jsonify(dict(payload, codenames=first + list(codenames)))
+    if not accepts_gzip() or (len(first) < JOB_CHUNK_SIZE and
+                              sum(map(len, first)) + 3 * len(first) < GZIP_MIN_SIZE):
+        body = "".join(codenames_json_pieces(dict(payload, codenames=chain(first, codenames))))
+        response = app.response_class(body, mimetype=provider.mimetype)
+    else:
+        pieces = codenames_json_pieces(dict(payload, codenames=chain(first, codenames)))
+        response = app.response_class(gzip_stream(pieces), mimetype=provider.mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+class ExportWriter:
+    """Write codenames incrementally in the same layout as a one-shot export"""
+    
+    def __init__(self, file, format_type):
+        self.file = file
+        self.format_type = format_type
+        self.first = True
+        if format_type == 'csv':
+            file.write("Codename\r\n")
+        elif format_type == 'json':
+            file.write('{\n  "codenames": [')
+    
+    def write(self, codenames):
+        if not codenames:
+            return
+        if self.format_type == 'csv':
+            self.file.write(csv_rows(codenames))
+        elif self.format_type == 'json':
+            prefix = '\n    ' if self.first else ',\n    '
+            self.file.write(prefix + json_strings(codenames, ',\n    '))
+        else:
+            prefix = '' if self.first else '\n'
+            self.file.write(prefix + '\n'.join(codenames))
+        self.first = False
+    
+    def close(self):
+        if self.format_type == 'json':
+            self.file.write(']\n}' if self.first else '\n  ]\n}')
+
+def run_export_job(job):
+    """Generate a job's codenames in chunks and stream them to its export file"""
+    params = job['params']
+    with jobs_lock:
+        if job['cancel'].is_set():
+            return
+        job['status'] = 'running'
+    
+    try:
+        # Length limits are applied once instead of once per chunk
+        vocabulary, adjectives, nouns = job_words(params)
+        similarity_index = get_similarity_index(params['reject_distance'], params['reject_phonetic'])
+        
+        # Casefolded names already emitted by a unique job, at most MAX_UNIQUE_JOB_COUNT
+        seen = set()
+        stalled = 0
+        with open_export_file(job['path'], params['compress']) as file:
+            writer = ExportWriter(file, params['format'])
+            while job['progress'] < job['total']:
+                if job['cancel'].is_set():
+                    break
+                
+                remaining = job['total'] - job['progress']
+                codenames = generate_codename(
+                    adjectives=adjectives,
+                    nouns=nouns,
+                    count=min(JOB_CHUNK_SIZE, remaining),
+                    separator=params['separator'],
+                    pattern=params['pattern'],
+                    case_style=params['case'],
+                    min_total_length=params['min_total_length'],
+                    max_total_length=params['max_total_length'],
+                    blocklist=vocabulary['blocklist'],
+                    similarity_index=similarity_index,
+                    alliterate=params['alliterate'],
+                    initials=params['initials'],
+                    prefix=params['prefix'],
+                    secure=params['secure'],
+                    adjective_weights=vocabulary['adjective_weights'],
+                    noun_weights=vocabulary['noun_weights'],
+                    alias_tables=vocabulary['alias_tables']
+                )
+                if isinstance(codenames, dict) and 'error' in codenames:
+                    set_job_status(job, 'failed', codenames['error'])
+                    break
+                
+                if params['unique']:
+                    fresh = []
+                    for name in codenames:
+                        key = name.casefold()
+                        if key not in seen:
+                            seen.add(key)
+                            fresh.append(name)
+                    codenames = fresh[:remaining]
+                    stalled = 0 if codenames else stalled + 1
+                    if stalled >= JOB_MAX_STALLED_CHUNKS:
+                        set_job_status(job, 'failed', "Could not find enough unique codenames")
+                        break
+                
+                writer.write(codenames)
+                with jobs_lock:
+                    job['progress'] += len(codenames)
+            writer.close()
+        
+        if job['cancel'].is_set():
+            set_job_status(job, 'cancelled')
+        elif job['status'] == 'running':
+            set_job_status(job, 'completed')
+    
+    except Exception as e:
+        app.logger.error(f"Export job {job['id']} failed: {str(e)}")
+        set_job_status(job, 'failed', str(e))
+    
+    if job['status'] != 'completed':
+        remove_job_file(job)
+
+# -------------------- Memory Accounting ---------------------
+
+ADMIN_TOKEN = os.environ.get('SPYSPEAK_ADMIN_TOKEN')
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+def object_bytes(obj, seen=None):
+    """Approximate memory held by an object and everything it references
+    
+    Follows containers and instance attributes. Objects whose id is already
+    in seen are not counted again, so sharing one seen set across several
+    calls counts shared words and tables once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (dict, MappingProxyType)):
+        size += sum(object_bytes(key, seen) + object_bytes(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(object_bytes(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not callable(obj):
+        size += object_bytes(vars(obj), seen)
+    return size
+
+def process_rss():
+    """Resident set size of this process in bytes (peak RSS where the current one is unavailable)"""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def top_allocations(limit=10):
+    """The source lines holding the most memory traced by tracemalloc, if it is tracing"""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return [{
+        'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+        'bytes': stat.size,
+        'blocks': stat.count,
+    } for stat in snapshot.statistics('lineno')[:limit]]
+
+def vocabulary_memory_usage(vocabulary):
+    """Word counts and bytes used by a cached vocabulary
+    
+    - raw: what the words would take as plain lists of str, for comparison
+    - words: the WordTables' UTF-8 blobs and offset and length arrays
+    - decoded: the decoded words kept for hot vocabularies
+    - indexes: the tables' per-length and per-first-letter index arrays
+    - views: the WordViews (the slug subset's included) with their index arrays
+      and cached length buckets
+    - caches: word weights, alias tables and the compiled blocklist
+    """
+    adjectives, nouns = vocabulary['adjectives'], vocabulary['nouns']
+    tables = (adjectives.table, nouns.table)
+    caches = tuple(value for value in (vocabulary['adjective_weights'], vocabulary['noun_weights'],
+                                       vocabulary['alias_tables'], vocabulary['blocklist']) if value is not None)
+    
+    seen = set()
+    usage = {
+        'raw': object_bytes(list(adjectives)) + object_bytes(list(nouns)),
+        'words': sum(object_bytes(part, seen) for table in tables
+                     for part in (table.blob, table.offsets, table.lengths)),
+        'decoded': sum(object_bytes(decoded, seen) for decoded in (table.decoded for table in tables)
+                       if decoded is not None),
+        'indexes': sum(object_bytes(table.by_length, seen) + object_bytes(table.by_letter, seen)
+                       for table in tables),
+        'views': object_bytes(adjectives, seen) + object_bytes(nouns, seen) + object_bytes(vocabulary['slug'], seen),
+        'caches': object_bytes(caches, seen),
+    }
+    usage['total'] = sum(size for name, size in usage.items() if name != 'raw')
+    
+    return {
+        'theme': vocabulary['theme'],
+        'adjectives': len(adjectives),
+        'nouns': len(nouns),
+        'bytes': usage,
+    }
+
+def memory_report(top=10):
+    """Memory used by the cached vocabularies and similarity indexes, process RSS and top allocators"""
+    with vocabulary_lock:
+        vocabularies = list(vocabulary_cache.values())
+        filtered_vocabularies = list(filtered_vocabulary_cache.values())
+        similarity_indexes = list(similarity_cache.items())
+    
+    loaded = {vocabulary['theme'] for vocabulary in vocabularies}
+    themes = ['default'] + theme_names()
+    report = {
+        'pid': os.getpid(),
+        'vocabularies': [vocabulary_memory_usage(vocabulary) for vocabulary in vocabularies],
+        'unloaded_themes': [theme for theme in themes if f"{theme}:1" not in loaded],
+        'vocabulary_cache': {'size': len(vocabularies), 'capacity': VOCABULARY_CACHE_SIZE},
+        'filtered_vocabulary_cache': {
+            'size': len(filtered_vocabularies),
+            'capacity': FILTERED_VOCABULARY_CACHE_SIZE,
+            # Only the views and alias tables; the word tables belong to the cached vocabularies
+            'bytes': sum(object_bytes(vocabulary['adjectives'].numbers) + object_bytes(vocabulary['nouns'].numbers)
+                         + object_bytes(vocabulary['alias_tables']) for vocabulary in filtered_vocabularies),
+        },
+        'similarity_indexes': [{
+            'reject_distance': distance,
+            'reject_phonetic': phonetic,
+            'names': len(index),
+            'bytes': object_bytes(index),
+        } for (distance, phonetic), (_, index) in similarity_indexes],
+        'rss': process_rss(),
+        'traced': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+        'top_allocations': top_allocations(top),
+    }
+    report['total'] = (sum(entry['bytes']['total'] for entry in report['vocabularies'])
+                       + report['filtered_vocabulary_cache']['bytes']
+                       + sum(entry['bytes'] for entry in report['similarity_indexes']))
+    return report
+
+def admin_allowed():
+    """Admin endpoints need the SPYSPEAK_ADMIN_TOKEN in X-Admin-Token, or a local client if no token is set"""
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
+    return request.remote_addr in LOOPBACK_ADDRESSES
+
+# -------------------- Rate Limiting ---------------------
+
+# Tokens are codenames: a request costs one token plus one per requested
+# codename (export jobs are charged RATE_LIMIT_JOB_COST per codename, as they
+# run in the bounded job pool rather than on a request thread)
+RATE_LIMIT = float(os.environ.get('SPYSPEAK_RATE_LIMIT', 1000))
+RATE_LIMIT_BURST = float(os.environ.get('SPYSPEAK_RATE_LIMIT_BURST', 10000))
+RATE_LIMIT_JOB_COST = float(os.environ.get('SPYSPEAK_RATE_LIMIT_JOB_COST', 0.001))
+RATE_LIMIT_CLIENTS = int(os.environ.get('SPYSPEAK_RATE_LIMIT_CLIENTS', 10000))
+API_KEYS = frozenset(key.strip() for key in os.environ.get('SPYSPEAK_API_KEYS', '').split(',') if key.strip())
+
+# Endpoints that are never rate limited
+RATE_LIMIT_EXEMPT = ('static', 'favicon', 'api_vocabulary_content')
+
+rate_limit_buckets = OrderedDict()
+rate_limit_lock = threading.Lock()
+
+class TokenBucket:
+    """Bucket of up to capacity tokens, refilled continuously at rate tokens per second"""
+    
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+    
+    def refill(self, now):
+        """Add the tokens accrued since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def consume(self, cost, now):
+        """Take cost tokens if there are enough, and report whether they were taken"""
+        self.refill(now)
+        if cost > self.tokens:
+            return False
+        self.tokens -= cost
+        return True
+    
+    def wait_time(self, cost):
+        """Seconds until cost tokens are available (infinite if cost exceeds the capacity)"""
+        if cost > self.capacity:
+            return math.inf
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+def rate_limit_client():
+    """Rate limit key: a configured API key from X-API-Key, otherwise the client address"""
+    api_key = request.headers.get('X-API-Key', '')
+    if api_key in API_KEYS:
+        return f"key:{api_key}"
+    return f"addr:{request.remote_addr}"
+
+def request_cost():
+    """Tokens a request costs, from its requested count; parsed without doing any work
+    
+    The cost is capped at a full bucket, so the rate limit only throttles
+    large requests and never refuses one outright: one for 100,000
+    codenames, or a job for MAX_JOB_COUNT (10,000,000 codenames would cost
+    10,001 tokens), is accepted whenever the client's bucket is full.
+    """
+    if request.endpoint == 'api_generate':
+        count = request.args.get('count', 1)
+    elif request.endpoint == 'generate':
+        count = request.form.get('count', 1)
+    elif request.endpoint == 'api_create_job':
+        count = (request.get_json(silent=True) or request.form).get('count', 1)
+    else:
+        return 1.0
+    
+    try:
+        count = max(0, int(count))
+    except (TypeError, ValueError):
+        count = 1
+    if request.endpoint == 'api_create_job':
+        return min(1.0 + count * RATE_LIMIT_JOB_COST, RATE_LIMIT_BURST)
+    return min(1.0 + count, RATE_LIMIT_BURST)
+
+def take_rate_limit_tokens(client, cost):
+    """Charge cost to a client's bucket: (allowed, bucket state for the rate limit headers)"""
+    now = time.monotonic()
+    with rate_limit_lock:
+        bucket = rate_limit_buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(RATE_LIMIT, RATE_LIMIT_BURST, now)
+            rate_limit_buckets[client] = bucket
+            # Forget the least recently seen clients; a forgotten client starts with a full bucket
+            while len(rate_limit_buckets) > RATE_LIMIT_CLIENTS:
+                rate_limit_buckets.popitem(last=False)
+        rate_limit_buckets.move_to_end(client)
+        allowed = bucket.consume(cost, now)
+        return allowed, {
+            'remaining': bucket.tokens,
+            'reset': (bucket.capacity - bucket.tokens) / bucket.rate,
+            'retry_after': None if allowed else bucket.wait_time(cost),
+        }
+
+@app.before_request
+def enforce_rate_limit():
+    """Reject over-limit requests before any vocabulary is loaded or codename generated"""
+    if RATE_LIMIT <= 0 or request.endpoint is None or request.endpoint in RATE_LIMIT_EXEMPT:
+        return None
+    
+    cost = request_cost()
+    allowed, state = take_rate_limit_tokens(rate_limit_client(), cost)
+    g.rate_limit = state
+    if allowed:
+        return None
+    
+    error = f"Rate limit exceeded, try again in {math.ceil(state['retry_after'])}s"
+    if request.endpoint == 'generate':
+        return render_template('index.html', error=error, themes=theme_names()), 429
+    return jsonify({
+        'success': False,
+        'error': error
+    }), 429
+
+@app.after_request
+def add_rate_limit_headers(response):
+    """Report the client's bucket in X-RateLimit-* headers (and Retry-After when rejected)"""
+    state = g.get('rate_limit')
+    if state is not None:
+        response.headers['X-RateLimit-Limit'] = f"{RATE_LIMIT_BURST:g}"
+        response.headers['X-RateLimit-Remaining'] = str(int(state['remaining']))
+        response.headers['X-RateLimit-Reset'] = str(math.ceil(state['reset']))
+        if state['retry_after'] is not None and not math.isinf(state['retry_after']):
+            response.headers['Retry-After'] = str(max(1, math.ceil(state['retry_after'])))
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip JSON and HTML responses of at least GZIP_MIN_SIZE bytes for clients that accept it
     
-    return codenames
+    Streamed, file and already-encoded responses are left alone, as are ones
+    with an ETag, whose validator belongs to the uncompressed body.
+    """
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.is_streamed
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.get_etag()[0] is not None):
+        return response
+    response.vary.add('Accept-Encoding')
+    if accepts_gzip() and response.content_length >= GZIP_MIN_SIZE:
+        response.set_data(gzip.compress(response.get_data(), compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 # -------------------- Route Handlers ---------------------
 
 @app.route('/')
 def index():
     """Render the main web interface"""
-    themes = get_available_themes()
+    themes = theme_names()
     return render_template('index.html', themes=themes)
 
 @app.route('/generate', methods=['POST'])
@@ -171,40 +2404,47 @@ def generate():
         separator = request.form.get('separator', ' ')
         min_length = int(request.form.get('min_length', 0))
         max_length = int(request.form.get('max_length', 0))
+        min_total_length = int(request.form.get('min_total_length', 0))
+        max_total_length = int(request.form.get('max_total_length', 0))
+        similarity_index = get_similarity_index(int(request.form.get('reject_distance', 0)),
+                                                parse_bool(request.form.get('reject_phonetic', False)))
+        alliterate = parse_bool(request.form.get('alliterate', False))
+        initials = request.form.get('initials') or None
+        prefix = request.form.get('prefix') or None
+        secure = parse_bool(request.form.get('secure', False))
         
-        # Load words
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        if theme != 'default':
-            adjectives, nouns = load_themed_words(theme)
-        else:
-            adj_file = os.path.join(current_dir, "adjectives.txt")
-            noun_file = os.path.join(current_dir, "nouns.txt")
-            adjectives = load_words(adj_file)
-            nouns = load_words(noun_file)
-        
-        # Load exclusions if they exist
-        exclusions_file = os.path.join(current_dir, "exclusions.txt")
-        exclusions = load_exclusions(exclusions_file) if os.path.exists(exclusions_file) else []
+        # Load words with exclusions and the blocklist applied
+        vocabulary = get_vocabulary(theme)
         
         # Generate codenames
         codenames = generate_codename(
-            adjectives=adjectives,
-            nouns=nouns,
+            adjectives=vocabulary['adjectives'],
+            nouns=vocabulary['nouns'],
             count=count,
             separator=separator,
-            exclusions=exclusions,
+            blocklist=vocabulary['blocklist'],
+            similarity_index=similarity_index,
+            alliterate=alliterate,
+            initials=initials,
+            prefix=prefix,
+            secure=secure,
+            word_indexes=vocabulary['indexes'],
+            adjective_weights=vocabulary['adjective_weights'],
+            noun_weights=vocabulary['noun_weights'],
+            alias_tables=vocabulary['alias_tables'],
             pattern=pattern,
             case_style=case_style,
             min_length=min_length,
-            max_length=max_length
+            max_length=max_length,
+            min_total_length=min_total_length,
+            max_total_length=max_total_length
         )
         
         # Check if there was an error
         if isinstance(codenames, dict) and 'error' in codenames:
             return render_template('index.html', 
                                   error=codenames['error'],
-                                  themes=get_available_themes())
+                                  themes=theme_names())
         
         return render_template('index.html', 
                               codenames=codenames, 
@@ -215,13 +2455,19 @@ def generate():
                               separator=separator,
                               min_length=min_length,
                               max_length=max_length,
-                              themes=get_available_themes())
+                              min_total_length=min_total_length,
+                              max_total_length=max_total_length,
+                              alliterate=alliterate,
+                              initials=initials,
+                              prefix=prefix,
+                              secure=secure,
+                              themes=theme_names())
     
     except Exception as e:
         app.logger.error(f"Error generating codenames: {str(e)}")
         return render_template('index.html', 
                               error=f"Error generating codenames: {str(e)}",
-                              themes=get_available_themes())
+                              themes=theme_names())
 
 @app.route('/api/codenames', methods=['GET'])
 def api_generate():
@@ -235,33 +2481,50 @@ def api_generate():
         separator = request.args.get('separator', ' ')
         min_length = int(request.args.get('min_length', 0))
         max_length = int(request.args.get('max_length', 0))
+        min_total_length = int(request.args.get('min_total_length', 0))
+        max_total_length = int(request.args.get('max_total_length', 0))
+        similarity_index = get_similarity_index(int(request.args.get('reject_distance', 0)),
+                                                parse_bool(request.args.get('reject_phonetic', False)))
+        alliterate = parse_bool(request.args.get('alliterate', False))
+        initials = request.args.get('initials') or None
+        prefix = request.args.get('prefix') or None
+        secure = parse_bool(request.args.get('secure', False))
+        slug = parse_bool(request.args.get('slug', False))
+        exclusions = parse_exclusion_list(request.args.getlist('exclude'))
+        exclusion_profile = request.args.get('exclusion_profile') or None
+        if slug:
+            separator, max_total_length = slug_options(separator, max_total_length)
+            case_style = 'lower'
         
-        # Load words
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        if theme != 'default':
-            adjectives, nouns = load_themed_words(theme)
-        else:
-            adj_file = os.path.join(current_dir, "adjectives.txt")
-            noun_file = os.path.join(current_dir, "nouns.txt")
-            adjectives = load_words(adj_file)
-            nouns = load_words(noun_file)
-        
-        # Load exclusions if they exist
-        exclusions_file = os.path.join(current_dir, "exclusions.txt")
-        exclusions = load_exclusions(exclusions_file) if os.path.exists(exclusions_file) else []
+        # Load words with the global and this request's exclusions and the blocklist applied
+        vocabulary = get_filtered_vocabulary(theme, exclusions, exclusion_profile)
+        if slug:
+            # Only the precompiled slug-valid words, so every result is a valid label
+            vocabulary = dict(vocabulary, **vocabulary['slug'])
         
-        # Generate codenames
+        # Generate codenames lazily, drawn as codenames_response() writes them
         codenames = generate_codename(
-            adjectives=adjectives,
-            nouns=nouns,
+            adjectives=vocabulary['adjectives'],
+            nouns=vocabulary['nouns'],
             count=count,
             separator=separator,
-            exclusions=exclusions,
+            blocklist=vocabulary['blocklist'],
+            similarity_index=similarity_index,
+            alliterate=alliterate,
+            initials=initials,
+            prefix=prefix,
+            secure=secure,
+            word_indexes=vocabulary['indexes'],
+            adjective_weights=vocabulary['adjective_weights'],
+            noun_weights=vocabulary['noun_weights'],
+            alias_tables=vocabulary['alias_tables'],
             pattern=pattern,
             case_style=case_style,
             min_length=min_length,
-            max_length=max_length
+            max_length=max_length,
+            min_total_length=min_total_length,
+            max_total_length=max_total_length,
+            stream=True
         )
         
         # Check if there was an error
@@ -271,7 +2534,7 @@ def api_generate():
                 'error': codenames['error']
             }), 400
         
-        return jsonify({
+        return codenames_response({
             'success': True,
             'codenames': codenames,
             'count': count,
@@ -280,7 +2543,13 @@ def api_generate():
             'case': case_style,
             'separator': separator,
             'min_length': min_length,
-            'max_length': max_length
+            'max_length': max_length,
+            'min_total_length': min_total_length,
+            'max_total_length': max_total_length,
+            'exclude': sorted(exclusions),
+            'exclusion_profile': exclusion_profile,
+            'secure': secure,
+            'slug': slug
         })
     
     except Exception as e:
@@ -292,26 +2561,450 @@ def api_generate():
 
 @app.route('/api/themes', methods=['GET'])
 def api_themes():
-    """REST API endpoint for listing available themes"""
-    themes = get_available_themes()
+    """REST API endpoint for listing available themes with their word counts and sizes"""
+    manifest = get_theme_manifest()
+    details = {}
+    for theme, entry in manifest['themes'].items():
+        details[theme] = {
+            'adjectives': entry['adjectives']['words'],
+            'nouns': entry['nouns']['words'],
+            'min_length': min(entry['adjectives']['min_length'], entry['nouns']['min_length']),
+            'max_length': max(entry['adjectives']['max_length'], entry['nouns']['max_length']),
+            'combinations': entry['combinations'],
+            'sha256': {'adjectives': entry['adjectives']['sha256'], 'nouns': entry['nouns']['sha256']},
+        }
+    return jsonify({
+        'success': True,
+        'themes': sorted(theme for theme in details if theme != 'default'),
+        'details': details
+    })
+
+@app.route('/api/stats', methods=['GET'])
+def api_stats():
+    """REST API endpoint for the combination space and collision risk of generation settings"""
+    try:
+        theme = request.args.get('theme', 'default')
+        pattern = request.args.get('pattern', 'adj-noun')
+        separator = request.args.get('separator', ' ')
+        min_length = int(request.args.get('min_length', 0))
+        max_length = int(request.args.get('max_length', 0))
+        min_total_length = int(request.args.get('min_total_length', 0))
+        max_total_length = int(request.args.get('max_total_length', 0))
+        issued = int(request.args.get('count', 1000))
+        slug = parse_bool(request.args.get('slug', False))
+        exclusions = parse_exclusion_list(request.args.getlist('exclude'))
+        exclusion_profile = request.args.get('exclusion_profile') or None
+        if pattern not in PATTERN_SLOTS:
+            raise ValueError(f"Unknown pattern '{pattern}' (use one of: {', '.join(PATTERN_SLOTS)})")
+        if issued < 0:
+            raise ValueError("count can't be negative")
+        if slug:
+            separator, max_total_length = slug_options(separator, max_total_length)
+        
+        # Computed from the vocabulary's cached length histograms; nothing is generated
+        vocabulary = get_filtered_vocabulary(theme, exclusions, exclusion_profile)
+        histograms = vocabulary['slug']['histograms'] if slug else vocabulary['histograms']
+        stats = codename_stats(histograms, pattern, len(separator), min_length, max_length,
+                               min_total_length, max_total_length, issued)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
     return jsonify({
         'success': True,
-        'themes': themes
+        'theme': vocabulary['theme'],
+        'pattern': pattern,
+        'separator': separator,
+        'slug': slug,
+        **stats
     })
 
+@app.route('/api/vocabulary', methods=['GET'])
+def api_vocabulary():
+    """REST API endpoint naming the content-addressed URL of a theme's compiled client vocabulary"""
+    try:
+        theme = request.args.get('theme', 'default')
+        vocabulary = get_vocabulary(theme)
+        if not vocabulary['adjectives'] or not vocabulary['nouns']:
+            return jsonify({
+                'success': False,
+                'error': f"No words available for theme '{theme}'"
+            }), 400
+        
+        content_hash, _ = vocabulary['client']
+        response = jsonify({
+            'success': True,
+            'theme': vocabulary['theme'],
+            'hash': content_hash,
+            'url': url_for('api_vocabulary_content', content_hash=content_hash)
+        })
+        # Revalidated on every use, so a changed word list is picked up right away
+        response.headers['Cache-Control'] = 'no-cache'
+        response.set_etag(content_hash)
+        return response.make_conditional(request)
+    
+    except Exception as e:
+        app.logger.error(f"Vocabulary error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/vocabulary/<content_hash>', methods=['GET'])
+def api_vocabulary_content(content_hash):
+    """REST API endpoint serving a compiled client vocabulary, cacheable forever under its hash"""
+    body = find_client_vocabulary(content_hash)
+    if body is None:
+        return jsonify({'success': False, 'error': "Vocabulary not found"}), 404
+    
+    response = app.response_class(body, mimetype='application/json')
+    response.headers['Cache-Control'] = f'public, max-age={CLIENT_VOCABULARY_MAX_AGE}, immutable'
+    response.set_etag(content_hash)
+    return response.make_conditional(request)
+
+@app.route('/api/jobs', methods=['POST'])
+def api_create_job():
+    """REST API endpoint for enqueueing a background export job"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        
+        count = int(data.get('count', 1))
+        format_type = data.get('format', 'text')
+        params = {
+            'theme': data.get('theme', 'default'),
+            'pattern': data.get('pattern', 'adj-noun'),
+            'case': data.get('case', 'title'),
+            'separator': data.get('separator', ' '),
+            'min_length': int(data.get('min_length', 0)),
+            'max_length': int(data.get('max_length', 0)),
+            'min_total_length': int(data.get('min_total_length', 0)),
+            'max_total_length': int(data.get('max_total_length', 0)),
+            'reject_distance': int(data.get('reject_distance', 0)),
+            'reject_phonetic': parse_bool(data.get('reject_phonetic', False)),
+            'alliterate': parse_bool(data.get('alliterate', False)),
+            'initials': data.get('initials') or None,
+            'prefix': data.get('prefix') or None,
+            'secure': parse_bool(data.get('secure', False)),
+            'slug': parse_bool(data.get('slug', False)),
+            'exclude': sorted(parse_exclusion_list(data.getlist('exclude') if hasattr(data, 'getlist')
+                                                   else data.get('exclude'))),
+            'exclusion_profile': data.get('exclusion_profile') or None,
+            'format': format_type,
+            'unique': parse_bool(data.get('unique', False)),
+            'compress': parse_bool(data.get('compress', False)),
+        }
+        
+        if count < 1 or count > MAX_JOB_COUNT:
+            return jsonify({
+                'success': False,
+                'error': f"Count must be between 1 and {MAX_JOB_COUNT}"
+            }), 400
+        
+        if not 0 <= params['reject_distance'] <= MAX_REJECT_DISTANCE:
+            return jsonify({
+                'success': False,
+                'error': f"reject_distance must be between 0 and {MAX_REJECT_DISTANCE}"
+            }), 400
+        
+        if params['exclusion_profile']:
+            exclusion_profile_file(params['exclusion_profile'])
+        
+        if params['slug']:
+            params['separator'], params['max_total_length'] = slug_options(params['separator'],
+                                                                           params['max_total_length'])
+            params['case'] = 'lower'
+        
+        if format_type not in JOB_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': f"Unsupported format '{format_type}' (use one of: {', '.join(JOB_FORMATS)})"
+            }), 400
+        
+        # Unique jobs are checked against the combination space up front instead of
+        # running until they stall
+        if params['unique']:
+            if count > MAX_UNIQUE_JOB_COUNT:
+                return jsonify({
+                    'success': False,
+                    'error': f"Unique jobs are limited to {MAX_UNIQUE_JOB_COUNT} codenames"
+                }), 400
+            _, adjectives, nouns = job_words(params)
+            space = unique_space(adjectives, nouns, params)
+            if space < count:
+                return jsonify({
+                    'success': False,
+                    'error': f"Only {space} unique codenames are possible with these settings"
+                }), 400
+        
+        prune_jobs()
+        
+        job_id = uuid.uuid4().hex
+        extension = JOB_FORMATS[format_type][0] + ('.gz' if params['compress'] else '')
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'params': params,
+            'progress': 0,
+            'total': count,
+            'created': time.time(),
+            'finished': None,
+            'error': None,
+            'path': os.path.join(EXPORT_DIR, f"{job_id}.{extension}"),
+            'cancel': threading.Event(),
+            'future': None,
+        }
+        
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        with jobs_lock:
+            pending = sum(1 for j in jobs.values() if j['status'] in ('queued', 'running'))
+            if pending >= MAX_PENDING_JOBS:
+                return jsonify({
+                    'success': False,
+                    'error': "Too many export jobs in progress, try again later"
+                }), 429
+            # Submitted before it is published, so a cancel never sees a job without a future;
+            # the worker waits for jobs_lock before it starts
+            job['future'] = job_executor.submit(run_export_job, job)
+            jobs[job_id] = job
+        
+        return jsonify({
+            'success': True,
+            'job': job_view(job)
+        }), 202
+    
+    except Exception as e:
+        app.logger.error(f"API error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """REST API endpoint for polling an export job's progress"""
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': "Job not found"}), 404
+        view = job_view(job)
+    return jsonify({'success': True, 'job': view})
+
+@app.route('/api/jobs/<job_id>/download', methods=['GET'])
+def api_job_download(job_id):
+    """REST API endpoint for downloading a finished export job"""
+    with jobs_lock:
+        job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': "Job not found"}), 404
+    if job['status'] != 'completed':
+        return jsonify({
+            'success': False,
+            'error': f"Job is {job['status']}, not completed"
+        }), 409
+    
+    extension, mimetype = JOB_FORMATS[job['params']['format']]
+    download_name = f"codenames-{job_id}.{extension}"
+    if job['params']['compress']:
+        download_name += '.gz'
+        mimetype = 'application/gzip'
+    return send_file(job['path'], mimetype=mimetype, as_attachment=True, download_name=download_name)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def api_cancel_job(job_id):
+    """REST API endpoint for cancelling a job or discarding its export file"""
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': "Job not found"}), 404
+        job['cancel'].set()
+        discard = job['status'] in ('completed', 'failed', 'cancelled')
+        if job['status'] == 'queued' and job['future'].cancel():
+            job['status'] = 'cancelled'
+            job['finished'] = time.time()
+        elif discard:
+            del jobs[job_id]
+        view = job_view(job)
+    
+    if discard:
+        remove_job_file(job)
+    return jsonify({'success': True, 'job': view})
+
+@app.route('/api/favorites', methods=['GET'])
+def api_favorites():
+    """REST API endpoint for listing or searching favorites, one page at a time"""
+    try:
+        query = request.args.get('q', '')
+        match = request.args.get('match', 'substring')
+        theme = request.args.get('theme') or None
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', FAVORITES_PAGE_SIZE))
+        if offset < 0 or not 1 <= limit <= MAX_FAVORITES_PAGE_SIZE:
+            raise ValueError(f"offset must be at least 0 and limit between 1 and {MAX_FAVORITES_PAGE_SIZE}")
+        
+        with favorites_index_lock:
+            index = refresh_favorites_index()
+            ids = index.search(query, match, theme)
+            favorites = index.page(ids, offset, limit)
+    except (ValueError, sqlite3.Error) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    next_offset = offset + limit if offset + limit < len(ids) else None
+    return jsonify({
+        'success': True,
+        'favorites': favorites,
+        'total': len(ids),
+        'offset': offset,
+        'limit': limit,
+        'next_offset': next_offset
+    })
+
+@app.route('/api/favorites', methods=['POST'])
+def api_add_favorite():
+    """REST API endpoint for saving a favorite"""
+    data = request.get_json(silent=True) or request.form
+    name = str(data.get('name', '')).strip()
+    theme = data.get('theme') or None
+    if not name:
+        return jsonify({'success': False, 'error': "A favorite needs a name"}), 400
+    if theme == 'default':
+        theme = None
+    
+    try:
+        with favorites_index_lock, FavoritesStore(FAVORITES_FILE) as store:
+            added = store.add(name, theme)
+            index = refresh_favorites_index(store)
+            favorite = index.favorites.get(index.ids_by_name.get(name))
+    except sqlite3.Error as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if not added:
+        return jsonify({'success': False, 'error': f"'{name}' is already a favorite", 'favorite': favorite}), 409
+    return jsonify({'success': True, 'favorite': favorite}), 201
+
+@app.route('/api/favorites/<int:favorite_id>', methods=['DELETE'])
+def api_remove_favorite(favorite_id):
+    """REST API endpoint for removing a favorite"""
+    try:
+        with favorites_index_lock:
+            favorite = refresh_favorites_index().favorites.get(favorite_id)
+            if favorite is None:
+                return jsonify({'success': False, 'error': "Favorite not found"}), 404
+            with FavoritesStore(FAVORITES_FILE) as store:
+                store.remove(favorite['name'])
+                refresh_favorites_index(store)
+    except sqlite3.Error as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'favorite': favorite})
+
+@app.route('/api/admin/memory', methods=['GET'])
+def api_admin_memory():
+    """Admin endpoint reporting memory used by loaded vocabularies and caches"""
+    if not admin_allowed():
+        return jsonify({'success': False, 'error': "Forbidden"}), 403
+    
+    try:
+        top = int(request.args.get('top', 10))
+        
+        # Optionally load every theme first to see what preloading all of them costs
+        if parse_bool(request.args.get('load', False)):
+            for theme in ['default'] + theme_names():
+                get_vocabulary(theme)
+        
+        return jsonify({'success': True, 'memory': memory_report(top)})
+    
+    except Exception as e:
+        app.logger.error(f"Memory report error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/favicon.ico')
 def favicon():
     return send_from_directory(os.path.join(app.root_path, 'static'),
                                'favicon.ico', mimetype='image/vnd.microsoft.icon')
 
+# -------------------- Thread Scaling Benchmark ---------------------
+
+BENCHMARK_CHUNK_SIZE = 1000
+
+def benchmark_threads(thread_counts, total=200000, theme='default', secure=False):
+    """Time generating total codenames split across each number of threads
+    
+    Every thread draws chunks of BENCHMARK_CHUNK_SIZE codenames from the same
+    cached vocabulary snapshot, as concurrent /api/codenames requests do.
+    Returns (threads, seconds, codenames per second) for each thread count.
+    """
+    vocabulary = get_vocabulary(theme)
+    if not vocabulary['adjectives'] or not vocabulary['nouns']:
+        raise ValueError(f"No words available for theme '{theme}'")
+    
+    def work(share, barrier):
+        barrier.wait()
+        for start in range(0, share, BENCHMARK_CHUNK_SIZE):
+            codenames = generate_codename(
+                vocabulary['adjectives'], vocabulary['nouns'], count=min(BENCHMARK_CHUNK_SIZE, share - start),
+                blocklist=vocabulary['blocklist'], word_indexes=vocabulary['indexes'],
+                adjective_weights=vocabulary['adjective_weights'], noun_weights=vocabulary['noun_weights'],
+                alias_tables=vocabulary['alias_tables'], secure=secure)
+            if isinstance(codenames, dict):
+                raise ValueError(codenames['error'])
+    
+    work(BENCHMARK_CHUNK_SIZE, threading.Barrier(1))
+    results = []
+    for threads in thread_counts:
+        barrier = threading.Barrier(threads + 1)
+        shares = [total // threads + (i < total % threads) for i in range(threads)]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(work, share, barrier) for share in shares]
+            barrier.wait()
+            started = time.perf_counter()
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - started
+        results.append((threads, elapsed, total / elapsed))
+    return results
+
+def print_thread_benchmark(results, total, theme, secure):
+    """Print benchmark_threads() results with each thread count's speedup over the first"""
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"{total} codenames per run from theme '{theme}'{' (secure)' if secure else ''}, "
+          f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    print(f"{'Threads':>7}  {'Seconds':>8}  {'Codenames/s':>12}  {'Speedup':>7}")
+    for threads, elapsed, rate in results:
+        print(f"{threads:>7}  {elapsed:>8.3f}  {rate:>12,.0f}  {rate / results[0][2]:>6.2f}x")
+
 # Create the necessary directories when the server starts
 def create_required_directories():
-    """Create themes directory if it doesn't exist"""
+    """Create themes and export directories if they don't exist"""
     os.makedirs("themes", exist_ok=True)
     os.makedirs("static", exist_ok=True)
     os.makedirs("templates", exist_ok=True)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the SpySpeak web server')
+    parser.add_argument('--benchmark-threads', metavar='COUNTS',
+                        help='Instead of serving, measure generation throughput with these numbers of '
+                             'threads, e.g. "1,2,4,8"')
+    parser.add_argument('--benchmark-count', type=int, default=200000,
+                        help='Codenames generated at each thread count (default: 200000)')
+    parser.add_argument('--benchmark-theme', default='default', help='Theme to benchmark (default: default)')
+    parser.add_argument('--benchmark-secure', action='store_true', help='Benchmark secure generation')
+    args = parser.parse_args()
+    
+    if args.benchmark_threads:
+        try:
+            thread_counts = [int(count) for count in args.benchmark_threads.split(',')]
+            if min(thread_counts) < 1 or args.benchmark_count < 1:
+                raise ValueError("thread counts and --benchmark-count must be positive")
+            results = benchmark_threads(thread_counts, args.benchmark_count, args.benchmark_theme,
+                                        args.benchmark_secure)
+        except ValueError as e:
+            sys.stderr.write(f"Error: {str(e)}\n")
+            sys.exit(1)
+        print_thread_benchmark(results, args.benchmark_count, args.benchmark_theme, args.benchmark_secure)
+        sys.exit(0)
+    
     create_required_directories()
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=True, threaded=True)
\ No newline at end of file
@@ -3,36 +3,32 @@ import os
 import json
 import csv
 import sys
+import re
+import bisect
+import hashlib
+import math
+import sqlite3
+import tempfile
+import threading
+import time
 from io import StringIO
+from itertools import islice
 
 def load_words(filename):
     """
     Load words from a file, one word per line
+    (an optional tab-separated weight column is ignored)
     """
     try:
         with open(filename, 'r', encoding='utf-8') as file:
-            return [line.strip() for line in file if line.strip()]
+            return [word for word in (line.split('\t', 1)[0].strip() for line in file) if word]
     except FileNotFoundError:
         print(f"Error: Could not find the file '{filename}'")
         return []
 
-def save_favorites(favorites, filename="favorites.txt"):
-    """
-    Save favorite codenames to a file
-    """
-    try:
-        with open(filename, 'w', encoding='utf-8') as file:
-            for name in favorites:
-                file.write(f"{name}\n")
-        print(f"Successfully saved {len(favorites)} favorites to {filename}")
-        return True
-    except Exception as e:
-        print(f"Error saving favorites: {str(e)}")
-        return False
-
 def load_favorites(filename="favorites.txt"):
     """
-    Load favorite codenames from a file
+    Load favorite codenames from a text file (the store's legacy format)
     """
     if not os.path.exists(filename):
         print(f"No favorites file found at {filename}")
@@ -45,6 +41,95 @@ def load_favorites(filename="favorites.txt"):
         print(f"Error loading favorites: {str(e)}")
         return []
 
+FAVORITES_SCHEMA = """CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    theme TEXT,
+    added REAL NOT NULL
+)"""
+
+def favorites_store_path(filename):
+    """
+    Path of the favorites database for a favorites file (favorites.txt is kept in favorites.db)
+    """
+    root, extension = os.path.splitext(filename)
+    return root + ".db" if extension.lower() == ".txt" else filename
+
+class FavoritesStore:
+    """
+    Favorite codenames in a SQLite database
+    
+    The unique index on name makes the duplicate check and an add one
+    lookup instead of a rewrite of the whole file, and SQLite's locking
+    keeps adds from other processes (such as SpySpeak-cli.py) from being
+    lost. A legacy favorites.txt is imported the first time its database
+    is opened.
+    """
+    
+    def __init__(self, filename):
+        self.filename = favorites_store_path(filename)
+        created = not os.path.exists(self.filename)
+        self.connection = sqlite3.connect(self.filename, timeout=30, isolation_level=None)
+        self.connection.execute(FAVORITES_SCHEMA)
+        if created and self.filename != filename and os.path.exists(filename):
+            self.add_many(load_favorites(filename))
+    
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM favorites").fetchone()[0]
+    
+    def __iter__(self):
+        """Stream the favorite names in the order they were added"""
+        return (row[0] for row in self.connection.execute("SELECT name FROM favorites ORDER BY id"))
+    
+    def add(self, name, theme=None):
+        """Add a favorite; returns False if it was already saved"""
+        cursor = self.connection.execute("INSERT OR IGNORE INTO favorites (name, theme, added) VALUES (?, ?, ?)",
+                                         (name, theme, time.time()))
+        return cursor.rowcount == 1
+    
+    def add_many(self, names, theme=None):
+        """Add favorites in one transaction; returns how many were new"""
+        added = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO favorites (name, theme, added) VALUES (?, ?, ?)",
+                ((name, theme, added) for name in names))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+    
+    def remove(self, name):
+        """Remove a favorite; returns False if it wasn't saved"""
+        return self.connection.execute("DELETE FROM favorites WHERE name = ?", (name,)).rowcount == 1
+    
+    def close(self):
+        self.connection.close()
+
+def add_favorite(store, favorites, codename, theme=None):
+    """
+    Save a codename in the favorites store and the in-memory favorites list, unless it's already saved
+    """
+    codename = codename.strip()
+    if not codename:
+        print("A favorite can't be empty")
+        return False
+    
+    try:
+        added = store.add(codename, theme)
+    except sqlite3.Error as e:
+        print(f"Error saving favorites: {str(e)}")
+        return False
+    
+    if not added:
+        print(f"'{codename}' is already in your favorites")
+        return False
+    favorites.append(codename)
+    print(f"Added '{codename}' to favorites")
+    return True
+
 def load_exclusions(filename="exclusions.txt"):
     """
     Load exclusion words from a file
@@ -102,8 +187,486 @@ def filter_excluded_words(words, exclusions):
     
     return [word for word in words if word.lower() not in exclusions]
 
+class ExcludableWords:
+    """
+    A word list with exclusions applied incrementally
+    
+    The unfiltered base list stays in memory, indexed by lowercase word. The
+    filtered words are a list plus a map from base position to slot. Excluding
+    a word swaps its entries out of the list, and including it again appends
+    them. Only the changed words are touched, never the whole list or the disk.
+    """
+    
+    def __init__(self, base, exclusions=()):
+        self.base = base
+        self.positions = {}
+        for position, word in enumerate(base):
+            self.positions.setdefault(word.lower(), []).append(position)
+        self.reset()
+        self.exclude(exclusions)
+    
+    def reset(self):
+        """Drop every exclusion"""
+        self.words = list(self.base)
+        self._numbers = list(range(len(self.base)))
+        self._slots = list(self._numbers)
+    
+    def exclude(self, words):
+        """Remove words (lowercase) from the filtered list"""
+        for key in self.positions.keys() & set(words):
+            for position in self.positions[key]:
+                slot = self._slots[position]
+                if slot is None:
+                    continue
+                moved = self._numbers[-1]
+                self.words[slot] = self.words[-1]
+                self._numbers[slot] = moved
+                self._slots[moved] = slot
+                self.words.pop()
+                self._numbers.pop()
+                self._slots[position] = None
+    
+    def include(self, words):
+        """Put excluded words (lowercase) back into the filtered list"""
+        for key in self.positions.keys() & set(words):
+            for position in self.positions[key]:
+                if self._slots[position] is None:
+                    self._slots[position] = len(self.words)
+                    self.words.append(self.base[position])
+                    self._numbers.append(position)
+
+class ExclusionsWriter:
+    """
+    Saves the session's exclusions on a background thread
+    
+    save() only records the latest list. The thread writes it atomically
+    (a temporary file, then os.replace), so a burst of changes costs one
+    write and the menu never waits for the disk. Saving an empty list
+    removes the file. close() writes anything still pending; using the
+    writer as a context manager closes it on every exit path.
+    """
+    
+    def __init__(self, filename):
+        self.filename = filename
+        self.pending = None
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def save(self, words):
+        """Schedule words to be written, replacing any write still pending"""
+        with self.condition:
+            self.pending = list(words)
+            self.condition.notify()
+    
+    def close(self):
+        """Write pending changes and stop the thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+    
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                words, self.pending = self.pending, None
+            try:
+                self._write(words)
+            except OSError as e:
+                print(f"Error saving exclusions: {str(e)}")
+    
+    def _write(self, words):
+        if not words:
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            return
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tmp', delete=False,
+                                         dir=os.path.dirname(os.path.abspath(self.filename))) as file:
+            file.writelines(f"{word}\n" for word in words)
+        os.replace(file.name, self.filename)
+
+# Word slots used by each pattern, in output order
+PATTERN_SLOTS = {
+    "adj-noun": ("adj", "noun"),
+    "noun-noun": ("noun", "noun"),
+    "adj-adj-noun": ("adj", "adj", "noun"),
+    "noun-adj": ("noun", "adj"),
+    "adj-noun-number": ("adj", "noun", "number"),
+}
+
+# Values used for the number slot of the adj-noun-number pattern
+NUMBER_SLOT = [str(number) for number in range(1, 1000)]
+
+class TotalLengthSampler:
+    """Uniform sampler over combinations whose total length falls in a window
+    
+    Each slot's words are bucketed by length and the buckets are convolved
+    into count tables (suffix[j][r] = ways to fill slots j.. with r letters).
+    A draw picks the total length, then each slot's word length, weighted by
+    those counts, then a word from the bucket, so every qualifying combination
+    is equally likely and nothing is generated and thrown away.
+    """
+    
+    def __init__(self, slot_pools, separator_length=1, min_total=0, max_total=0):
+        self.buckets = []
+        for pool in slot_pools:
+            buckets = {}
+            for word in pool:
+                buckets.setdefault(len(word), []).append(word)
+            self.buckets.append(buckets)
+        
+        slot_count = len(self.buckets)
+        self.suffix = [None] * slot_count + [{0: 1}]
+        for j in reversed(range(slot_count)):
+            table = {}
+            for length, words in self.buckets[j].items():
+                for rest, ways in self.suffix[j + 1].items():
+                    table[length + rest] = table.get(length + rest, 0) + len(words) * ways
+            self.suffix[j] = table
+        
+        # Separators are a fixed part of the total length
+        fixed = separator_length * (slot_count - 1)
+        self.totals = sorted(total for total in self.suffix[0]
+                             if total + fixed >= min_total and (max_total <= 0 or total + fixed <= max_total))
+        self.cumulative = []
+        self.size = 0
+        for total in self.totals:
+            self.size += self.suffix[0][total]
+            self.cumulative.append(self.size)
+        self._length_tables = {}
+    
+    def _pick(self, cumulative, rng):
+        return bisect.bisect_right(cumulative, rng.randrange(cumulative[-1]))
+    
+    def _lengths_for(self, slot, remaining):
+        key = (slot, remaining)
+        if key not in self._length_tables:
+            lengths, cumulative, running = [], [], 0
+            for length, words in self.buckets[slot].items():
+                ways = len(words) * self.suffix[slot + 1].get(remaining - length, 0)
+                if ways:
+                    running += ways
+                    lengths.append(length)
+                    cumulative.append(running)
+            self._length_tables[key] = (lengths, cumulative)
+        return self._length_tables[key]
+    
+    def sample(self, rng=random):
+        """Draw one combination as a list of words, one per slot"""
+        remaining = self.totals[self._pick(self.cumulative, rng)]
+        parts = []
+        for slot in range(len(self.buckets)):
+            lengths, cumulative = self._lengths_for(slot, remaining)
+            length = lengths[self._pick(cumulative, rng)]
+            parts.append(rng.choice(self.buckets[slot][length]))
+            remaining -= length
+        return parts
+
+def normalize_for_blocklist(text):
+    """Lowercase text and drop everything but letters and digits"""
+    return ''.join(char for char in text.lower() if char.isalnum())
+
+class BlocklistMatcher:
+    """Aho-Corasick automaton that finds blocked substrings in linear time
+    
+    Patterns and checked text are both normalized with normalize_for_blocklist(),
+    so a pattern matches regardless of case or of the separator placed between
+    words: "bad word" blocks "Bad-Word", "BADWORD" and "Bad Wordsmith".
+    """
+    
+    def __init__(self, patterns):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.output = [None]
+        self.patterns = []
+        
+        for pattern in patterns:
+            pattern = normalize_for_blocklist(pattern)
+            if not pattern:
+                continue
+            self.patterns.append(pattern)
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            self.output[state] = pattern
+        
+        # Breadth-first pass to link each state to its longest proper suffix state
+        queue = list(self.transitions[0].values())
+        for state in queue:
+            for char, target in self.transitions[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.transitions[fallback].get(char, 0)
+                if self.output[target] is None:
+                    self.output[target] = self.output[self.fail[target]]
+                queue.append(target)
+    
+    def __len__(self):
+        return len(self.patterns)
+    
+    def search(self, text):
+        """Return the first blocked pattern found in text, or None"""
+        state = 0
+        for char in normalize_for_blocklist(text):
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            if self.output[state] is not None:
+                return self.output[state]
+        return None
+    
+    def matches(self, text):
+        """Check whether text contains any blocked pattern"""
+        return bool(self.patterns) and self.search(text) is not None
+
+def load_blocklist(filename):
+    """Load blocked substrings from a file and compile them into a matcher"""
+    if not os.path.exists(filename):
+        return None
+    
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            return BlocklistMatcher(line.strip() for line in file if line.strip())
+    except Exception as e:
+        print(f"Error loading blocklist: {str(e)}")
+        return None
+
+def filter_blocked_words(words, blocklist):
+    """Filter out words that contain a blocked substring"""
+    if not blocklist:
+        return words
+    
+    return [word for word in words if not blocklist.matches(word)]
+
+class PrefixIndex:
+    """Words sorted case-insensitively for first-letter and prefix lookups"""
+    
+    def __init__(self, words):
+        pairs = sorted((word.lower(), word) for word in words)
+        self.keys = [key for key, _ in pairs]
+        self.words = [word for _, word in pairs]
+        self.letters = sorted({key[:1] for key in self.keys if key})
+    
+    def starting_with(self, prefix):
+        """All words starting with prefix, ignoring case"""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\U0010ffff", start)
+        return self.words[start:end]
+
+class CombinationSampler:
+    """Uniform sampler over several disjoint sets of slot pools
+    
+    Each set gets its own TotalLengthSampler and sets are drawn in proportion
+    to how many combinations they hold, so every combination across all sets
+    is equally likely.
+    """
+    
+    def __init__(self, alternatives, separator_length=1, min_total=0, max_total=0):
+        self.samplers = []
+        self.cumulative = []
+        self.size = 0
+        for pools in alternatives:
+            sampler = TotalLengthSampler(pools, separator_length, min_total, max_total)
+            if sampler.size:
+                self.size += sampler.size
+                self.samplers.append(sampler)
+                self.cumulative.append(self.size)
+    
+    def sample(self, rng=random):
+        """Draw one combination as a list of words, one per slot"""
+        index = bisect.bisect_right(self.cumulative, rng.randrange(self.size))
+        return self.samplers[index].sample(rng)
+
+def letter_constrained_pools(slots, indexes, alliterate=False, initials=None, prefix=None):
+    """Slot pools that satisfy letter constraints, as a list of disjoint alternatives
+    
+    - alliterate: every word starts with the same letter (one alternative per letter)
+    - initials: word initials spell these letters, e.g. "B.F." (numbers are skipped)
+    - prefix: the first word starts with this prefix
+    """
+    word_slots = [i for i, slot in enumerate(slots) if slot != "number"]
+    required = {i: "" for i in word_slots}
+    
+    if initials:
+        letters = re.findall(r"[a-z]", initials.lower())
+        if len(letters) != len(word_slots):
+            raise ValueError(f"Initials '{initials}' need exactly {len(word_slots)} letters for this pattern")
+        for i, letter in zip(word_slots, letters):
+            required[i] = letter
+    
+    if prefix:
+        first = word_slots[0]
+        prefix = prefix.lower()
+        if not prefix.startswith(required[first]):
+            return []
+        required[first] = prefix
+    
+    if alliterate:
+        fixed = {required[i][0] for i in word_slots if required[i]}
+        if len(fixed) > 1:
+            return []
+        letters = fixed or set.intersection(*(set(indexes[slots[i]].letters) for i in word_slots))
+    else:
+        letters = {""}
+    
+    alternatives = []
+    for letter in sorted(letters):
+        pools = []
+        for i, slot in enumerate(slots):
+            if slot == "number":
+                pools.append(NUMBER_SLOT)
+            else:
+                pools.append(indexes[slot].starting_with(required[i] or letter))
+        alternatives.append(pools)
+    return alternatives
+
+def build_sampler(adjectives, nouns, pattern, separator, min_total_length=0, max_total_length=0,
+                  alliterate=False, initials=None, prefix=None, word_indexes=None, word_filter=None):
+    """Build a CombinationSampler for total length and letter constraints, or None if there are none
+    
+    word_indexes is an optional (adjective, noun) pair of prebuilt PrefixIndex
+    objects; word_filter then drops looked-up words the caller has filtered
+    out of adjectives and nouns since the indexes were built.
+    """
+    if not (min_total_length > 0 or max_total_length > 0 or alliterate or initials or prefix):
+        return None
+    
+    slots = PATTERN_SLOTS.get(pattern, PATTERN_SLOTS["adj-noun"])
+    if alliterate or initials or prefix:
+        if word_indexes is None:
+            word_indexes = (PrefixIndex(adjectives), PrefixIndex(nouns))
+            word_filter = None
+        indexes = {"adj": word_indexes[0], "noun": word_indexes[1]}
+        alternatives = letter_constrained_pools(slots, indexes, alliterate, initials, prefix)
+        if word_filter:
+            alternatives = [[pool if pool is NUMBER_SLOT else [word for word in pool if word_filter(word)]
+                             for pool in pools] for pools in alternatives]
+    else:
+        pools = {"adj": adjectives, "noun": nouns, "number": NUMBER_SLOT}
+        alternatives = [[pools[slot] for slot in slots]]
+    
+    return CombinationSampler(alternatives, len(separator), min_total_length, max_total_length)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+
+def word_file_entry(filename):
+    """
+    Manifest entry for a word file: word count, length range and histogram,
+    content hash, size and mtime
+    """
+    with open(filename, 'rb') as file:
+        content = file.read()
+    
+    lengths = {}
+    for line in content.decode('utf-8').splitlines():
+        word = line.split('\t', 1)[0].strip()
+        if word:
+            lengths[len(word)] = lengths.get(len(word), 0) + 1
+    
+    return {
+        'path': filename,
+        'words': sum(lengths.values()),
+        'weighted': b'\t' in content,
+        'min_length': min(lengths, default=0),
+        'max_length': max(lengths, default=0),
+        'lengths': {str(length): lengths[length] for length in sorted(lengths)},
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'bytes': len(content),
+        'mtime': os.path.getmtime(filename),
+    }
+
+def manifest_stamp(default_adjectives_file, default_nouns_file):
+    """
+    [path, mtime in nanoseconds, size] of the default word lists and every
+    theme word file (None where missing), so adding, removing, renaming or
+    editing any of them in place changes the stamp
+    """
+    paths = [default_adjectives_file, default_nouns_file]
+    try:
+        paths += sorted(os.path.join("themes", entry.name) for entry in os.scandir("themes")
+                        if entry.name.endswith(("_adj.txt", "_nouns.txt")))
+    except OSError:
+        pass
+    stamp = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamp.append([path, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            stamp.append([path, None, None])
+    return stamp
+
+def build_theme_manifest(default_adjectives_file, default_nouns_file):
+    """
+    Scan and read every theme's word files into a manifest with their entries
+    and the number of combinations each pattern can produce
+    """
+    stamp = manifest_stamp(default_adjectives_file, default_nouns_file)
+    word_files = [('default', default_adjectives_file, default_nouns_file)]
+    for theme in sorted(get_available_themes()):
+        word_files.append((theme, os.path.join("themes", f"{theme}_adj.txt"),
+                           os.path.join("themes", f"{theme}_nouns.txt")))
+    
+    themes = {}
+    for theme, adj_file, noun_file in word_files:
+        try:
+            entry = {'adjectives': word_file_entry(adj_file), 'nouns': word_file_entry(noun_file)}
+        except (OSError, UnicodeDecodeError):
+            continue
+        counts = {"adj": entry['adjectives']['words'], "noun": entry['nouns']['words'], "number": len(NUMBER_SLOT)}
+        entry['combinations'] = {pattern: math.prod(counts[slot] for slot in slots)
+                                 for pattern, slots in PATTERN_SLOTS.items()}
+        themes[theme] = entry
+    return {'version': MANIFEST_VERSION, 'stamp': stamp, 'themes': themes}
+
+def load_theme_manifest(default_adjectives_file, default_nouns_file, manifest_file=MANIFEST_FILE):
+    """
+    Read the theme manifest, rebuilding and saving it first if it is missing
+    or out of date (a theme file or a default word list changed)
+    """
+    stamp = manifest_stamp(default_adjectives_file, default_nouns_file)
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('stamp') == stamp:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    
+    manifest = build_theme_manifest(default_adjectives_file, default_nouns_file)
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tmp', delete=False,
+                                         dir=os.path.dirname(os.path.abspath(manifest_file))) as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(file.name, manifest_file)
+    except OSError as e:
+        print(f"Warning: Could not write manifest '{manifest_file}': {str(e)}")
+    return manifest
+
 def generate_codename(adjectives, nouns, count=1, exclusions=None, pattern="adj-noun", 
-                 case_style="title", min_length=0, max_length=0, separator=" "):
+                 case_style="title", min_length=0, max_length=0, separator=" ",
+                 min_total_length=0, max_total_length=0, blocklist=None,
+                 alliterate=False, initials=None, prefix=None):
     """
     Generate random codenames by combining adjectives and nouns
     with customizable patterns, case styles, and length constraints.
@@ -122,8 +685,20 @@ def generate_codename(adjectives, nouns, count=1, exclusions=None, pattern="adj-
     - "sentence": Sentence case (only first letter capitalized)
     
     Length constraints:
-    - min_length: Minimum total characters (0 = no minimum)
-    - max_length: Maximum total characters (0 = no maximum)
+    - min_length: Minimum characters per word (0 = no minimum)
+    - max_length: Maximum characters per word (0 = no maximum)
+    - min_total_length: Minimum total characters, separators included (0 = no minimum)
+    - max_total_length: Maximum total characters, separators included (0 = no maximum)
+    
+    Blocklist:
+    - blocklist: Optional BlocklistMatcher; combinations containing a blocked
+      substring once joined are skipped. If too many are, an error is printed
+      and fewer codenames than requested (possibly none) are returned
+    
+    Letter constraints:
+    - alliterate: All words start with the same letter
+    - initials: Word initials spell these letters, e.g. "B.F." (numbers are skipped)
+    - prefix: The first word starts with this prefix
     """
     if not adjectives or not nouns:
         return ["Could not generate codename due to missing word lists"]
@@ -148,10 +723,22 @@ def generate_codename(adjectives, nouns, count=1, exclusions=None, pattern="adj-
     if not adjectives or not nouns:
         return ["Could not generate codename: no words meet the length criteria"]
     
+    # Sample exactly from the combinations that fit the length and letter constraints
+    try:
+        sampler = build_sampler(adjectives, nouns, pattern, separator, min_total_length, max_total_length,
+                                alliterate, initials, prefix)
+    except ValueError as e:
+        return [f"Could not generate codename: {str(e)}"]
+    if sampler is not None and not sampler.size:
+        return ["Could not generate codename: no combinations meet the length and letter constraints"]
+    
     codenames = []
-    for _ in range(count):
+    rejected = 0
+    while len(codenames) < count:
         # Generate based on pattern
-        if pattern == "adj-noun":
+        if sampler:
+            raw_name = separator.join(sampler.sample())
+        elif pattern == "adj-noun":
             adj = random.choice(adjectives)
             noun = random.choice(nouns)
             raw_name = f"{adj}{separator}{noun}"
@@ -179,6 +766,15 @@ def generate_codename(adjectives, nouns, count=1, exclusions=None, pattern="adj-
             noun = random.choice(nouns)
             raw_name = f"{adj}{separator}{noun}"
         
+        # Reject combinations that only form a blocked substring once joined
+        if blocklist and blocklist.matches(raw_name):
+            rejected += 1
+            if rejected > max(1000, 10 * count):
+                print(f"Error: Only {len(codenames)} of {count} codename(s) generated, "
+                      "too many combinations matched the blocklist")
+                return codenames
+            continue
+        
         # Apply case style
         if case_style == "upper":
             formatted_name = raw_name.upper()
@@ -195,47 +791,113 @@ def generate_codename(adjectives, nouns, count=1, exclusions=None, pattern="adj-
     
     return codenames
 
+OUTPUT_CHUNK_SIZE = 10000
+
+def output_chunks(codenames):
+    """
+    Split any iterable of codenames into lists of at most OUTPUT_CHUNK_SIZE names
+    """
+    iterator = iter(codenames)
+    while chunk := list(islice(iterator, OUTPUT_CHUNK_SIZE)):
+        yield chunk
+
+def json_strings(names, separator):
+    """
+    Encode names as JSON strings joined by separator, exactly as json.dumps() writes each one
+    
+    Generated codenames are printable ASCII without quotes or backslashes,
+    which JSON needs no escapes for, so after one scan of the joined text
+    they are quoted with a single join. Anything else goes through json's
+    C string encoder.
+    """
+    text = "".join(names)
+    if text.isascii() and text.isprintable() and '"' not in text and "\\" not in text:
+        return '"' + f'"{separator}"'.join(names) + '"' if names else ""
+    return separator.join(map(json.encoder.encode_basestring_ascii, names))
+
+def csv_rows(names):
+    """
+    Encode names as one-column CSV rows, exactly as csv.writer() writes them
+    """
+    text = "".join(names)
+    if all(names) and not any(char in text for char in ',"\r\n'):
+        return "\r\n".join(names) + "\r\n" if names else ""
+    output = StringIO()
+    csv.writer(output).writerows([name] for name in names)
+    return output.getvalue()
+
 def format_output(codenames, format_type="text"):
     """
     Format codenames in various output formats
     """
     if format_type == "json":
-        return json.dumps({"codenames": codenames}, indent=2)
+        if not codenames:
+            return '{\n  "codenames": []\n}'
+        return '{\n  "codenames": [\n    ' + json_strings(codenames, ",\n    ") + "\n  ]\n}"
     
     elif format_type == "csv":
-        output = StringIO()
-        csv_writer = csv.writer(output)
-        csv_writer.writerow(["Codename"])
-        for name in codenames:
-            csv_writer.writerow([name])
-        return output.getvalue()
+        return "Codename\r\n" + csv_rows(codenames)
     
     elif format_type == "html":
         html = "<html>\n<head><title>Generated Codenames</title></head>\n<body>\n"
         html += "<h1>Generated Codenames</h1>\n<ul>\n"
-        for name in codenames:
-            html += f"  <li>{name}</li>\n"
+        if codenames:
+            html += "  <li>" + "</li>\n  <li>".join(codenames) + "</li>\n"
         html += "</ul>\n</body>\n</html>"
         return html
     
     else:  # Default to plain text
         return "\n".join(codenames)
 
+def write_output(codenames, file, format_type="text"):
+    """
+    Write codenames to a file exactly as format_output() formats them, one chunk at a time
+    """
+    count = 0
+    if format_type == "json":
+        file.write('{\n  "codenames": [')
+        for chunk in output_chunks(codenames):
+            file.write((",\n    " if count else "\n    ") + json_strings(chunk, ",\n    "))
+            count += len(chunk)
+        file.write("\n  ]\n}" if count else "]\n}")
+    
+    elif format_type == "csv":
+        file.write("Codename\r\n")
+        for chunk in output_chunks(codenames):
+            file.write(csv_rows(chunk))
+            count += len(chunk)
+    
+    elif format_type == "html":
+        file.write("<html>\n<head><title>Generated Codenames</title></head>\n<body>\n")
+        file.write("<h1>Generated Codenames</h1>\n<ul>\n")
+        for chunk in output_chunks(codenames):
+            file.write("  <li>" + "</li>\n  <li>".join(chunk) + "</li>\n")
+            count += len(chunk)
+        file.write("</ul>\n</body>\n</html>")
+    
+    else:  # Default to plain text
+        for chunk in output_chunks(codenames):
+            file.write(("\n" if count else "") + "\n".join(chunk))
+            count += len(chunk)
+    
+    return count
+
 def export_favorites(favorites, format_type, filename=None):
     """
     Export favorites in various formats
-    """
-    output = format_output(favorites, format_type)
     
-    if filename:
-        try:
-            with open(filename, 'w', encoding='utf-8') as file:
-                file.write(output)
-            print(f"Successfully exported {len(favorites)} favorites to {filename}")
-        except Exception as e:
-            print(f"Error exporting favorites: {str(e)}")
+    With a filename, favorites (a list or a FavoritesStore) are streamed to
+    the file; otherwise the formatted output is returned.
+    """
+    if not filename:
+        return format_output(list(favorites), format_type)
     
-    return output
+    try:
+        with open(filename, 'w', encoding='utf-8', newline='' if format_type == 'csv' else None) as file:
+            count = write_output(favorites, file, format_type)
+        print(f"Successfully exported {count} favorites to {filename}")
+    except Exception as e:
+        print(f"Error exporting favorites: {str(e)}")
 
 def display_help():
     """
@@ -260,6 +922,11 @@ def display_help():
     print("You can create an 'exclusions.txt' file with words to exclude from codename generation.")
     print("Put one word per line in this file.")
     
+    print("\nBlocklist:")
+    print("A 'blocklist.txt' file lists substrings that must never appear, one per line.")
+    print("Words containing them are removed, and so are codenames that only form")
+    print("a blocked substring once their words are joined.")
+    
     print("\nOutput Formats:")
     print("Codenames can be exported in text, JSON, CSV, and HTML formats.")
     
@@ -278,10 +945,16 @@ def display_help():
     
     print("\nWord Length Limits:")
     print("You can set minimum and maximum length for words used in codenames.")
-    print("This helps control the overall length of generated codenames.")
+    print("You can also limit the total length of the whole codename, separators included,")
+    print("which is useful when codenames must fit hostname or tag length limits.")
     
     print("\nSeparators:")
     print("You can choose different separators between words: space, hyphen, underscore, etc.")
+    
+    print("\nLetter Constraints:")
+    print("- Alliteration: all words start with the same letter (e.g., 'Brave Bear')")
+    print("- Initials: word initials spell given letters (e.g., 'B.F.' gives 'Brave Falcon')")
+    print("- Prefix: the first word starts with given letters")
 
 def main():
     # Initialize variables
@@ -294,13 +967,19 @@ def main():
     case_style = "title"
     min_length = 0
     max_length = 0
+    min_total_length = 0
+    max_total_length = 0
     separator = " "
+    alliterate = False
+    initials = None
+    prefix = None
     
     # File paths
     current_dir = os.path.dirname(os.path.abspath(__file__))
     adj_file = os.path.join(current_dir, "adjectives.txt")
     noun_file = os.path.join(current_dir, "nouns.txt")
     exclusions_file = os.path.join(current_dir, "exclusions.txt")
+    blocklist_file = os.path.join(current_dir, "blocklist.txt")
     
     # Create themes directory if it doesn't exist
     themes_dir = os.path.join(current_dir, "themes")
@@ -331,409 +1010,471 @@ def main():
         print(f"Error: No nouns loaded from {noun_file}")
         return
     
-    # Load exclusions if they exist
+    # Load exclusions if they exist; changes are saved in the background
     if os.path.exists(exclusions_file):
         exclusions = load_exclusions(exclusions_file)
         print(f"Loaded {len(exclusions)} excluded words")
+    with ExclusionsWriter(exclusions_file) as exclusions_writer:
         
-        # Apply exclusions
-        adjectives = filter_excluded_words(adjectives, exclusions)
-        nouns = filter_excluded_words(nouns, exclusions)
-    
-    # Load favorites if they exist
-    favorites_file = os.path.join(current_dir, "favorites.txt")
-    if os.path.exists(favorites_file):
-        favorites = load_favorites(favorites_file)
-        print(f"Loaded {len(favorites)} favorites")
-    
-    print(f"Loaded {len(adjectives)} adjectives and {len(nouns)} nouns")
-    
-    # Generate a sample codename immediately to verify functionality
-    sample_codename = generate_codename(adjectives, nouns)[0]
-    print(f"Sample codename: {sample_codename}")
-    
-    # Basic UI loop
-    while True:
-        try:
-            print("\nCodename Generator Options:")
-            print("1. Generate a single codename")
-            print("2. Generate multiple codenames")
-            print("3. View favorites")
-            print("4. Manage favorites")
-            print("5. Change settings")
-            print("6. Help")
-            print("7. Exit")
-            
-            choice = input("Enter your choice (1-7): ")
-            
-            if choice == '1':
-                # Generate a single codename with current settings
-                codename = generate_codename(
-                    adjectives, nouns, 
-                    pattern=pattern, 
-                    case_style=case_style, 
-                    min_length=min_length, 
-                    max_length=max_length, 
-                    separator=separator,
-                    exclusions=exclusions
-                )[0]
-                print(f"\nYour codename is: {codename}")
+        # Load the substring blocklist and prune words that contain a blocked substring
+        blocklist = load_blocklist(blocklist_file)
+        if blocklist:
+            print(f"Loaded {len(blocklist)} blocklist patterns")
+            adjectives = filter_blocked_words(adjectives, blocklist)
+            nouns = filter_blocked_words(nouns, blocklist)
+        
+        # Keep the unfiltered words in memory so exclusions can change without reloading them
+        adjective_words = ExcludableWords(adjectives, exclusions)
+        noun_words = ExcludableWords(nouns, exclusions)
+        adjectives, nouns = adjective_words.words, noun_words.words
+        
+        # Open the favorites store (a legacy favorites.txt is imported into favorites.db)
+        favorites_file = os.path.join(current_dir, "favorites.txt")
+        favorites_store = FavoritesStore(favorites_file)
+        favorites = list(favorites_store)
+        if favorites:
+            print(f"Loaded {len(favorites)} favorites")
+        
+        print(f"Loaded {len(adjectives)} adjectives and {len(nouns)} nouns")
+        
+        # Generate a sample codename immediately to verify functionality
+        sample_codenames = generate_codename(adjectives, nouns, blocklist=blocklist)
+        if sample_codenames:
+            print(f"Sample codename: {sample_codenames[0]}")
+        
+        # Basic UI loop
+        while True:
+            try:
+                print("\nCodename Generator Options:")
+                print("1. Generate a single codename")
+                print("2. Generate multiple codenames")
+                print("3. View favorites")
+                print("4. Manage favorites")
+                print("5. Change settings")
+                print("6. Help")
+                print("7. Exit")
                 
-                # Ask if user wants to save to favorites
-                save_choice = input("Add this to favorites? (y/n): ").lower()
-                if save_choice == 'y':
-                    favorites.append(codename)
-                    save_favorites(favorites, favorites_file)
-            
-            elif choice == '2':
-                try:
-                    count = int(input("How many codenames do you want to generate? "))
-                    if count < 1:
-                        print("Please enter a positive number")
-                        continue
-                    
-                    format_type = "text"
-                    format_choice = input("Output format (text/json/csv/html) [text]: ").lower()
-                    if format_choice in ['json', 'csv', 'html']:
-                        format_type = format_choice
-                        
+                choice = input("Enter your choice (1-7): ")
+                
+                if choice == '1':
+                    # Generate a single codename with current settings
                     codenames = generate_codename(
-                        adjectives, nouns, count,
+                        adjectives, nouns, 
                         pattern=pattern, 
                         case_style=case_style, 
                         min_length=min_length, 
                         max_length=max_length, 
+                        min_total_length=min_total_length,
+                        max_total_length=max_total_length,
+                        alliterate=alliterate,
+                        initials=initials,
+                        prefix=prefix,
                         separator=separator,
-                        exclusions=exclusions
+                        blocklist=blocklist
                     )
+                    if not codenames:
+                        continue
+                    codename = codenames[0]
+                    print(f"\nYour codename is: {codename}")
                     
-                    # Format and display according to chosen format
-                    output = format_output(codenames, format_type)
-                    print("\nYour codenames are:")
-                    print(output)
-                    
-                    # Ask if user wants to save to a file
-                    save_choice = input("Save output to file? (y/n): ").lower()
+                    # Ask if user wants to save to favorites
+                    save_choice = input("Add this to favorites? (y/n): ").lower()
                     if save_choice == 'y':
-                        filename = input("Enter filename: ")
-                        try:
-                            with open(filename, 'w', encoding='utf-8') as file:
-                                file.write(output)
-                            print(f"Output saved to {filename}")
-                        except Exception as e:
-                            print(f"Error saving file: {str(e)}")
-                    
-                except ValueError:
-                    print("Please enter a valid number")
-            
-            elif choice == '3':
-                # View favorites
-                if not favorites:
-                    print("You have no saved favorites.")
-                    continue
-                
-                print("\nYour favorite codenames:")
-                for i, name in enumerate(favorites, 1):
-                    print(f"{i}. {name}")
-            
-            elif choice == '4':
-                # Manage favorites
-                if not favorites:
-                    print("You have no saved favorites.")
-                    add_new = input("Would you like to add a new favorite? (y/n): ").lower()
-                    if add_new == 'y':
-                        new_name = input("Enter a codename to add to favorites: ")
-                        favorites.append(new_name)
-                        save_favorites(favorites, favorites_file)
-                    continue
-                
-                print("\nFavorites Management:")
-                print("1. Add a new favorite")
-                print("2. Remove a favorite")
-                print("3. Export favorites")
-                print("4. Back to main menu")
+                        add_favorite(favorites_store, favorites, codename, current_theme)
                 
-                fav_choice = input("Enter your choice (1-4): ")
-                
-                if fav_choice == '1':
-                    new_name = input("Enter a codename to add to favorites: ")
-                    favorites.append(new_name)
-                    save_favorites(favorites, favorites_file)
-                
-                elif fav_choice == '2':
-                    print("\nYour favorite codenames:")
-                    for i, name in enumerate(favorites, 1):
-                        print(f"{i}. {name}")
-                    
+                elif choice == '2':
                     try:
-                        remove_idx = int(input("Enter the number of the favorite to remove: ")) - 1
-                        if 0 <= remove_idx < len(favorites):
-                            removed = favorites.pop(remove_idx)
-                            save_favorites(favorites, favorites_file)
-                            print(f"Removed '{removed}' from favorites")
-                        else:
-                            print("Invalid number")
+                        count = int(input("How many codenames do you want to generate? "))
+                        if count < 1:
+                            print("Please enter a positive number")
+                            continue
+                        
+                        format_type = "text"
+                        format_choice = input("Output format (text/json/csv/html) [text]: ").lower()
+                        if format_choice in ['json', 'csv', 'html']:
+                            format_type = format_choice
+                            
+                        codenames = generate_codename(
+                            adjectives, nouns, count,
+                            pattern=pattern, 
+                            case_style=case_style, 
+                            min_length=min_length, 
+                            max_length=max_length, 
+                            min_total_length=min_total_length,
+                            max_total_length=max_total_length,
+                            alliterate=alliterate,
+                            initials=initials,
+                            prefix=prefix,
+                            separator=separator,
+                            blocklist=blocklist
+                        )
+                        if not codenames:
+                            continue
+                        
+                        # Format and display according to chosen format
+                        output = format_output(codenames, format_type)
+                        print("\nYour codenames are:")
+                        print(output)
+                        
+                        # Ask if user wants to save to a file
+                        save_choice = input("Save output to file? (y/n): ").lower()
+                        if save_choice == 'y':
+                            filename = input("Enter filename: ")
+                            try:
+                                with open(filename, 'w', encoding='utf-8') as file:
+                                    file.write(output)
+                                print(f"Output saved to {filename}")
+                            except Exception as e:
+                                print(f"Error saving file: {str(e)}")
+                        
                     except ValueError:
                         print("Please enter a valid number")
                 
-                elif fav_choice == '3':
-                    format_type = "text"
-                    format_choice = input("Export format (text/json/csv/html) [text]: ").lower()
-                    if format_choice in ['json', 'csv', 'html']:
-                        format_type = format_choice
+                elif choice == '3':
+                    # View favorites
+                    if not favorites:
+                        print("You have no saved favorites.")
+                        continue
                     
-                    filename = input("Enter export filename: ")
-                    export_favorites(favorites, format_type, filename)
-                
-                elif fav_choice == '4':
-                    continue
-                
-                else:
-                    print("Invalid choice")
-            
-            elif choice == '5':
-                # Change settings
-                print("\nSettings:")
-                print("1. Change theme")
-                print("2. Manage exclusions")
-                print("3. Configure codename pattern")
-                print("4. Configure text case style")
-                print("5. Configure word length limits")
-                print("6. Configure separator")
-                print("7. Back to main menu")
-                
-                settings_choice = input("Enter your choice (1-7): ")
+                    print("\nYour favorite codenames:")
+                    for i, name in enumerate(favorites, 1):
+                        print(f"{i}. {name}")
                 
-                if settings_choice == '1':
-                    # Change theme
-                    themes = get_available_themes()
-                    
-                    if not themes:
-                        print("No themes found. Would you like to create a new theme?")
-                        create_theme = input("Create new theme? (y/n): ").lower()
-                        if create_theme == 'y':
-                            theme_name = input("Enter theme name: ")
-                            os.makedirs(os.path.join(themes_dir, theme_name), exist_ok=True)
-                            print(f"Created theme directory. Please add {theme_name}_adj.txt and {theme_name}_nouns.txt files.")
+                elif choice == '4':
+                    # Manage favorites
+                    if not favorites:
+                        print("You have no saved favorites.")
+                        add_new = input("Would you like to add a new favorite? (y/n): ").lower()
+                        if add_new == 'y':
+                            new_name = input("Enter a codename to add to favorites: ")
+                            add_favorite(favorites_store, favorites, new_name)
                         continue
                     
-                    print("\nAvailable themes:")
-                    print("0. Default (no theme)")
-                    for i, theme in enumerate(themes, 1):
-                        print(f"{i}. {theme}")
-                    
-                    try:
-                        theme_choice = int(input("Enter theme number: "))
-                        if theme_choice == 0:
-                            # Reset to default
-                            current_theme = None
-                            adjectives = load_words(adj_file)
-                            nouns = load_words(noun_file)
-                            adjectives = filter_excluded_words(adjectives, exclusions)
-                            nouns = filter_excluded_words(nouns, exclusions)
-                            print("Switched to default word lists")
-                        elif 1 <= theme_choice <= len(themes):
-                            selected_theme = themes[theme_choice-1]
-                            theme_adjectives, theme_nouns = load_themed_words(selected_theme)
-                            
-                            if theme_adjectives and theme_nouns:
-                                current_theme = selected_theme
-                                adjectives = filter_excluded_words(theme_adjectives, exclusions)
-                                nouns = filter_excluded_words(theme_nouns, exclusions)
-                                print(f"Switched to theme: {current_theme}")
-                                print(f"Loaded {len(adjectives)} adjectives and {len(nouns)} nouns")
-                        else:
-                            print("Invalid theme number")
-                    except ValueError:
-                        print("Please enter a valid number")
-                
-                elif settings_choice == '2':
-                    # Manage exclusions
-                    print("\nExclusions Management:")
-                    print("1. View current exclusions")
-                    print("2. Add exclusion words")
-                    print("3. Clear all exclusions")
-                    print("4. Back to settings")
+                    print("\nFavorites Management:")
+                    print("1. Add a new favorite")
+                    print("2. Remove a favorite")
+                    print("3. Export favorites")
+                    print("4. Back to main menu")
                     
-                    excl_choice = input("Enter your choice (1-4): ")
+                    fav_choice = input("Enter your choice (1-4): ")
                     
-                    if excl_choice == '1':
-                        if not exclusions:
-                            print("No exclusions set.")
-                        else:
-                            print("\nCurrent exclusions:")
-                            for i, word in enumerate(exclusions, 1):
-                                print(f"{i}. {word}")
+                    if fav_choice == '1':
+                        new_name = input("Enter a codename to add to favorites: ")
+                        add_favorite(favorites_store, favorites, new_name)
                     
-                    elif excl_choice == '2':
-                        new_exclusions = input("Enter words to exclude (comma separated): ")
-                        new_words = [word.strip().lower() for word in new_exclusions.split(',')]
+                    elif fav_choice == '2':
+                        print("\nYour favorite codenames:")
+                        for i, name in enumerate(favorites, 1):
+                            print(f"{i}. {name}")
                         
-                        for word in new_words:
-                            if word and word not in exclusions:
-                                exclusions.append(word)
-                        
-                        # Save exclusions to file
                         try:
-                            with open(exclusions_file, 'w', encoding='utf-8') as file:
-                                for word in exclusions:
-                                    file.write(f"{word}\n")
-                            print(f"Added {len(new_words)} words to exclusions")
-                            
-                            # Re-apply exclusions to current word lists
-                            if current_theme:
-                                theme_adjectives, theme_nouns = load_themed_words(current_theme)
-                                adjectives = filter_excluded_words(theme_adjectives, exclusions)
-                                nouns = filter_excluded_words(theme_nouns, exclusions)
+                            remove_idx = int(input("Enter the number of the favorite to remove: ")) - 1
+                            if 0 <= remove_idx < len(favorites):
+                                removed = favorites.pop(remove_idx)
+                                favorites_store.remove(removed)
+                                print(f"Removed '{removed}' from favorites")
                             else:
-                                adjectives = load_words(adj_file)
-                                nouns = load_words(noun_file)
-                                adjectives = filter_excluded_words(adjectives, exclusions)
-                                nouns = filter_excluded_words(nouns, exclusions)
-                            
-                            print(f"Updated to {len(adjectives)} adjectives and {len(nouns)} nouns after applying exclusions")
-                            
-                        except Exception as e:
-                            print(f"Error saving exclusions: {str(e)}")
+                                print("Invalid number")
+                        except ValueError:
+                            print("Please enter a valid number")
                     
-                    elif excl_choice == '3':
-                        confirm = input("Are you sure you want to clear all exclusions? (y/n): ").lower()
-                        if confirm == 'y':
-                            exclusions = []
-                            if os.path.exists(exclusions_file):
-                                os.remove(exclusions_file)
-                            print("All exclusions cleared")
-                            
-                            # Reset word lists without exclusions
-                            if current_theme:
-                                adjectives, nouns = load_themed_words(current_theme)
-                            else:
-                                adjectives = load_words(adj_file)
-                                nouns = load_words(noun_file)
-                            
-                            print(f"Updated to {len(adjectives)} adjectives and {len(nouns)} nouns after clearing exclusions")
+                    elif fav_choice == '3':
+                        format_type = "text"
+                        format_choice = input("Export format (text/json/csv/html) [text]: ").lower()
+                        if format_choice in ['json', 'csv', 'html']:
+                            format_type = format_choice
+                        
+                        filename = input("Enter export filename: ")
+                        export_favorites(favorites_store, format_type, filename)
                     
-                    elif excl_choice == '4':
+                    elif fav_choice == '4':
                         continue
                     
                     else:
                         print("Invalid choice")
                 
-                elif settings_choice == '3':
-                    # Configure codename pattern
-                    print("\nCodername Pattern:")
-                    print("1. adj-noun (Adjective + Noun)")
-                    print("2. noun-noun (Noun + Noun)")
-                    print("3. adj-adj-noun (Adjective + Adjective + Noun)")
-                    print("4. noun-adj (Noun + Adjective)")
-                    print("5. adj-noun-number (Adjective + Noun + Number)")
+                elif choice == '5':
+                    # Change settings
+                    print("\nSettings:")
+                    print("1. Change theme")
+                    print("2. Manage exclusions")
+                    print("3. Configure codename pattern")
+                    print("4. Configure text case style")
+                    print("5. Configure word length limits")
+                    print("6. Configure separator")
+                    print("7. Configure letter constraints")
+                    print("8. Back to main menu")
                     
-                    pattern_choice = input("Enter your choice (1-5): ")
-                    if pattern_choice == '1':
-                        pattern = "adj-noun"
-                    elif pattern_choice == '2':
-                        pattern = "noun-noun"
-                    elif pattern_choice == '3':
-                        pattern = "adj-adj-noun"
-                    elif pattern_choice == '4':
-                        pattern = "noun-adj"
-                    elif pattern_choice == '5':
-                        pattern = "adj-noun-number"
-                    else:
-                        print("Invalid choice, keeping current pattern")
+                    settings_choice = input("Enter your choice (1-8): ")
                     
-                    print(f"Pattern set to: {pattern}")
-                
-                elif settings_choice == '4':
-                    # Configure text case style
-                    print("\nText Case Style:")
-                    print("1. Title Case (First Letter Of Each Word Capitalized)")
-                    print("2. UPPERCASE (ALL LETTERS CAPITALIZED)")
-                    print("3. lowercase (all letters lowercase)")
-                    print("4. Sentence case (Only first letter capitalized)")
+                    if settings_choice == '1':
+                        # Change theme
+                        manifest = load_theme_manifest(adj_file, noun_file)
+                        themes = sorted(theme for theme in manifest['themes'] if theme != 'default')
+                        
+                        if not themes:
+                            print("No themes found. Would you like to create a new theme?")
+                            create_theme = input("Create new theme? (y/n): ").lower()
+                            if create_theme == 'y':
+                                theme_name = input("Enter theme name: ")
+                                os.makedirs(os.path.join(themes_dir, theme_name), exist_ok=True)
+                                print(f"Created theme directory. Please add {theme_name}_adj.txt and {theme_name}_nouns.txt files.")
+                            continue
+                        
+                        print("\nAvailable themes:")
+                        print("0. Default (no theme)")
+                        for i, theme in enumerate(themes, 1):
+                            entry = manifest['themes'][theme]
+                            print(f"{i}. {theme} ({entry['adjectives']['words']} adjectives, "
+                                  f"{entry['nouns']['words']} nouns)")
+                        
+                        try:
+                            theme_choice = int(input("Enter theme number: "))
+                            if theme_choice == 0:
+                                # Reset to default
+                                current_theme = None
+                                adjective_words = ExcludableWords(filter_blocked_words(load_words(adj_file), blocklist),
+                                                                  exclusions)
+                                noun_words = ExcludableWords(filter_blocked_words(load_words(noun_file), blocklist),
+                                                             exclusions)
+                                adjectives, nouns = adjective_words.words, noun_words.words
+                                print("Switched to default word lists")
+                            elif 1 <= theme_choice <= len(themes):
+                                selected_theme = themes[theme_choice-1]
+                                theme_adjectives, theme_nouns = load_themed_words(selected_theme)
+                                
+                                if theme_adjectives and theme_nouns:
+                                    current_theme = selected_theme
+                                    adjective_words = ExcludableWords(filter_blocked_words(theme_adjectives, blocklist),
+                                                                      exclusions)
+                                    noun_words = ExcludableWords(filter_blocked_words(theme_nouns, blocklist), exclusions)
+                                    adjectives, nouns = adjective_words.words, noun_words.words
+                                    print(f"Switched to theme: {current_theme}")
+                                    print(f"Loaded {len(adjectives)} adjectives and {len(nouns)} nouns")
+                            else:
+                                print("Invalid theme number")
+                        except ValueError:
+                            print("Please enter a valid number")
                     
-                    case_choice = input("Enter your choice (1-4): ")
-                    if case_choice == '1':
-                        case_style = "title"
-                    elif case_choice == '2':
-                        case_style = "upper"
-                    elif case_choice == '3':
-                        case_style = "lower"
-                    elif case_choice == '4':
-                        case_style = "sentence"
-                    else:
-                        print("Invalid choice, keeping current case style")
+                    elif settings_choice == '2':
+                        # Manage exclusions
+                        print("\nExclusions Management:")
+                        print("1. View current exclusions")
+                        print("2. Add exclusion words")
+                        print("3. Remove exclusion words")
+                        print("4. Clear all exclusions")
+                        print("5. Back to settings")
+                        
+                        excl_choice = input("Enter your choice (1-5): ")
+                        
+                        if excl_choice == '1':
+                            if not exclusions:
+                                print("No exclusions set.")
+                            else:
+                                print("\nCurrent exclusions:")
+                                for i, word in enumerate(exclusions, 1):
+                                    print(f"{i}. {word}")
+                        
+                        elif excl_choice == '2':
+                            new_exclusions = input("Enter words to exclude (comma separated): ")
+                            excluded = set(exclusions)
+                            entered = dict.fromkeys(word.strip().lower() for word in new_exclusions.split(','))
+                            new_words = [word for word in entered if word and word not in excluded]
+                            exclusions.extend(new_words)
+                            
+                            # Only the new words are looked up and taken out of the current word lists
+                            adjective_words.exclude(new_words)
+                            noun_words.exclude(new_words)
+                            exclusions_writer.save(exclusions)
+                            print(f"Added {len(new_words)} words to exclusions")
+                            print(f"Updated to {len(adjectives)} adjectives and {len(nouns)} nouns after applying exclusions")
+                        
+                        elif excl_choice == '3':
+                            removals = input("Enter words to stop excluding (comma separated): ")
+                            removed = {word.strip().lower() for word in removals.split(',')} & set(exclusions)
+                            exclusions = [word for word in exclusions if word not in removed]
+                            
+                            adjective_words.include(removed)
+                            noun_words.include(removed)
+                            exclusions_writer.save(exclusions)
+                            print(f"Removed {len(removed)} words from exclusions")
+                            print(f"Updated to {len(adjectives)} adjectives and {len(nouns)} nouns after removing exclusions")
+                        
+                        elif excl_choice == '4':
+                            confirm = input("Are you sure you want to clear all exclusions? (y/n): ").lower()
+                            if confirm == 'y':
+                                exclusions = []
+                                exclusions_writer.save(exclusions)
+                                print("All exclusions cleared")
+                                
+                                # Restore the word lists from the unfiltered words kept in memory
+                                adjective_words.reset()
+                                noun_words.reset()
+                                adjectives, nouns = adjective_words.words, noun_words.words
+                                
+                                print(f"Updated to {len(adjectives)} adjectives and {len(nouns)} nouns after clearing exclusions")
+                        
+                        elif excl_choice == '5':
+                            continue
+                        
+                        else:
+                            print("Invalid choice")
                     
-                    print(f"Case style set to: {case_style}")
-                
-                elif settings_choice == '5':
-                    # Configure word length limits
-                    try:
-                        new_min = input("Enter minimum word length (0 for no minimum): ")
-                        min_length = int(new_min) if new_min.isdigit() else 0
+                    elif settings_choice == '3':
+                        # Configure codename pattern
+                        print("\nCodername Pattern:")
+                        print("1. adj-noun (Adjective + Noun)")
+                        print("2. noun-noun (Noun + Noun)")
+                        print("3. adj-adj-noun (Adjective + Adjective + Noun)")
+                        print("4. noun-adj (Noun + Adjective)")
+                        print("5. adj-noun-number (Adjective + Noun + Number)")
                         
-                        new_max = input("Enter maximum word length (0 for no maximum): ")
-                        max_length = int(new_max) if new_max.isdigit() else 0
+                        pattern_choice = input("Enter your choice (1-5): ")
+                        if pattern_choice == '1':
+                            pattern = "adj-noun"
+                        elif pattern_choice == '2':
+                            pattern = "noun-noun"
+                        elif pattern_choice == '3':
+                            pattern = "adj-adj-noun"
+                        elif pattern_choice == '4':
+                            pattern = "noun-adj"
+                        elif pattern_choice == '5':
+                            pattern = "adj-noun-number"
+                        else:
+                            print("Invalid choice, keeping current pattern")
+                        
+                        print(f"Pattern set to: {pattern}")
+                    
+                    elif settings_choice == '4':
+                        # Configure text case style
+                        print("\nText Case Style:")
+                        print("1. Title Case (First Letter Of Each Word Capitalized)")
+                        print("2. UPPERCASE (ALL LETTERS CAPITALIZED)")
+                        print("3. lowercase (all letters lowercase)")
+                        print("4. Sentence case (Only first letter capitalized)")
                         
-                        if min_length > 0 and max_length > 0 and min_length > max_length:
-                            print("Error: Minimum length cannot be greater than maximum length")
+                        case_choice = input("Enter your choice (1-4): ")
+                        if case_choice == '1':
+                            case_style = "title"
+                        elif case_choice == '2':
+                            case_style = "upper"
+                        elif case_choice == '3':
+                            case_style = "lower"
+                        elif case_choice == '4':
+                            case_style = "sentence"
+                        else:
+                            print("Invalid choice, keeping current case style")
+                        
+                        print(f"Case style set to: {case_style}")
+                    
+                    elif settings_choice == '5':
+                        # Configure word length limits
+                        try:
+                            new_min = input("Enter minimum word length (0 for no minimum): ")
+                            min_length = int(new_min) if new_min.isdigit() else 0
+                            
+                            new_max = input("Enter maximum word length (0 for no maximum): ")
+                            max_length = int(new_max) if new_max.isdigit() else 0
+                            
+                            if min_length > 0 and max_length > 0 and min_length > max_length:
+                                print("Error: Minimum length cannot be greater than maximum length")
+                                min_length = 0
+                                max_length = 0
+                            
+                            print(f"Word length limits set to: min={min_length}, max={max_length}")
+                            
+                            new_min_total = input("Enter minimum total codename length (0 for no minimum): ")
+                            min_total_length = int(new_min_total) if new_min_total.isdigit() else 0
+                            
+                            new_max_total = input("Enter maximum total codename length (0 for no maximum): ")
+                            max_total_length = int(new_max_total) if new_max_total.isdigit() else 0
+                            
+                            if min_total_length > 0 and max_total_length > 0 and min_total_length > max_total_length:
+                                print("Error: Minimum total length cannot be greater than maximum total length")
+                                min_total_length = 0
+                                max_total_length = 0
+                            
+                            print(f"Total length limits set to: min={min_total_length}, max={max_total_length}")
+                        except ValueError:
+                            print("Invalid input. Using default values (no limits).")
                             min_length = 0
                             max_length = 0
+                            min_total_length = 0
+                            max_total_length = 0
+                    
+                    elif settings_choice == '6':
+                        # Configure separator
+                        print("\nSeparator Options:")
+                        print("1. Space ( )")
+                        print("2. Hyphen (-)")
+                        print("3. Underscore (_)")
+                        print("4. Dot (.)")
+                        print("5. No separator")
+                        print("6. Custom separator")
                         
-                        print(f"Word length limits set to: min={min_length}, max={max_length}")
-                    except ValueError:
-                        print("Invalid input. Using default values (no limits).")
-                        min_length = 0
-                        max_length = 0
-                
-                elif settings_choice == '6':
-                    # Configure separator
-                    print("\nSeparator Options:")
-                    print("1. Space ( )")
-                    print("2. Hyphen (-)")
-                    print("3. Underscore (_)")
-                    print("4. Dot (.)")
-                    print("5. No separator")
-                    print("6. Custom separator")
+                        sep_choice = input("Enter your choice (1-6): ")
+                        if sep_choice == '1':
+                            separator = " "
+                        elif sep_choice == '2':
+                            separator = "-"
+                        elif sep_choice == '3':
+                            separator = "_"
+                        elif sep_choice == '4':
+                            separator = "."
+                        elif sep_choice == '5':
+                            separator = ""
+                        elif sep_choice == '6':
+                            separator = input("Enter custom separator: ")
+                        else:
+                            print("Invalid choice, keeping current separator")
+                        
+                        print(f"Separator set to: '{separator}'")
                     
-                    sep_choice = input("Enter your choice (1-6): ")
-                    if sep_choice == '1':
-                        separator = " "
-                    elif sep_choice == '2':
-                        separator = "-"
-                    elif sep_choice == '3':
-                        separator = "_"
-                    elif sep_choice == '4':
-                        separator = "."
-                    elif sep_choice == '5':
-                        separator = ""
-                    elif sep_choice == '6':
-                        separator = input("Enter custom separator: ")
-                    else:
-                        print("Invalid choice, keeping current separator")
+                    elif settings_choice == '7':
+                        # Configure letter constraints
+                        print("\nLetter Constraints:")
+                        print("1. Alliteration (all words start with the same letter)")
+                        print("2. Initials (word initials spell given letters, e.g. B.F.)")
+                        print("3. Prefix (first word starts with given letters)")
+                        print("4. Clear letter constraints")
+                        
+                        letter_choice = input("Enter your choice (1-4): ")
+                        if letter_choice == '1':
+                            alliterate = input("Enable alliteration? (y/n): ").lower() == 'y'
+                        elif letter_choice == '2':
+                            initials = input("Enter initials (blank for none): ").strip() or None
+                        elif letter_choice == '3':
+                            prefix = input("Enter prefix (blank for none): ").strip() or None
+                        elif letter_choice == '4':
+                            alliterate = False
+                            initials = None
+                            prefix = None
+                        else:
+                            print("Invalid choice, keeping current letter constraints")
+                        
+                        print(f"Letter constraints set to: alliterate={alliterate}, initials={initials}, prefix={prefix}")
+                    
+                    elif settings_choice == '8':
+                        continue
                     
-                    print(f"Separator set to: '{separator}'")
+                    else:
+                        print("Invalid choice")
                 
-                elif settings_choice == '7':
-                    continue
+                elif choice == '6':
+                    # Display help
+                    display_help()
                 
+                elif choice == '7':
+                    print("Thank you for using the Codename Generator. Goodbye!")
+                    favorites_store.close()
+                    break
+                    
                 else:
-                    print("Invalid choice")
-            
-            elif choice == '6':
-                # Display help
-                display_help()
-            
-            elif choice == '7':
-                print("Thank you for using the Codename Generator. Goodbye!")
+                    print("Invalid choice. Please enter a number from 1-7.")
+                    
+            except KeyboardInterrupt:
+                print("\nProgram interrupted. Exiting...")
                 break
-                
-            else:
-                print("Invalid choice. Please enter a number from 1-7.")
-                
-        except KeyboardInterrupt:
-            print("\nProgram interrupted. Exiting...")
-            break
 
 if __name__ == "__main__":
     print("Welcome to the Enhanced Random Codename Generator!")
@@ -0,0 +1,65 @@
+import importlib.util
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_script(filename, name):
+    """Import one of the SpySpeak scripts, whose file names aren't valid module names"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets are not available")
+class DaemonSocketTest(unittest.TestCase):
+    """Clients only trust a daemon socket in a private directory owned by the user"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cli = load_script("SpySpeak-cli.py", "spyspeak_cli")
+        cls.client = load_script("SpySpeak-client.py", "spyspeak_client")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        os.chmod(self.directory, 0o700)
+        self.socket_path = os.path.join(self.directory, "daemon.sock")
+
+    def listen(self):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(self.socket_path)
+        return server
+
+    def test_missing_socket_is_not_a_problem(self):
+        for module in (self.cli, self.client):
+            self.assertIsNone(module.daemon_socket_problem(self.socket_path))
+
+    def test_private_socket_is_trusted(self):
+        self.listen()
+        for module in (self.cli, self.client):
+            self.assertIsNone(module.daemon_socket_problem(self.socket_path))
+
+    def test_shared_directory_is_rejected(self):
+        self.listen()
+        os.chmod(self.directory, 0o777)
+        for module in (self.cli, self.client):
+            self.assertIsNotNone(module.daemon_socket_problem(self.socket_path))
+
+    def test_regular_file_is_rejected(self):
+        with open(self.socket_path, 'w'):
+            pass
+        for module in (self.cli, self.client):
+            self.assertIsNotNone(module.daemon_socket_problem(self.socket_path))
+
+    def test_client_runs_locally_instead_of_using_an_untrusted_socket(self):
+        self.listen()
+        os.chmod(self.directory, 0o777)
+        self.assertIsNone(self.cli.forward_to_daemon(["-c", "1"], self.socket_path))
+
+if __name__ == '__main__':
+    unittest.main()
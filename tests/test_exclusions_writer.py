@@ -0,0 +1,36 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_script(filename, name):
+    """Import one of the SpySpeak scripts, whose file names aren't valid module names"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class ExclusionsWriterTest(unittest.TestCase):
+    """Pending exclusions are written when the menu loop exits with an exception"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.spyspeak = load_script("SpySpeak.py", "spyspeak")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filename = os.path.join(self.directory, "exclusions.txt")
+
+    def test_pending_words_are_written_when_the_block_raises(self):
+        with self.assertRaises(EOFError):
+            with self.spyspeak.ExclusionsWriter(self.filename) as writer:
+                writer.save(["zebra", "falcon"])
+                raise EOFError
+        self.assertEqual(self.spyspeak.load_exclusions(self.filename), ["zebra", "falcon"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_script(filename, name):
+    """Import one of the SpySpeak scripts, whose file names aren't valid module names"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@unittest.skipUnless(importlib.util.find_spec('flask'), "Flask is not installed")
+class RateLimitTest(unittest.TestCase):
+    """Requests up to and past the burst size are accepted from a full bucket"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.export_dir = tempfile.mkdtemp()
+        os.environ['SPYSPEAK_EXPORT_DIR'] = cls.export_dir
+        try:
+            cls.web = load_script("SpySpeak-web.py", "spyspeak_web")
+        finally:
+            del os.environ['SPYSPEAK_EXPORT_DIR']
+        cls.burst = int(cls.web.RATE_LIMIT_BURST)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.web.job_executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(cls.export_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.web.rate_limit_buckets.clear()
+        self.client = self.web.app.test_client()
+
+    def get_codenames(self, count, address):
+        return self.client.get(f'/api/codenames?count={count}', environ_base={'REMOTE_ADDR': address})
+
+    def test_counts_around_the_burst_pass_on_a_full_bucket(self):
+        for number, count in enumerate((self.burst - 1, self.burst, 2 * self.burst)):
+            response = self.get_codenames(count, f'10.0.0.{number + 1}')
+            self.assertEqual(response.status_code, 200, count)
+            self.assertEqual(len(response.get_json()['codenames']), count)
+
+    def test_large_request_on_an_empty_bucket_is_throttled(self):
+        self.assertEqual(self.get_codenames(self.burst, '10.0.1.1').status_code, 200)
+        response = self.get_codenames(self.burst, '10.0.1.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+
+    def test_largest_job_passes_on_a_full_bucket(self):
+        response = self.client.post('/api/jobs', json={'count': self.web.MAX_JOB_COUNT},
+                                    environ_base={'REMOTE_ADDR': '10.0.2.1'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job']['id']
+        # The job emptied its client's bucket, so cancel it from another address
+        response = self.client.delete(f'/api/jobs/{job_id}', environ_base={'REMOTE_ADDR': '10.0.2.2'})
+        self.assertEqual(response.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
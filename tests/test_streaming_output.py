@@ -0,0 +1,82 @@
+import gzip
+import importlib.util
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_script(filename, name):
+    """Import one of the SpySpeak scripts, whose file names aren't valid module names"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+ADJECTIVES = ["Amber", "Brisk", "Calm", "Dusky", "Eager"]
+NOUNS = ["Falcon", "Glacier", "Harbor", "Island", "Jaguar"]
+
+class CliStreamingTest(unittest.TestCase):
+    """Streamed codenames are drawn lazily and written exactly like a generated list"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cli = load_script("SpySpeak-cli.py", "spyspeak_cli")
+
+    def generate(self, stream):
+        self.cli.thread_state.rng = random.Random(7)
+        return self.cli.generate_codename(ADJECTIVES, NOUNS, count=25003, stream=stream)
+
+    def test_stream_is_lazy(self):
+        codenames = self.generate(stream=True)
+        self.assertNotIsInstance(codenames, list)
+        self.assertEqual(len(list(codenames)), 25003)
+
+    def test_streamed_output_matches_list_output(self):
+        expected = self.generate(stream=False)
+        for format_type in ("text", "json", "csv", "html"):
+            file = io.StringIO()
+            self.assertEqual(self.cli.write_output(self.generate(stream=True), file, format_type), 25003)
+            self.assertEqual(file.getvalue(), self.cli.format_output(expected, format_type))
+
+@unittest.skipUnless(importlib.util.find_spec('flask'), "Flask is not installed")
+class WebStreamingTest(unittest.TestCase):
+    """/api/codenames streams a gzip body that decodes to the requested names"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.export_dir = tempfile.mkdtemp()
+        os.environ['SPYSPEAK_EXPORT_DIR'] = cls.export_dir
+        try:
+            cls.web = load_script("SpySpeak-web.py", "spyspeak_web")
+        finally:
+            del os.environ['SPYSPEAK_EXPORT_DIR']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.web.job_executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(cls.export_dir, ignore_errors=True)
+
+    def test_gzip_response_is_streamed(self):
+        count = 2 * self.web.JOB_CHUNK_SIZE + 1
+        response = self.web.app.test_client().get(f'/api/codenames?count={count}',
+                                                  headers={'Accept-Encoding': 'gzip'},
+                                                  environ_base={'REMOTE_ADDR': '10.0.3.1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.get_data()))['codenames']), count)
+
+    def test_streamed_body_matches_jsonify(self):
+        names = [f"Name {number}" for number in range(self.web.JOB_CHUNK_SIZE + 1)]
+        with self.web.app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            streamed = self.web.codenames_response({'success': True, 'codenames': iter(names)})
+            expected = self.web.jsonify({'success': True, 'codenames': names})
+            self.assertEqual(gzip.decompress(b"".join(streamed.response)), expected.get_data())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_script(filename, name):
+    """Import one of the SpySpeak scripts, whose file names aren't valid module names"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class ThemeManifestTest(unittest.TestCase):
+    """The theme manifest is rebuilt when a theme file is edited in place"""
+
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(os.chdir, self.previous_dir)
+        os.makedirs(os.path.join(self.directory, "themes"))
+        for filename in ("adjectives.txt", "nouns.txt"):
+            with open(os.path.join(self.directory, filename), 'w', encoding='utf-8') as file:
+                file.write("alpha\nbravo\n")
+        self.write_theme_file("ocean_adj.txt", "azure\ncoral\n")
+        self.write_theme_file("ocean_nouns.txt", "reef\ntide\n")
+        os.chdir(self.directory)
+
+    def write_theme_file(self, filename, content, mode='w'):
+        with open(os.path.join(self.directory, "themes", filename), mode, encoding='utf-8') as file:
+            file.write(content)
+
+    def test_cli_manifest_rebuilds_after_in_place_edit(self):
+        cli = load_script("SpySpeak-cli.py", "spyspeak_cli")
+        manifest = cli.load_theme_manifest("manifest.json", "adjectives.txt", "nouns.txt")
+        self.assertEqual(manifest['themes']['ocean']['adjectives']['words'], 2)
+
+        self.write_theme_file("ocean_adj.txt", "briny\nstormy\n", mode='a')
+        manifest = cli.load_theme_manifest("manifest.json", "adjectives.txt", "nouns.txt")
+        self.assertEqual(manifest['themes']['ocean']['adjectives']['words'], 4)
+
+    def test_interactive_manifest_rebuilds_after_in_place_edit(self):
+        spyspeak = load_script("SpySpeak.py", "spyspeak")
+        manifest = spyspeak.load_theme_manifest("adjectives.txt", "nouns.txt", "manifest.json")
+        self.assertEqual(manifest['themes']['ocean']['nouns']['words'], 2)
+
+        self.write_theme_file("ocean_nouns.txt", "wave\n", mode='a')
+        manifest = spyspeak.load_theme_manifest("adjectives.txt", "nouns.txt", "manifest.json")
+        self.assertEqual(manifest['themes']['ocean']['nouns']['words'], 3)
+
+    @unittest.skipUnless(importlib.util.find_spec('flask'), "Flask is not installed")
+    def test_web_manifest_rebuilds_after_in_place_edit(self):
+        web = load_script("SpySpeak-web.py", "spyspeak_web")
+        web.MANIFEST_FILE = os.path.join(self.directory, "manifest.json")
+        self.assertEqual(web.get_theme_manifest()['themes']['ocean']['adjectives']['words'], 2)
+
+        self.write_theme_file("ocean_adj.txt", "briny\n", mode='a')
+        self.assertEqual(web.get_theme_manifest()['themes']['ocean']['adjectives']['words'], 3)
+
+if __name__ == '__main__':
+    unittest.main()